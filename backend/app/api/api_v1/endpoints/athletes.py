@@ -1,12 +1,256 @@
 """
 Athlete management endpoints
 """
-from fastapi import APIRouter
+import re
+from datetime import datetime
+from typing import Any, Literal, Optional
+from uuid import uuid4
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import (
+    get_async_db,
+    get_current_active_principal,
+    get_current_admin,
+)
+from app.core.config import settings
+from app.models.athlete import AthletePosition, Sport
+from app.schemas.athlete import (
+    AthleteCohortRanking,
+    AthleteDirectoryPage,
+    AthleteImportReport,
+    AthleteLeaderboard,
+    MetricSampleBatch,
+    MetricSeries,
+)
+from app.services.athlete_import import (
+    ImportTooLarge,
+    errors_path,
+    import_athletes,
+)
+from app.services.athlete_service import (
+    InvalidCursor,
+    UnknownMetric,
+    get_athlete_owner_id,
+    get_leaderboard,
+    list_athletes,
+)
+from app.services.cohort_stats import rank_athlete
+from app.services.metric_series import get_metric_window, ingest_samples
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
+_IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@router.get("/", response_model=AthleteDirectoryPage)
+async def get_athletes(
+    primary_sport: Optional[Sport] = None,
+    primary_position: Optional[AthletePosition] = None,
+    experience_level: Optional[str] = None,
+    recovery_status: Optional[str] = None,
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    min_bmi: Optional[float] = Query(None, gt=0),
+    max_bmi: Optional[float] = Query(None, gt=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(
+        settings.DIRECTORY_PAGE_SIZE, ge=1, le=settings.DIRECTORY_MAX_PAGE_SIZE
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    Athlete directory, newest first; pass next_cursor back as cursor to
+    get the following page. Age and BMI bounds are inclusive.
+    """
+    try:
+        return await list_athletes(
+            db,
+            limit=limit,
+            cursor=cursor,
+            primary_sport=primary_sport,
+            primary_position=primary_position,
+            experience_level=experience_level,
+            recovery_status=recovery_status,
+            min_age=min_age,
+            max_age=max_age,
+            min_bmi=min_bmi,
+            max_bmi=max_bmi,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        )
+
+
+@router.get("/leaderboard", response_model=AthleteLeaderboard)
+async def get_athlete_leaderboard(
+    sport: Sport,
+    metric: str,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    limit: int = Query(
+        settings.DIRECTORY_PAGE_SIZE, ge=1, le=settings.DIRECTORY_MAX_PAGE_SIZE
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    Top athletes of a sport on one of its registered metrics, optionally
+    restricted to a value range
+    """
+    try:
+        return await get_leaderboard(
+            db,
+            sport=sport,
+            metric=metric,
+            limit=limit,
+            min_value=min_value,
+            max_value=max_value,
+        )
+    except UnknownMetric as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        )
+
+
+@router.post("/{athlete_id}/metrics", status_code=status.HTTP_201_CREATED)
+async def ingest_athlete_metrics(
+    athlete_id: int,
+    batch: MetricSampleBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    Append a batch of timestamped metric samples to an athlete's history
+    """
+    owner_id = await get_athlete_owner_id(db, athlete_id)
+    if owner_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Athlete not found"
+        )
+    if owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only record metrics for your own profile",
+        )
+    return {"ingested": await ingest_samples(db, athlete_id, batch.samples)}
+
+
+@router.get("/{athlete_id}/metrics/{metric}", response_model=MetricSeries)
+async def get_athlete_metric_series(
+    athlete_id: int,
+    metric: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(
+        settings.METRIC_SERIES_MAX_POINTS,
+        ge=1,
+        le=settings.METRIC_SERIES_MAX_POINTS,
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    An athlete metric's samples in [start, end), oldest first; at most the
+    latest `limit` of them
+    """
+    window = await get_metric_window(
+        db, athlete_id, metric, start=start, end=end, limit=limit
+    )
+    return MetricSeries(
+        athlete_id=athlete_id,
+        metric=metric,
+        timestamps=np.datetime_as_string(window.timestamps, timezone="UTC"),
+        values=window.values.tolist(),
+    )
+
+
+@router.get("/{athlete_id}/percentiles", response_model=AthleteCohortRanking)
+async def get_athlete_percentiles(
+    athlete_id: int,
+    by_age: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    Where an athlete ranks on each registered metric among active athletes
+    of the same sport, position and (with by_age) age band
+    """
+    ranking = await rank_athlete(db, athlete_id, by_age=by_age)
+    if ranking is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Athlete not found"
+        )
+    return ranking
+
+
+@router.post("/imports", response_model=AthleteImportReport)
+async def import_athlete_roster(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin),
+) -> Any:
+    """
+    Bulk-create athlete accounts and profiles from a CSV or NDJSON request
+    body, streamed rather than uploaded as a form. Rejected records are
+    listed in the import's errors file. There is no progress until the
+    report is returned; app.cli.import_athletes prints it per chunk.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0]
+    format = format or _IMPORT_CONTENT_TYPES.get(content_type.strip())
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass format",
+        )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds {settings.MAX_FILE_SIZE} bytes",
+        )
+
+    import_id = uuid4().hex
+    path = errors_path(import_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with path.open("w") as errors:
+            report = await import_athletes(
+                db, request.stream(), format, errors, import_id=import_id
+            )
+    except ImportTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(exc),
+        )
+    if not report.failed:
+        path.unlink()
+    return report
+
 
-# Athlete endpoints will be implemented here
-@router.get("/")
-def get_athletes():
-    return {"message": "Athletes endpoint - coming soon"}
+@router.get("/imports/{import_id}/errors")
+async def get_import_errors(
+    import_id: str,
+    current_user: Principal = Depends(get_current_admin),
+) -> Any:
+    """
+    Records an import rejected, one JSON object per line with the reasons
+    """
+    path = errors_path(import_id)
+    if not re.fullmatch(r"[0-9a-f]{32}", import_id) or not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No rejected records for this import",
+        )
+    return FileResponse(path, media_type="application/x-ndjson")
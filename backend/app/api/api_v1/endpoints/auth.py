@@ -2,35 +2,51 @@
 Authentication endpoints
 """
 from datetime import timedelta
-from typing import Any
+from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-
-from app.api.deps import get_current_active_user, get_current_user, get_db
+from fastapi.security import HTTPAuthorizationCredentials, OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import (
+    get_async_db,
+    get_current_active_user,
+    get_current_principal,
+    get_current_user,
+    security,
+)
+from app.api.rate_limit import (
+    login_rate_limit,
+    password_reset_rate_limit,
+    register_rate_limit,
+)
 from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.core.routing import use_primary
 from app.core.security import (
     create_access_token,
     create_refresh_token,
+    decode_token,
     generate_email_verification_token,
     generate_password_reset_token,
     verify_email_verification_token,
     verify_password_reset_token,
-    verify_token,
 )
 from app.models.user import User
 from app.schemas.auth import LoginResponse, LogoutResponse, RefreshToken, Token
 from app.schemas.user import EmailVerification, PasswordReset, PasswordResetConfirm
 from app.schemas.user import User as UserSchema
 from app.schemas.user import UserLogin, UserRegister
-from app.services.user_service import (
+from app.services.activity_recorder import activity_recorder
+from app.services.async_user_service import (
+    UserAlreadyExists,
     authenticate_user,
     create_user,
     get_user_by_email,
     update_user_password,
     verify_user_email,
 )
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
@@ -39,21 +55,22 @@ router = APIRouter()
     "/register",
     response_model=LoginResponse,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(register_rate_limit)],
 )
-def register(user_data: UserRegister, db: Session = Depends(get_db)) -> Any:
+async def register(
+    user_data: UserRegister, db: AsyncSession = Depends(get_async_db)
+) -> Any:
     """
     Register a new user (athlete or coach)
     """
-    # Check if user already exists
-    if get_user_by_email(db, email=user_data.email):
+    # Create user, the insert itself enforces unique email and username
+    try:
+        user = await create_user(db, user_data)
+    except UserAlreadyExists as exc:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this email already exists",
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
         )
 
-    # Create user
-    user = create_user(db, user_data)
-
     # Generate tokens
     access_token_expires = timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -84,15 +101,21 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)) -> Any:
     }
 
 
-@router.post("/login", response_model=LoginResponse)
-def login(
+@router.post(
+    "/login",
+    response_model=LoginResponse,
+    dependencies=[Depends(login_rate_limit)],
+)
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Any:
     """
     Login user and return JWT tokens
     """
-    user = authenticate_user(
+    # Read the row from the primary, a rehash may write it back
+    use_primary(db)
+    user = await authenticate_user(
         db, email=form_data.username, password=form_data.password
     )
     if not user:
@@ -108,11 +131,8 @@ def login(
             detail="Inactive user account",
         )
 
-    # Update last login
-    from datetime import datetime
-
-    user.last_login = datetime.utcnow()
-    db.commit()
+    # Buffer last login, flushed in batches off the request path
+    activity_recorder.record_login(user.id)
 
     # Generate tokens
     access_token_expires = timedelta(
@@ -141,14 +161,20 @@ def login(
     }
 
 
-@router.post("/login/email", response_model=LoginResponse)
-def login_with_email(
-    login_data: UserLogin, db: Session = Depends(get_db)
+@router.post(
+    "/login/email",
+    response_model=LoginResponse,
+    dependencies=[Depends(login_rate_limit)],
+)
+async def login_with_email(
+    login_data: UserLogin, db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Login user with email and password
     """
-    user = authenticate_user(
+    # Read the row from the primary, a rehash may write it back
+    use_primary(db)
+    user = await authenticate_user(
         db, email=login_data.email, password=login_data.password
     )
     if not user:
@@ -163,11 +189,8 @@ def login_with_email(
             detail="Inactive user account",
         )
 
-    # Update last login
-    from datetime import datetime
-
-    user.last_login = datetime.utcnow()
-    db.commit()
+    # Buffer last login, flushed in batches off the request path
+    activity_recorder.record_login(user.id)
 
     # Generate tokens
     access_token_expires = timedelta(
@@ -197,18 +220,22 @@ def login_with_email(
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(
-    refresh_data: RefreshToken, db: Session = Depends(get_db)
-) -> Any:
+async def refresh_token(refresh_data: RefreshToken) -> Any:
     """
-    Refresh access token using refresh token
+    Exchange a refresh token for a new token pair, revoking the old one
     """
-    user_id = verify_token(refresh_data.refresh_token)
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token",
-        )
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+    )
+    payload = decode_token(refresh_data.refresh_token)
+    if payload is None or payload.type != "refresh" or payload.jti is None:
+        raise invalid_token
+
+    # Rotate: the first use revokes the token, any later use is rejected
+    if not await revocation_list.revoke(payload.jti, payload.exp):
+        raise invalid_token
+    user_id = payload.sub
 
     # Generate new access token
     access_token_expires = timedelta(
@@ -218,7 +245,7 @@ def refresh_token(
         subject=user_id, expires_delta=access_token_expires
     )
 
-    # Optionally generate new refresh token
+    # Generate the replacement refresh token
     refresh_token = create_refresh_token(subject=user_id)
 
     return {
@@ -230,23 +257,41 @@ def refresh_token(
 
 
 @router.post("/logout", response_model=LogoutResponse)
-def logout(current_user: User = Depends(get_current_user)) -> Any:
+async def logout(
+    refresh_data: Optional[RefreshToken] = None,
+    current_user: Principal = Depends(get_current_principal),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> Any:
     """
-    Logout user (in a real implementation, you'd invalidate the token)
+    Logout user by revoking the access token (and refresh token, if sent)
     """
-    # In a production system, you'd add the token to a blacklist
-    # or store token IDs in the database for revocation
+    access = decode_token(credentials.credentials)
+    if access is not None and access.jti is not None:
+        await revocation_list.revoke(access.jti, access.exp)
+
+    if refresh_data is not None:
+        refresh = decode_token(refresh_data.refresh_token)
+        if (
+            refresh is not None
+            and refresh.type == "refresh"
+            and refresh.jti is not None
+            and refresh.sub == str(current_user.id)
+        ):
+            await revocation_list.revoke(refresh.jti, refresh.exp)
+
     return {"message": "Successfully logged out"}
 
 
-@router.post("/password-reset")
-def request_password_reset(
-    reset_data: PasswordReset, db: Session = Depends(get_db)
+@router.post(
+    "/password-reset", dependencies=[Depends(password_reset_rate_limit)]
+)
+async def request_password_reset(
+    reset_data: PasswordReset, db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     Request password reset token
     """
-    user = get_user_by_email(db, email=reset_data.email)
+    user = await get_user_by_email(db, email=reset_data.email)
     if not user:
         # Don't reveal if email exists for security
         return {"message": "If the email exists, a reset link has been sent"}
@@ -262,8 +307,9 @@ def request_password_reset(
 
 
 @router.post("/password-reset/confirm")
-def confirm_password_reset(
-    reset_data: PasswordResetConfirm, db: Session = Depends(get_db)
+async def confirm_password_reset(
+    reset_data: PasswordResetConfirm,
+    db: AsyncSession = Depends(get_async_db),
 ) -> Any:
     """
     Confirm password reset with token
@@ -275,21 +321,23 @@ def confirm_password_reset(
             detail="Invalid or expired reset token",
         )
 
-    user = get_user_by_email(db, email=email)
+    use_primary(db)
+    user = await get_user_by_email(db, email=email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
     # Update password
-    update_user_password(db, user.id, reset_data.new_password)
+    await update_user_password(db, user.id, reset_data.new_password)
 
     return {"message": "Password successfully reset"}
 
 
 @router.post("/verify-email")
-def verify_email(
-    verification_data: EmailVerification, db: Session = Depends(get_db)
+async def verify_email(
+    verification_data: EmailVerification,
+    db: AsyncSession = Depends(get_async_db),
 ) -> Any:
     """
     Verify user email with token
@@ -301,7 +349,8 @@ def verify_email(
             detail="Invalid or expired verification token",
         )
 
-    user = get_user_by_email(db, email=email)
+    use_primary(db)
+    user = await get_user_by_email(db, email=email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -311,13 +360,13 @@ def verify_email(
         return {"message": "Email already verified"}
 
     # Verify email
-    verify_user_email(db, user.id)
+    await verify_user_email(db, user.id)
 
     return {"message": "Email successfully verified"}
 
 
 @router.get("/me", response_model=UserSchema)
-def get_current_user_info(
+async def get_current_user_info(
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -327,7 +376,7 @@ def get_current_user_info(
 
 
 @router.post("/resend-verification")
-def resend_verification_email(
+async def resend_verification_email(
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
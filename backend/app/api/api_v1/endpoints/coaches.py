@@ -1,7 +1,45 @@
 """
 Coach management endpoints
 """
-from fastapi import APIRouter
+from typing import Any, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import (
+    get_async_db,
+    get_current_active_principal,
+    get_current_athlete,
+    get_current_coach,
+)
+from app.core.config import settings
+from app.models.athlete import Sport
+from app.models.coach import CoachSpecialization
+from app.schemas.coach import (
+    AvailableCoaches,
+    CoachMatches,
+    CoachRatingSummary,
+    CoachReview,
+    CoachReviewIn,
+    CoachReviewPage,
+    CoachRoster,
+)
+from app.services.coach_availability import (
+    InvalidWindow,
+    find_available_coaches,
+)
+from app.services.coach_matching import match_coaches
+from app.services.coach_service import (
+    ReviewNotAllowed,
+    delete_review,
+    get_coach_roster,
+    get_rating_summary,
+    get_review_author,
+    list_reviews,
+    save_review,
+)
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
@@ -10,3 +48,157 @@ router = APIRouter()
 @router.get("/")
 def get_coaches():
     return {"message": "Coaches endpoint - coming soon"}
+
+
+@router.get("/matches", response_model=CoachMatches)
+async def get_coach_matches(
+    athlete_id: int,
+    specialization: List[CoachSpecialization] = Query([]),
+    max_rate: Optional[float] = Query(None, ge=0),
+    limit: int = Query(10, ge=1, le=settings.COACH_MATCH_MAX_RESULTS),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    Coaches accepting athletes that best match an athlete's sports and
+    level, the wanted specializations and rating, within a budget
+    """
+    matches = await match_coaches(
+        db,
+        athlete_id,
+        limit,
+        specializations=specialization,
+        max_rate=max_rate,
+    )
+    if matches is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Athlete not found",
+        )
+    return matches
+
+
+@router.get("/available", response_model=AvailableCoaches)
+async def get_available_coaches(
+    sport: Sport,
+    day: str,
+    start: str = Query(..., description="HH:MM"),
+    end: str = Query(..., description="HH:MM, before start runs past midnight"),
+    time_zone: Optional[str] = Query(None, description="IANA name, UTC if unset"),
+    mode: Literal["whole", "any"] = "whole",
+    limit: int = Query(20, ge=1, le=settings.COACH_AVAILABILITY_MAX_RESULTS),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    Coaches of a sport free for the whole weekly window, or (mode=any) for
+    part of it, e.g. Tuesday 18:00-20:00 in the caller's time zone
+    """
+    try:
+        return await find_available_coaches(
+            db,
+            sport,
+            day,
+            start,
+            end,
+            time_zone=time_zone,
+            whole=mode == "whole",
+            limit=limit,
+        )
+    except InvalidWindow as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        )
+
+
+@router.get("/me/roster", response_model=CoachRoster)
+async def get_my_roster(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_coach),
+) -> Any:
+    """
+    The current coach's active athletes with profile, latest metrics and
+    pending recommendation counts, in a fixed number of queries
+    """
+    roster = await get_coach_roster(db, current_user.id)
+    if roster is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Coach profile not found"
+        )
+    return roster
+
+
+@router.get("/{coach_id}/rating", response_model=CoachRatingSummary)
+async def get_coach_rating(
+    coach_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    A coach's review count, average and Bayesian rating and star histogram
+    """
+    summary = await get_rating_summary(db, coach_id)
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Coach not found"
+        )
+    return summary
+
+
+@router.get("/{coach_id}/reviews", response_model=CoachReviewPage)
+async def get_coach_reviews(
+    coach_id: int,
+    limit: int = Query(settings.COACH_REVIEWS_PAGE_SIZE, ge=1, le=100),
+    before_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    A coach's reviews, newest first; pass next_cursor back as before_id
+    """
+    return await list_reviews(db, coach_id, limit=limit, before_id=before_id)
+
+
+@router.put("/{coach_id}/reviews", response_model=CoachReview)
+async def put_coach_review(
+    coach_id: int,
+    review: CoachReviewIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_athlete),
+) -> Any:
+    """
+    Create or replace the current athlete's review of a coach they have
+    worked with
+    """
+    try:
+        athlete_id = await get_review_author(db, current_user.id, coach_id)
+        return await save_review(
+            db, coach_id, athlete_id, review.rating, review.comment
+        )
+    except ReviewNotAllowed as exc:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc))
+    except IntegrityError:
+        # A concurrent first review by the same athlete won
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Review was modified concurrently, retry",
+        )
+
+
+@router.delete("/{coach_id}/reviews", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_coach_review(
+    coach_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_athlete),
+) -> Response:
+    """Withdraw the current athlete's review of a coach"""
+    try:
+        athlete_id = await get_review_author(db, current_user.id, coach_id)
+    except ReviewNotAllowed as exc:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc))
+    if not await delete_review(db, coach_id, athlete_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,7 +1,17 @@
 """
 User management endpoints
 """
-from fastapi import APIRouter
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_async_db, get_current_active_principal
+from app.core.config import settings
+from app.models.user import UserType
+from app.schemas.user import UserSearch
+from app.services.principal_cache import Principal
+from app.services.user_search import search_users
 
 router = APIRouter()
 
@@ -10,3 +20,17 @@ router = APIRouter()
 @router.get("/")
 def get_users():
     return {"message": "Users endpoint - coming soon"}
+
+
+@router.get("/search", response_model=List[UserSearch])
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=settings.USER_SEARCH_MAX_RESULTS),
+    user_type: Optional[UserType] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Any:
+    """
+    Search users by username or name (prefix, substring or close match)
+    """
+    return await search_users(db, q, limit=limit, user_type=user_type)
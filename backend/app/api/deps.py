@@ -1,38 +1,32 @@
 """
 FastAPI dependencies for authentication and database access
 """
-from typing import Generator, Optional
+from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import SessionLocal
-from app.core.security import verify_token
+from app.core.database import get_async_db, get_db
+from app.core.revocation import revocation_list
+from app.core.routing import set_consistency_key
+from app.core.security import decode_token
 from app.models.user import User
-from app.services.user_service import get_user_by_id
+from app.services.activity_recorder import activity_recorder
+from app.services.async_user_service import get_user_by_id
+from app.services.principal_cache import Principal, get_principal
+from app.services.user_loader import UserLoader
 
 # Security scheme
 security = HTTPBearer()
 
 
-def get_db() -> Generator:
-    """
-    Database dependency
-    """
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
-
-
-async def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_principal(
+    db: AsyncSession = Depends(get_async_db),
     credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> User:
+) -> Principal:
     """
-    Get the current authenticated user from JWT token
+    Get the cached principal of the authenticated caller from JWT token
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,22 +39,69 @@ async def get_current_user(
         token = credentials.credentials
 
         # Verify token and get user ID
-        user_id = verify_token(token)
-        if user_id is None:
+        payload = decode_token(token)
+        if payload is None or payload.type != "access":
             raise credentials_exception
 
-        # Get user from database
-        user = get_user_by_id(db, user_id=int(user_id))
-        if user is None:
+        # Answered in memory unless the Bloom filter has seen this jti
+        if await revocation_list.is_revoked(payload.jti):
             raise credentials_exception
+        user_id = payload.sub
 
-        return user
+        # Reads in this request stay on the primary if this user just wrote
+        set_consistency_key(db, int(user_id))
+
+        # Get principal from cache, falling back to the database
+        principal = await get_principal(db, user_id=int(user_id))
+        if principal is None:
+            raise credentials_exception
+
+        activity_recorder.record_seen(principal.id)
+
+        return principal
 
     except Exception:
         raise credentials_exception
 
 
-def get_current_active_user(
+async def get_current_active_principal(
+    principal: Principal = Depends(get_current_principal),
+) -> Principal:
+    """
+    Get the cached principal of the caller (must be active)
+    """
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
+        )
+    return principal
+
+
+def get_user_loader(db: AsyncSession = Depends(get_async_db)) -> UserLoader:
+    """
+    Batched user lookups shared by every dependency of the request
+    """
+    return UserLoader(db)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    loader: UserLoader = Depends(get_user_loader),
+) -> User:
+    """
+    Get the full User row of the authenticated caller
+    """
+    user = await loader.load(principal.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     """
@@ -73,9 +114,9 @@ def get_current_active_user(
     return current_user
 
 
-def get_current_athlete(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+async def get_current_athlete(
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Principal:
     """
     Get the current user if they are an athlete
     """
@@ -87,9 +128,9 @@ def get_current_athlete(
     return current_user
 
 
-def get_current_coach(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+async def get_current_coach(
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Principal:
     """
     Get the current user if they are a coach
     """
@@ -101,9 +142,9 @@ def get_current_coach(
     return current_user
 
 
-def get_current_admin(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+async def get_current_admin(
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Principal:
     """
     Get the current user if they are an admin
     """
@@ -115,9 +156,9 @@ def get_current_admin(
     return current_user
 
 
-def get_current_verified_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+async def get_current_verified_user(
+    current_user: Principal = Depends(get_current_active_principal),
+) -> Principal:
     """
     Get the current user if they are verified
     """
@@ -129,8 +170,8 @@ def get_current_verified_user(
     return current_user
 
 
-def get_optional_current_user(
-    db: Session = Depends(get_db),
+async def get_optional_current_user(
+    db: AsyncSession = Depends(get_async_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
 ) -> Optional[User]:
     """
@@ -142,11 +183,15 @@ def get_optional_current_user(
 
     try:
         token = credentials.credentials
-        user_id = verify_token(token)
-        if user_id is None:
+        payload = decode_token(token)
+        if payload is None or payload.type != "access":
+            return None
+        if await revocation_list.is_revoked(payload.jti):
             return None
+        user_id = payload.sub
 
-        user = get_user_by_id(db, user_id=int(user_id))
+        set_consistency_key(db, int(user_id))
+        user = await get_user_by_id(db, user_id=int(user_id))
         return user
 
     except Exception:
@@ -0,0 +1,211 @@
+"""
+Rate limiting dependencies for the authentication endpoints
+
+Each limited route gets token buckets keyed by client IP and, when the
+request carries one, by the email being tried. All of a request's buckets
+are checked and charged in one atomic Lua script on Redis, so the limits
+hold across workers. While Redis is unavailable the same buckets are kept
+in process. Limiters run as route dependencies, ahead of the endpoint, so
+a rejected request never reaches password hashing or the database.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from redis import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_async_redis, mark_redis_failure, redis_available
+
+# KEYS: bucket keys. ARGV: capacity and refill rate (tokens per ms) per key.
+# Takes one token from every bucket, or none and returns the wait in ms.
+_TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local elapsed = math.max(now - (tonumber(bucket[2]) or now), 0)
+    available = math.min(capacity, available + elapsed * rate)
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+    tokens[i] = available
+end
+if wait > 0 then
+    return math.ceil(wait)
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate))
+end
+return 0
+"""
+
+# (key, capacity, tokens per second)
+_Bucket = Tuple[str, int, float]
+
+
+class LocalTokenBuckets:
+    """
+    In-process token buckets used while Redis is unavailable
+    """
+
+    def __init__(self, maxsize: int):
+        self._lock = threading.Lock()
+        # key -> (tokens, monotonic time of last update)
+        self._buckets: TTLCache[Tuple[float, float]] = TTLCache(
+            maxsize=maxsize, ttl=24 * 3600
+        )
+
+    def take(self, buckets: List[_Bucket]) -> float:
+        """Charge one token from every bucket, or return the wait in seconds"""
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            tokens = []
+            for key, capacity, rate in buckets:
+                available, updated = self._buckets.get(key) or (capacity, now)
+                available = min(capacity, available + (now - updated) * rate)
+                if available < 1:
+                    wait = max(wait, (1 - available) / rate)
+                tokens.append(available)
+            if wait > 0:
+                return wait
+            for (key, capacity, rate), available in zip(buckets, tokens):
+                self._buckets.set(key, (available - 1, now), ttl=capacity / rate)
+            return 0.0
+
+
+_local_buckets = LocalTokenBuckets(maxsize=settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+_script = None
+
+
+def _token_bucket_script():
+    # Script objects run EVALSHA and only send the source on NOSCRIPT
+    global _script
+    if _script is None:
+        _script = get_async_redis().register_script(_TOKEN_BUCKET_SCRIPT)
+    return _script
+
+
+def _client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def _request_email(request: Request) -> Optional[str]:
+    # FastAPI has already read the body, so these reuse the cached copy
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("application/json"):
+            body = await request.json()
+            email = body.get("email") if isinstance(body, dict) else None
+        elif content_type.startswith(
+            ("application/x-www-form-urlencoded", "multipart/form-data")
+        ):
+            # OAuth2 password form sends the email as username
+            email = (await request.form()).get("username")
+        else:
+            email = None
+    except ValueError:
+        return None
+    if not isinstance(email, str) or not email.strip():
+        return None
+    return email.strip().lower()
+
+
+class RateLimiter:
+    """
+    Dependency enforcing per-IP and per-email token buckets on a route
+    """
+
+    def __init__(
+        self,
+        route: str,
+        per_ip: int,
+        per_email: Optional[int] = None,
+        window: int = settings.RATE_LIMIT_WINDOW,
+    ):
+        self.route = route
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self.window = window
+
+    async def _buckets(self, request: Request) -> List[_Bucket]:
+        prefix = f"ratelimit:{self.route}"
+        buckets = [
+            (
+                f"{prefix}:ip:{_client_ip(request)}",
+                self.per_ip,
+                self.per_ip / self.window,
+            )
+        ]
+        if self.per_email:
+            email = await _request_email(request)
+            if email is not None:
+                # Keep addresses out of Redis key names
+                digest = hashlib.sha256(email.encode()).hexdigest()[:32]
+                buckets.append(
+                    (
+                        f"{prefix}:email:{digest}",
+                        self.per_email,
+                        self.per_email / self.window,
+                    )
+                )
+        return buckets
+
+    async def _take(self, buckets: List[_Bucket]) -> float:
+        if redis_available():
+            args: List[float] = []
+            for _, capacity, rate in buckets:
+                args += [capacity, rate / 1000]
+            try:
+                wait_ms = await _token_bucket_script()(
+                    keys=[key for key, _, _ in buckets], args=args
+                )
+                return int(wait_ms) / 1000
+            except RedisError as exc:
+                mark_redis_failure(exc)
+        return _local_buckets.take(buckets)
+
+    async def __call__(self, request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        wait = await self._take(await self._buckets(request))
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, please try again later",
+                headers={"Retry-After": str(max(math.ceil(wait), 1))},
+            )
+
+
+login_rate_limit = RateLimiter(
+    "login",
+    per_ip=settings.RATE_LIMIT_LOGIN_PER_IP,
+    per_email=settings.RATE_LIMIT_LOGIN_PER_EMAIL,
+)
+register_rate_limit = RateLimiter(
+    "register",
+    per_ip=settings.RATE_LIMIT_REGISTER_PER_IP,
+    per_email=settings.RATE_LIMIT_REGISTER_PER_EMAIL,
+)
+password_reset_rate_limit = RateLimiter(
+    "password-reset",
+    per_ip=settings.RATE_LIMIT_PASSWORD_RESET_PER_IP,
+    per_email=settings.RATE_LIMIT_PASSWORD_RESET_PER_EMAIL,
+)
@@ -0,0 +1,80 @@
+"""
+Import an athlete roster from a CSV or NDJSON file
+
+Streams the file through the same parser and chunked writer as
+POST /athletes/imports, printing progress after every chunk. Rejected
+records are written next to the input as <file>.errors.ndjson.
+
+    poetry run python -m app.cli.import_athletes roster.csv
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.hashing import password_hasher
+from app.schemas.athlete import AthleteImportReport
+from app.services.athlete_import import ImportTooLarge, import_athletes
+
+READ_SIZE = 64 * 1024
+
+
+async def read_chunks(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as source:
+        while chunk := source.read(READ_SIZE):
+            yield chunk
+
+
+def print_progress(report: AthleteImportReport) -> None:
+    print(
+        f"\r{report.processed} processed, {report.imported} imported, "
+        f"{report.failed} failed",
+        end="",
+        flush=True,
+    )
+
+
+async def run(path: Path, format: str, errors_path: Path) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            with errors_path.open("w") as errors:
+                report = await import_athletes(
+                    db, read_chunks(path), format, errors, on_progress=print_progress
+                )
+    except ImportTooLarge as exc:
+        print(f"\n{exc}", file=sys.stderr)
+        return 1
+    finally:
+        await async_engine.dispose()
+
+    print()
+    if report.failed:
+        print(f"Rejected records: {errors_path}")
+    else:
+        errors_path.unlink()
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file", type=Path)
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    parser.add_argument("--errors", type=Path, help="rejected records file")
+    args = parser.parse_args()
+
+    format = args.format or (
+        "csv" if args.file.suffix.lower() == ".csv" else "ndjson"
+    )
+    errors_path = args.errors or args.file.with_name(
+        args.file.name + ".errors.ndjson"
+    )
+    try:
+        sys.exit(asyncio.run(run(args.file, format, errors_path)))
+    finally:
+        password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Recompute every coach's review aggregates from their reviews
+
+Aggregates are moved incrementally on every ORM write of a review; this
+corrects drift left by bulk or raw SQL writes and cascaded deletes, and
+applies a changed COACH_RATING_PRIOR_MEAN or COACH_RATING_PRIOR_WEIGHT.
+Safe to run at any time, e.g. nightly.
+
+    poetry run python -m app.cli.recompute_coach_ratings
+"""
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.coach_service import recompute_coach_ratings
+
+
+async def run() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            corrected = await recompute_coach_ratings(db)
+    finally:
+        await async_engine.dispose()
+    print(f"Corrected the ratings of {corrected} coaches")
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Recount the current athletes of every coach
+
+active_athlete_count is kept up to date on every ORM write of a coach
+connection; this fixes any drift left by bulk or raw SQL writes. Safe to
+run at any time, e.g. nightly.
+
+    poetry run python -m app.cli.reconcile_coach_counts
+"""
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.coach_service import reconcile_athlete_counts
+
+
+async def run() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            corrected = await reconcile_athlete_counts(db)
+    finally:
+        await async_engine.dispose()
+    print(f"Corrected the athlete count of {corrected} coaches")
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
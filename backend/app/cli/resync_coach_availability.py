@@ -0,0 +1,35 @@
+"""
+Re-normalize coach availability after daylight saving changes
+
+coach_availability stores each coach's weekly schedule in UTC, using the
+offset their time zone had when the schedule was saved. When a zone enters
+or leaves daylight saving, the rows of its coaches are an hour off until
+this rewrites them. Only coaches whose rows changed are written, so it is
+cheap to run often, e.g. hourly, and at least right after each DST
+transition.
+
+    poetry run python -m app.cli.resync_coach_availability
+"""
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.services.coach_service import resync_coach_availability
+
+
+async def run() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            rewritten = await resync_coach_availability(db)
+    finally:
+        await async_engine.dispose()
+    print(f"Rewrote the availability of {rewritten} coaches")
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,12 @@ from pydantic import EmailStr, PostgresDsn, validator
 from pydantic_settings import BaseSettings
 
 
+def async_database_uri(uri: str) -> str:
+    """Rewrite a PostgreSQL URI to use the asyncpg driver"""
+    _, _, rest = uri.partition("://")
+    return f"postgresql+asyncpg://{rest}"
+
+
 class Settings(BaseSettings):
     # API Settings
     API_V1_STR: str = "/api/v1"
@@ -63,11 +69,62 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(
+        cls, v: Optional[str], values: Dict[str, Any]
+    ) -> Any:
+        if isinstance(v, str):
+            return v
+        # Same database as SQLALCHEMY_DATABASE_URI, driven through asyncpg
+        return async_database_uri(str(values.get("SQLALCHEMY_DATABASE_URI")))
+
+    # Read Replica Settings
+    SQLALCHEMY_REPLICA_URIS: List[str] = []
+    DB_REPLICA_SELECTION: str = "round_robin"  # round_robin or least_loaded
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    @validator("SQLALCHEMY_REPLICA_URIS", pre=True)
+    def assemble_replica_uris(
+        cls, v: Union[str, List[str], None]
+    ) -> List[str]:
+        if isinstance(v, str):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v or []
+
+    # Database Pool Settings (per engine, per worker process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+
+    # Query Diagnostics Settings
+    DB_QUERY_STATS_ENABLED: bool = True
+    N_PLUS_ONE_THRESHOLD: int = 10  # same statement shape per request
+    N_PLUS_ONE_RAISE: bool = False  # fail the request instead (tests)
+
+    # Activity Write-Behind Settings
+    ACTIVITY_FLUSH_INTERVAL: float = 5.0  # seconds between batched updates
+    ACTIVITY_FLUSH_BATCH_SIZE: int = 1000  # users per UPDATE statement
+
+    # User Search Settings
+    USER_SEARCH_CACHE_SIZE: int = 100000  # most recently seen users in memory
+    USER_SEARCH_CACHE_REFRESH: int = 300  # seconds between cache rebuilds
+    USER_SEARCH_MAX_RESULTS: int = 50
+
     # Redis Settings
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_SOCKET_TIMEOUT: float = 0.25  # seconds
+    REDIS_FAILURE_BACKOFF: int = 10  # seconds to skip Redis after an error
+
+    # Authenticated Principal Cache Settings
+    PRINCIPAL_CACHE_MAX_SIZE: int = 50000
+    PRINCIPAL_CACHE_L1_TTL: int = 30  # seconds, bounds cross-worker staleness
+    PRINCIPAL_CACHE_L2_TTL: int = 300  # seconds in Redis
 
     # Email Settings
     SMTP_TLS: bool = True
@@ -91,6 +148,37 @@ class Settings(BaseSettings):
     # Security Settings
     ALGORITHM: str = "HS256"
     PASSWORD_MIN_LENGTH: int = 8
+    TOKEN_CACHE_MAX_SIZE: int = 10000  # verified tokens kept per worker
+    TOKEN_CACHE_TTL: int = 3600  # seconds, never beyond the token's exp
+
+    # Token Revocation Settings
+    REVOCATION_SYNC_INTERVAL: float = 1.0  # seconds between denylist syncs
+    REVOCATION_BLOOM_CAPACITY: int = 100000  # revoked tokens before a resize
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001  # filter hits checked in Redis
+
+    # Auth Rate Limit Settings (attempts per RATE_LIMIT_WINDOW)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW: int = 60  # seconds for a bucket to refill
+    RATE_LIMIT_LOGIN_PER_IP: int = 30
+    RATE_LIMIT_LOGIN_PER_EMAIL: int = 5
+    RATE_LIMIT_REGISTER_PER_IP: int = 10
+    RATE_LIMIT_REGISTER_PER_EMAIL: int = 3
+    RATE_LIMIT_PASSWORD_RESET_PER_IP: int = 10
+    RATE_LIMIT_PASSWORD_RESET_PER_EMAIL: int = 3
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # key on X-Forwarded-For
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 100000  # buckets kept while Redis is down
+
+    # Password Hashing Pool Settings
+    PASSWORD_HASH_WORKERS: int = 2  # processes per API worker
+    PASSWORD_HASH_QUEUE_DEPTH: int = 64  # waiting calls before 503
+    PASSWORD_HASH_RETRY_AFTER: int = 1  # seconds, sent with 503
+
+    # Password Hash Cost Settings
+    PASSWORD_HASH_TARGET_MS: int = 250  # calibrated hash time per password
+    PASSWORD_HASH_ROUNDS: Optional[int] = None  # fixed bcrypt cost, no calibration
+    PASSWORD_HASH_MIN_ROUNDS: int = 10
+    PASSWORD_HASH_MAX_ROUNDS: int = 15
+    PASSWORD_HASH_CALIBRATION_TTL: int = 86400  # seconds a shared cost is kept
 
     # Application Settings
     USERS_OPEN_REGISTRATION: bool = True
@@ -100,6 +188,10 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_IMAGE_EXTENSIONS: List[str] = ["jpg", "jpeg", "png", "gif", "webp"]
 
+    # Roster Import Settings
+    IMPORT_CHUNK_SIZE: int = 1000  # records per multi-row insert
+    IMPORT_ERRORS_DIR: str = "imports"  # per-import rejected records files
+
     # Athlete/Coach Settings
     SUPPORTED_SPORTS: List[str] = [
         "football",
@@ -114,6 +206,29 @@ class Settings(BaseSettings):
         "golf",
     ]
 
+    # Directory Listing Settings
+    DIRECTORY_PAGE_SIZE: int = 20
+    DIRECTORY_MAX_PAGE_SIZE: int = 100
+
+    # Metric Time-Series Settings
+    METRIC_INGEST_MAX_BATCH: int = 5000  # samples per ingest request
+    METRIC_SERIES_MAX_POINTS: int = 10000  # samples per window read
+    METRIC_SAMPLE_MAX_AGE_DAYS: int = 3650  # oldest accepted sample timestamp
+    METRIC_SAMPLE_MAX_FUTURE_SECONDS: int = 86400  # clock skew allowed ahead
+
+    # Cohort Percentile Settings
+    COHORT_CACHE_SIZE: int = 2000  # cohorts held per worker
+    COHORT_CACHE_TTL: int = 300  # 5 minutes, staleness across workers
+
+    # Coach Matching Settings
+    COACH_MATCH_REFRESH: int = 300  # seconds between feature matrix rebuilds
+    COACH_MATCH_MAX_RESULTS: int = 50
+    COACH_AVAILABILITY_REFRESH: int = 300  # seconds between index rebuilds
+    COACH_AVAILABILITY_MAX_RESULTS: int = 100
+    COACH_RATING_PRIOR_MEAN: float = 3.5  # stars a coach starts from
+    COACH_RATING_PRIOR_WEIGHT: int = 10  # reviews the prior counts as
+    COACH_REVIEWS_PAGE_SIZE: int = 20
+
     # AI Recommendation Settings
     RECOMMENDATION_CACHE_TTL: int = 3600  # 1 hour
     MAX_RECOMMENDATIONS_PER_REQUEST: int = 10
@@ -1,22 +1,99 @@
 """
 Database configuration and session management
 """
+from typing import Any, AsyncGenerator, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy.pool import StaticPool
 
-from app.core.config import settings
+from app.core.config import async_database_uri, settings
+from app.core.db_pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+)
+from app.core.routing import ReadYourWrites, ReplicaSelector, RoutingSession
+
+# Pool sizing shared by the sync and async engines
+pool_options: Dict[str, Any] = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_pre_ping": True,
+}
 
 # Create database engine
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
-    poolclass=StaticPool,
-    pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,
     echo=False,  # Set to True for SQL debugging
+    **pool_options,
 )
 
+# Create read replica engines (empty when no replicas are configured)
+replica_engines = [
+    create_engine(uri, poolclass=InstrumentedQueuePool, **pool_options)
+    for uri in settings.SQLALCHEMY_REPLICA_URIS
+]
+
+# Create async database engine (asyncpg) for endpoints running on the event loop
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_ASYNC_DATABASE_URI),
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    echo=False,
+    **pool_options,
+)
+
+async_replica_engines = [
+    create_async_engine(
+        async_database_uri(uri),
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **pool_options,
+    )
+    for uri in settings.SQLALCHEMY_REPLICA_URIS
+]
+
+# Shared across both session factories so a write on either path keeps the
+# writer's subsequent reads on the primary
+read_your_writes = ReadYourWrites(settings.DB_READ_YOUR_WRITES_SECONDS)
+
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replicas=(
+        ReplicaSelector(replica_engines, settings.DB_REPLICA_SELECTION)
+        if replica_engines
+        else None
+    ),
+    read_your_writes=read_your_writes,
+)
+
+# Create async session factory. Objects stay loaded after commit because
+# lazy refreshes are not possible outside of an awaitable context.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    replicas=(
+        ReplicaSelector(
+            [e.sync_engine for e in async_replica_engines],
+            settings.DB_REPLICA_SELECTION,
+        )
+        if async_replica_engines
+        else None
+    ),
+    read_your_writes=read_your_writes,
+)
 
 # Create declarative base
 Base = declarative_base()
@@ -31,3 +108,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database dependency for FastAPI endpoints
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_pool_status() -> Dict[str, Dict[str, Any]]:
+    """
+    Connection pool occupancy and checkout metrics for this worker
+    """
+    pools = {
+        "sync": engine.pool,
+        "async": async_engine.sync_engine.pool,
+    }
+    for i, replica in enumerate(replica_engines):
+        pools[f"sync_replica_{i}"] = replica.pool
+    for i, async_replica in enumerate(async_replica_engines):
+        pools[f"async_replica_{i}"] = async_replica.sync_engine.pool
+    return {
+        name: pool.status_dict()  # type: ignore[attr-defined]
+        for name, pool in pools.items()
+    }
@@ -0,0 +1,92 @@
+"""
+Request-scoped batch loading
+
+A DataLoader collects the keys requested by every coroutine that asks for
+one during the same event loop tick and resolves them with one call to a
+batch function. Results, including misses, are memoised for the lifetime
+of the loader, which is meant to be a single request.
+"""
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFn = Callable[[List[K]], Awaitable[Dict[K, V]]]
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Batches and memoises key lookups made during one request
+    """
+
+    def __init__(
+        self, batch_fn: "BatchFn[K, V]", lock: Optional[asyncio.Lock] = None
+    ):
+        self.batch_fn = batch_fn
+        self.batches = 0
+        # AsyncSession allows one statement at a time, loaders sharing a
+        # session share this lock
+        self._lock = lock or asyncio.Lock()
+        self._cache: Dict[K, Optional[V]] = {}
+        self._pending: Dict[K, "asyncio.Future[Optional[V]]"] = {}
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        """Load one value, batched with other loads in this tick"""
+        if key in self._cache:
+            return self._cache[key]
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if not self._scheduled:
+                self._scheduled = True
+                # Give sibling coroutines one more tick to queue their keys
+                loop.call_soon(self._start_dispatch)
+        return await future
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        """Load several values with (at most) one batch call"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: Optional[V]) -> None:
+        """Seed the memo with a value loaded some other way"""
+        self._cache[key] = value
+
+    def _start_dispatch(self) -> None:
+        # Hold a reference, the loop only keeps weak ones to tasks
+        task = asyncio.get_running_loop().create_task(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        try:
+            async with self._lock:
+                found = await self.batch_fn(list(pending))
+            self.batches += 1
+        except Exception as exc:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key, future in pending.items():
+            value = found.get(key)
+            self._cache[key] = value
+            if not future.done():
+                future.set_result(value)
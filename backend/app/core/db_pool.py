@@ -0,0 +1,103 @@
+"""
+Instrumented connection pools for sizing database pools per worker
+"""
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Thread-safe checkout counters for a single connection pool
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_in_use = 0
+
+    def record_checkout(self, wait: float, in_use: int) -> None:
+        """Record a successful checkout and how long it waited"""
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def record_timeout(self, wait: float) -> None:
+        """Record a checkout that gave up after DB_POOL_TIMEOUT"""
+        with self._lock:
+            self.timeouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters as a plain dict"""
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "checkout_wait_avg_ms": (
+                    self.wait_total / attempts * 1000 if attempts else 0.0
+                ),
+                "checkout_wait_max_ms": self.wait_max * 1000,
+                "peak_in_use": self.peak_in_use,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """
+    Times every checkout and keeps metrics across pool recreation
+    """
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)  # type: ignore[call-arg]
+        self.metrics = PoolMetrics()
+
+    def connect(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+        self.metrics.record_checkout(
+            time.perf_counter() - start,
+            self.checkedout(),  # type: ignore[attr-defined]
+        )
+        return connection
+
+    def recreate(self) -> Any:
+        pool = super().recreate()  # type: ignore[misc]
+        pool.metrics = self.metrics
+        return pool
+
+    def status_dict(self) -> Dict[str, Any]:
+        """Current pool occupancy plus checkout metrics"""
+        return {
+            "size": self.size(),  # type: ignore[attr-defined]
+            "in_use": self.checkedout(),  # type: ignore[attr-defined]
+            "idle": self.checkedin(),  # type: ignore[attr-defined]
+            "overflow": max(self.overflow(), 0),  # type: ignore[attr-defined]
+            "max_overflow": self._max_overflow,  # type: ignore[attr-defined]
+            **self.metrics.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool with checkout metrics"""
+
+
+class InstrumentedAsyncAdaptedQueuePool(
+    _InstrumentedPoolMixin, AsyncAdaptedQueuePool
+):
+    """AsyncAdaptedQueuePool with checkout metrics"""
@@ -0,0 +1,194 @@
+"""
+Bounded process pool for password hashing
+
+bcrypt holds a CPU for hundreds of milliseconds per call. Running it inline
+ties up the event loop or a threadpool slot, so a burst of logins starves
+every other endpoint. PasswordHasher runs hashing in a dedicated pool of
+worker processes and rejects work with HashingPoolBusy once more than
+PASSWORD_HASH_QUEUE_DEPTH calls are waiting, which the API turns into a
+503 with Retry-After.
+
+The bcrypt cost is calibrated once per deployment: the first process to
+start stores its measurement in Redis and every other worker and node
+reuses it, so the fleet hashes at one cost. Stored hashes are only
+rehashed when they are weaker than that cost, so nodes that fall back to
+their own calibration while Redis is down never rewrite each other's
+hashes back and forth.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from redis import RedisError
+
+from app.core import security
+from app.core.config import settings
+from app.core.redis import get_async_redis, mark_redis_failure, redis_available
+
+_ROUNDS_KEY = "password_hash:bcrypt_rounds"
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the password hashing queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Awaitable password hashing on a bounded process pool
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.pending = 0
+        self.rejected = 0
+        self.rounds: Optional[int] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def configure(self, rounds: int) -> None:
+        """Set the bcrypt cost here and in (re)started worker processes"""
+        security.configure_password_hashing(rounds)
+        self.rounds = rounds
+        if self._executor is not None:
+            self.shutdown()
+            self.start()
+
+    def start(self) -> None:
+        """Create the worker pool (idempotent)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=(
+                    security.configure_password_hashing
+                    if self.rounds is not None
+                    else None
+                ),
+                initargs=(self.rounds,) if self.rounds is not None else (),
+            )
+
+    def shutdown(self) -> None:
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # Only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.workers + self.queue_depth:
+            self.rejected += 1
+            raise HashingPoolBusy(settings.PASSWORD_HASH_RETRY_AFTER)
+        self.start()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in a worker process"""
+        return await self._run(security.get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password in a worker process"""
+        return await self._run(
+            security.verify_password, plain_password, hashed_password
+        )
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify a password and return a replacement hash if outdated"""
+        return await self._run(
+            security.verify_and_update_password,
+            plain_password,
+            hashed_password,
+        )
+
+    def stats(self) -> dict:
+        """Pool size, queue occupancy and rejections"""
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "queue_depth": self.queue_depth,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+async def deployment_bcrypt_rounds() -> int:
+    """
+    The bcrypt cost shared by every process of the deployment:
+    PASSWORD_HASH_ROUNDS if pinned, else the first calibration stored in
+    Redis, else this machine's own calibration while Redis is unavailable
+    """
+    if settings.PASSWORD_HASH_ROUNDS:
+        return settings.PASSWORD_HASH_ROUNDS
+    if redis_available():
+        try:
+            stored = await get_async_redis().get(_ROUNDS_KEY)
+            if stored is not None:
+                return int(stored)
+        except RedisError as exc:
+            mark_redis_failure(exc)
+    rounds = await asyncio.to_thread(
+        security.calibrate_bcrypt_rounds,
+        target_ms=settings.PASSWORD_HASH_TARGET_MS,
+        min_rounds=settings.PASSWORD_HASH_MIN_ROUNDS,
+        max_rounds=settings.PASSWORD_HASH_MAX_ROUNDS,
+    )
+    if redis_available():
+        try:
+            client = get_async_redis()
+            # Processes calibrating concurrently all adopt the first value
+            await client.set(
+                _ROUNDS_KEY,
+                rounds,
+                nx=True,
+                ex=settings.PASSWORD_HASH_CALIBRATION_TTL,
+            )
+            stored = await client.get(_ROUNDS_KEY)
+            if stored is not None:
+                return int(stored)
+        except RedisError as exc:
+            mark_redis_failure(exc)
+    return rounds
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_depth=settings.PASSWORD_HASH_QUEUE_DEPTH,
+)
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password without blocking the event loop
+    """
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    """
+    Verify a password without blocking the event loop
+    """
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and get a rehash without blocking the event loop
+    """
+    return await password_hasher.verify_and_update(
+        plain_password, hashed_password
+    )
@@ -0,0 +1,135 @@
+"""
+Per-request SQL statement counting and N+1 detection
+
+Engine events record every statement executed while a QueryStats is active
+in the current context. The HTTP middleware in app.main activates one per
+request, reports the totals as response headers and flags requests that run
+the same statement shape more than N_PLUS_ONE_THRESHOLD times.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Collapses "IN (?, ?, ?)" / "VALUES ($1, $2), ($3, $4)" style bind lists
+_BIND_LIST = re.compile(
+    r"(\?|\$\d+|%\(\w+\)s|:\w+)(\s*,\s*(\?|\$\d+|%\(\w+\)s|:\w+))+"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+class NPlusOneError(Exception):
+    """Raised in strict mode when a request repeats a statement too often"""
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a SQL statement so repeated lookups compare equal"""
+    shape = _BIND_LIST.sub("?", statement)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """
+    Statement count, DB time and statement shapes for a single request
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        """Record one executed statement"""
+        self.count += 1
+        self.total_time += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed more than threshold times"""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count > threshold
+        ]
+
+
+def start_query_stats() -> QueryStats:
+    """Begin collecting statements for the current context"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def stop_query_stats() -> None:
+    """Stop collecting statements for the current context"""
+    _current_stats.set(None)
+
+
+def check_n_plus_one(
+    stats: QueryStats, threshold: int, strict: bool, label: str
+) -> None:
+    """
+    Log (or raise in strict mode) when a statement shape repeats too often
+    """
+    repeated = stats.repeated(threshold)
+    if not repeated:
+        return
+    shape, count = repeated[0]
+    message = (
+        f"Possible N+1 in {label}: statement executed {count} times "
+        f"(threshold {threshold}): {shape[:300]}"
+    )
+    if strict:
+        raise NPlusOneError(message)
+    logger.warning(message)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(
+            time.perf_counter()
+        )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    stats = _current_stats.get()
+    started = conn.info.get("query_start_time")
+    if stats is None or not started:
+        return
+    stats.record(statement, time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context: Any) -> None:
+    if context.connection is None:
+        return
+    started = context.connection.info.get("query_start_time")
+    if started:
+        started.pop()
@@ -0,0 +1,77 @@
+"""
+Redis clients shared by the caching and throttling layers
+
+Redis is an accelerator, never a source of truth: callers catch
+redis.RedisError, call mark_redis_failure() and fall back to in-process or
+database behavior. After a failure Redis is skipped for
+REDIS_FAILURE_BACKOFF seconds so an outage does not add a socket timeout to
+every request.
+"""
+import logging
+import time
+from typing import Optional
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[Redis] = None
+_async_redis: Optional[AsyncRedis] = None
+_unavailable_until = 0.0
+
+
+def _client_options() -> dict:
+    # No client-side retries: callers fall back instead of waiting
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": settings.REDIS_DB,
+        "password": settings.REDIS_PASSWORD or None,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_SOCKET_TIMEOUT,
+    }
+
+
+def get_redis() -> Redis:
+    """
+    Process-wide synchronous Redis client
+    """
+    global _redis
+    if _redis is None:
+        _redis = Redis(retry=Retry(NoBackoff(), 0), **_client_options())
+    return _redis
+
+
+def get_async_redis() -> AsyncRedis:
+    """
+    Process-wide asyncio Redis client
+    """
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = AsyncRedis(
+            retry=AsyncRetry(NoBackoff(), 0), **_client_options()
+        )
+    return _async_redis
+
+
+def redis_available() -> bool:
+    """
+    False while backing off after a recent Redis failure
+    """
+    return time.monotonic() >= _unavailable_until
+
+
+def mark_redis_failure(exc: Exception) -> None:
+    """
+    Record a Redis failure and skip Redis for REDIS_FAILURE_BACKOFF seconds
+    """
+    global _unavailable_until
+    if redis_available():
+        logger.warning("Redis unavailable, using local fallback: %s", exc)
+    _unavailable_until = time.monotonic() + settings.REDIS_FAILURE_BACKOFF
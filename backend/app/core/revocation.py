@@ -0,0 +1,232 @@
+"""
+Token revocation list fronted by a per-process Bloom filter
+
+Revoked token IDs (the jti claim) live in Redis as revoked:{jti} keys that
+expire with the token, plus a sorted set scored by revocation time. Each
+worker mirrors that set into an in-memory Bloom filter and pulls only the
+entries added since its last sync every REVOCATION_SYNC_INTERVAL seconds.
+Almost every token is not revoked, and the filter answers that without a
+network round-trip; only filter hits are confirmed against Redis.
+
+Revocations made by another worker are seen here after the next sync.
+Refresh token rotation does not depend on that lag: revoke() uses SET NX,
+so a second use of the same refresh token is rejected immediately.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Optional
+
+from redis import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_async_redis, mark_redis_failure, redis_available
+
+logger = logging.getLogger(__name__)
+
+_REVOKED_SET = "revoked_tokens"
+# Re-read this many seconds before the sync cursor, so entries scored by a
+# worker whose clock lags ours are not skipped
+_CLOCK_SKEW = 5.0
+
+
+def _redis_key(jti: str) -> str:
+    return f"revoked:{jti}"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings (no false negatives)
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(
+            int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> bool:
+        """
+        Add an item, returns False if it was already present. Re-adding
+        does not grow count, so syncs that re-read entries do not trigger
+        early rebuilds.
+        """
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationList:
+    """
+    Redis-backed denylist of token IDs with an in-memory Bloom filter
+    """
+
+    def __init__(self, capacity: int, error_rate: float, sync_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.checks = 0
+        self.filtered = 0
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._cursor: Optional[float] = None
+        # Revocations made by this worker, authoritative while Redis is down
+        self._local: TTLCache[bool] = TTLCache(
+            maxsize=capacity, ttl=settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    async def revoke(self, jti: str, exp: Optional[float]) -> bool:
+        """
+        Revoke a token until it expires, returns False if it already was
+        """
+        now = time.time()
+        ttl = max(int(math.ceil(exp - now)), 1) if exp else None
+        ttl = ttl or settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+        if self._local.get(jti):
+            return False
+        self._local.set(jti, True, ttl=ttl)
+        self._bloom.add(jti)
+
+        if not redis_available():
+            return True
+        try:
+            async with get_async_redis().pipeline(transaction=True) as pipe:
+                pipe.set(_redis_key(jti), 1, ex=ttl, nx=True)
+                pipe.zadd(_REVOKED_SET, {jti: now})
+                created, _ = await pipe.execute()
+        except RedisError as exc:
+            mark_redis_failure(exc)
+            return True
+        return bool(created)
+
+    async def is_revoked(self, jti: Optional[str]) -> bool:
+        """
+        True if the token ID has been revoked
+        """
+        if jti is None:
+            # Issued before tokens carried an ID, cannot be revoked
+            return False
+        self.checks += 1
+        if jti not in self._bloom:
+            self.filtered += 1
+            return False
+        if self._local.get(jti):
+            return True
+        if not redis_available():
+            # Fail closed: a filter hit we cannot confirm
+            return True
+        try:
+            return bool(await get_async_redis().exists(_redis_key(jti)))
+        except RedisError as exc:
+            mark_redis_failure(exc)
+            return True
+
+    async def sync(self) -> int:
+        """
+        Add revocations recorded since the last sync to the filter,
+        returns the number of entries read
+        """
+        if not redis_available():
+            return 0
+        redis = get_async_redis()
+        now = time.time()
+        try:
+            # Every token is expired once the refresh lifetime has passed
+            await redis.zremrangebyscore(
+                _REVOKED_SET,
+                "-inf",
+                now - settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60,
+            )
+            # Rebuild once the filter holds more than it was sized for; the
+            # rebuilt one may be larger than the configured capacity
+            if self._cursor is None or self._bloom.count > self._bloom.capacity:
+                entries = await redis.zrange(_REVOKED_SET, 0, -1, withscores=True)
+                bloom = BloomFilter(
+                    max(self.capacity, 2 * len(entries)), self.error_rate
+                )
+            else:
+                entries = await redis.zrangebyscore(
+                    _REVOKED_SET,
+                    self._cursor - _CLOCK_SKEW,
+                    "+inf",
+                    withscores=True,
+                )
+                bloom = self._bloom
+        except RedisError as exc:
+            mark_redis_failure(exc)
+            return 0
+
+        for member, score in entries:
+            bloom.add(member.decode() if isinstance(member, bytes) else member)
+            self._cursor = max(self._cursor or score, score)
+        if self._cursor is None:
+            self._cursor = now
+        self._bloom = bloom
+        return len(entries)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Failed to sync the token revocation list")
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self) -> None:
+        """Start the periodic sync task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic sync task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Filter size and how many checks it answered locally"""
+        return {
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "bloom_entries": self._bloom.count,
+            "checks": self.checks,
+            "answered_in_memory": self.filtered,
+            "local_revocations": self._local.stats()["size"],
+        }
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    sync_interval=settings.REVOCATION_SYNC_INTERVAL,
+)
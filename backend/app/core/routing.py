@@ -0,0 +1,173 @@
+"""
+Read-replica routing for database sessions
+
+Sessions built with RoutingSession send plain SELECTs to a replica and
+everything else (flushes, DML, locking reads, explicit connections) to the
+primary engine the session is bound to. Once a transaction has flushed or
+executed a write, its reads stay on the primary until it ends so it sees
+its own uncommitted rows. After a session commits a write, reads for the
+same consistency key stay on the primary for DB_READ_YOUR_WRITES_SECONDS
+so callers never observe replication lag on data they just changed.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+ROUND_ROBIN = "round_robin"
+LEAST_LOADED = "least_loaded"
+
+
+class ReplicaSelector:
+    """
+    Picks a replica engine per read using the configured strategy
+    """
+
+    def __init__(self, engines: List[Engine], strategy: str = ROUND_ROBIN):
+        if not engines:
+            raise ValueError("ReplicaSelector needs at least one engine")
+        if strategy not in (ROUND_ROBIN, LEAST_LOADED):
+            raise ValueError(f"Unknown replica selection strategy: {strategy}")
+        self.engines = engines
+        self.strategy = strategy
+        self._counter = itertools.count()
+
+    def choose(self) -> Engine:
+        """Return the replica engine for the next read"""
+        if self.strategy == LEAST_LOADED:
+            return min(self.engines, key=lambda e: e.pool.checkedout())  # type: ignore[attr-defined]
+        return self.engines[next(self._counter) % len(self.engines)]
+
+
+class ReadYourWrites:
+    """
+    Remembers when each consistency key (usually a user id) last committed
+    """
+
+    max_keys = 100_000
+
+    def __init__(self, window: float):
+        self.window = window
+        self._lock = threading.Lock()
+        self._last_write: Dict[Hashable, float] = {}
+
+    def mark(self, key: Hashable) -> None:
+        """Record a committed write for key"""
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[key] = now
+            if len(self._last_write) > self.max_keys:
+                cutoff = now - self.window
+                self._last_write = {
+                    k: t for k, t in self._last_write.items() if t > cutoff
+                }
+
+    def is_recent(self, key: Hashable) -> bool:
+        """True while key is inside its read-your-writes window"""
+        last = self._last_write.get(key)
+        return last is not None and time.monotonic() - last < self.window
+
+
+class RoutingSession(Session):
+    """
+    Session that routes read-only statements to replicas
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        replicas: Optional[ReplicaSelector] = None,
+        read_your_writes: Optional[ReadYourWrites] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.read_your_writes = read_your_writes
+
+    def get_bind(
+        self, mapper: Any = None, clause: Any = None, **kwargs: Any
+    ) -> Union[Engine, Connection]:
+        if self.replicas is not None and self._is_replica_read(clause):
+            return self.replicas.choose()
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def _is_replica_read(self, clause: Any) -> bool:
+        if clause is None or not getattr(clause, "is_select", False):
+            return False
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return False
+        if self._flushing or self.info.get("use_primary"):
+            return False
+        # The replica cannot see writes this transaction has not committed
+        if self.info.get("pending_write"):
+            return False
+        if self.info.get("wrote_at", float("-inf")) > self._window_start():
+            return False
+        key = self.info.get("consistency_key")
+        if key is not None and self.read_your_writes is not None:
+            return not self.read_your_writes.is_recent(key)
+        return True
+
+    def _window_start(self) -> float:
+        window = self.read_your_writes.window if self.read_your_writes else 0
+        return time.monotonic() - window
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _record_flush(session: RoutingSession, flush_context: Any) -> None:
+    session.info["pending_write"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _record_execute(orm_execute_state: Any) -> None:
+    # DML and textual statements run on the primary and may have written
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["pending_write"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _record_commit(session: RoutingSession) -> None:
+    if not session.info.pop("pending_write", False):
+        return
+    session.info["wrote_at"] = time.monotonic()
+    key = session.info.get("consistency_key")
+    if key is not None and session.read_your_writes is not None:
+        session.read_your_writes.mark(key)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_flush(session: RoutingSession) -> None:
+    session.info.pop("pending_write", None)
+
+
+def use_primary(db: Any) -> None:
+    """
+    Pin a Session or AsyncSession to the primary, e.g. before a
+    read-modify-write or a uniqueness check
+    """
+    db.info["use_primary"] = True
+
+
+@contextmanager
+def primary_reads(db: Any) -> Iterator[None]:
+    """
+    Temporarily send a Session or AsyncSession's reads to the primary
+    """
+    previous = db.info.get("use_primary", False)
+    db.info["use_primary"] = True
+    try:
+        yield
+    finally:
+        db.info["use_primary"] = previous
+
+
+def set_consistency_key(db: Any, key: Hashable) -> None:
+    """
+    Tag a Session or AsyncSession with the key its writes are tracked under
+    """
+    db.info["consistency_key"] = key
@@ -1,18 +1,41 @@
 """
 Security utilities for authentication and authorization
 """
+import hashlib
+import math
+import time
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 # Password context for hashing and verification
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+@dataclass(frozen=True)
+class TokenPayload:
+    """Verified claims of an access or refresh token"""
+
+    sub: str
+    exp: Optional[float]
+    type: Optional[str]
+    jti: Optional[str] = None
+
+
+# Verified tokens keyed by SHA-256 digest, so repeat requests skip the
+# signature check and JSON parsing. Entries never outlive the token's exp.
+token_cache: TTLCache[TokenPayload] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL
+)
+
+
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -26,7 +49,12 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
 
-    to_encode = {"exp": expire, "sub": str(subject), "type": "access"}
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "type": "access",
+        "jti": uuid.uuid4().hex,
+    }
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -46,27 +74,64 @@ def create_refresh_token(
             minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES
         )
 
-    to_encode = {"exp": expire, "sub": str(subject), "type": "refresh"}
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "type": "refresh",
+        "jti": uuid.uuid4().hex,
+    }
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
+def decode_token(token: str) -> Optional[TokenPayload]:
     """
-    Verify a JWT token and return the subject
+    Verify a JWT token and return its claims, using the verified token cache
     """
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        token_data = payload.get("sub")
-        if token_data is None:
-            return None
-        return token_data
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+
+    exp = payload.get("exp")
+    token_payload = TokenPayload(
+        sub=str(payload["sub"]),
+        exp=float(exp) if exp is not None else None,
+        type=payload.get("type"),
+        jti=payload.get("jti"),
+    )
+    token_cache.set(
+        digest, token_payload, ttl=exp - time.time() if exp else None
+    )
+    return token_payload
+
+
+def verify_token(token: str) -> Optional[str]:
+    """
+    Verify a JWT token and return the subject
+    """
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    return payload.sub
+
+
+def get_token_cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss counters of the verified token cache
+    """
+    return token_cache.stats()
 
 
 def get_password_hash(password: str) -> str:
@@ -83,6 +148,45 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and return a new hash if the stored one uses
+    outdated parameters
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float, min_rounds: int, max_rounds: int
+) -> int:
+    """
+    Pick the highest bcrypt cost whose hash time stays within target_ms
+    on this machine
+    """
+    probe_rounds = 8
+    handler = pwd_context.handler("bcrypt").using(rounds=probe_rounds)
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        handler.hash("calibration-password")
+        samples.append((time.perf_counter() - start) * 1000)
+
+    # Each extra bcrypt round doubles the work
+    probe_ms = max(min(samples), 0.001)
+    rounds = probe_rounds + math.floor(math.log2(target_ms / probe_ms))
+    return max(min_rounds, min(rounds, max_rounds))
+
+
+def configure_password_hashing(rounds: int) -> None:
+    """
+    Hash new passwords with the given bcrypt cost and flag stored hashes
+    below it for rehash. Stronger hashes are kept, never downgraded.
+    """
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
 def generate_password_reset_token(email: str) -> str:
     """
     Generate a password reset token
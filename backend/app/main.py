@@ -2,6 +2,7 @@
 BYD90 FastAPI Main Application
 AI-powered athlete performance platform
 """
+import os
 import time
 
 from fastapi import FastAPI, Request
@@ -11,6 +12,25 @@ from fastapi.staticfiles import StaticFiles
 
 from app.api.api_v1.api import api_router
 from app.core.config import settings
+from app.core.database import get_pool_status
+from app.core.hashing import (
+    HashingPoolBusy,
+    deployment_bcrypt_rounds,
+    password_hasher,
+)
+from app.core.query_stats import (
+    check_n_plus_one,
+    start_query_stats,
+    stop_query_stats,
+)
+from app.core.revocation import revocation_list
+from app.core.security import get_token_cache_stats
+from app.services.activity_recorder import activity_recorder
+from app.services.coach_availability import availability_index
+from app.services.coach_matching import coach_index
+from app.services.cohort_stats import cohort_cache
+from app.services.principal_cache import get_principal_cache_stats
+from app.services.user_search import search_cache
 
 # Create FastAPI app
 app = FastAPI(
@@ -35,6 +55,79 @@ if settings.BACKEND_CORS_ORIGINS:
     )
 
 
+@app.on_event("startup")
+async def start_password_hasher():
+    """Apply the deployment's password hash cost and start the hashing pool"""
+    password_hasher.configure(await deployment_bcrypt_rounds())
+    password_hasher.start()
+
+
+@app.on_event("shutdown")
+async def stop_password_hasher():
+    """Stop the password hashing process pool"""
+    password_hasher.shutdown()
+
+
+@app.on_event("startup")
+async def start_activity_recorder():
+    """Start flushing buffered last-login/last-seen timestamps"""
+    activity_recorder.start()
+
+
+@app.on_event("shutdown")
+async def stop_activity_recorder():
+    """Flush buffered last-login/last-seen timestamps"""
+    await activity_recorder.stop()
+
+
+@app.on_event("startup")
+async def start_revocation_sync():
+    """Load the token denylist into the Bloom filter and keep it in sync"""
+    revocation_list.start()
+
+
+@app.on_event("shutdown")
+async def stop_revocation_sync():
+    """Stop syncing the token denylist"""
+    await revocation_list.stop()
+
+
+@app.on_event("startup")
+async def start_search_cache():
+    """Warm the user search prefix cache and keep it refreshed"""
+    search_cache.start()
+
+
+@app.on_event("shutdown")
+async def stop_search_cache():
+    """Stop refreshing the user search prefix cache"""
+    await search_cache.stop()
+
+
+@app.on_event("startup")
+async def start_coach_index():
+    """Build the coach matching feature matrix and keep it refreshed"""
+    coach_index.start()
+
+
+@app.on_event("shutdown")
+async def stop_coach_index():
+    """Stop refreshing the coach matching feature matrix"""
+    await coach_index.stop()
+
+
+@app.on_event("startup")
+async def start_availability_index():
+    """Build the coach availability interval trees and keep them refreshed"""
+    availability_index.start()
+
+
+@app.on_event("shutdown")
+async def stop_availability_index():
+    """Stop refreshing the coach availability interval trees"""
+    await availability_index.stop()
+
+
 # Add request timing middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
@@ -46,6 +139,44 @@ async def add_process_time_header(request: Request, call_next):
     return response
 
 
+# Add per-request query counting middleware
+@app.middleware("http")
+async def add_query_stats_headers(request: Request, call_next):
+    """Add SQL statement count and DB time to response headers"""
+    if not settings.DB_QUERY_STATS_ENABLED:
+        return await call_next(request)
+
+    stats = start_query_stats()
+    try:
+        response = await call_next(request)
+    finally:
+        stop_query_stats()
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Time"] = str(stats.total_time)
+    check_n_plus_one(
+        stats,
+        threshold=settings.N_PLUS_ONE_THRESHOLD,
+        strict=settings.N_PLUS_ONE_RAISE,
+        label=f"{request.method} {request.url.path}",
+    )
+    return response
+
+
+# Add password hashing backpressure handler
+@app.exception_handler(HashingPoolBusy)
+async def hashing_pool_busy_handler(request: Request, exc: HashingPoolBusy):
+    """Shed load when the password hashing queue is full"""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "detail": "Service busy",
+            "message": "Too many concurrent sign-ins. Please retry shortly.",
+            "path": str(request.url.path),
+        },
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # Add global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -72,6 +203,34 @@ async def health_check():
     }
 
 
+# Database pool metrics endpoint
+@app.get("/health/db")
+async def database_pool_health():
+    """Connection pool occupancy and checkout wait metrics for this worker"""
+    return {
+        "pid": os.getpid(),
+        "pools": get_pool_status(),
+        "timestamp": time.time(),
+    }
+
+
+# In-process cache metrics endpoint
+@app.get("/health/cache")
+async def cache_health():
+    """Hit/miss counters of the in-process caches for this worker"""
+    return {
+        "pid": os.getpid(),
+        "token_cache": get_token_cache_stats(),
+        "principal_cache": get_principal_cache_stats(),
+        "revocation_list": revocation_list.stats(),
+        "user_search": search_cache.stats(),
+        "cohorts": cohort_cache.stats(),
+        "coach_matching": coach_index.stats(),
+        "coach_availability": availability_index.stats(),
+        "timestamp": time.time(),
+    }
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -2,8 +2,12 @@
 Database models for BYD90
 """
 from .athlete import Athlete, AthletePosition, Sport
+from .athlete_metric import METRIC_REGISTRY, AthleteMetric, MetricDefinition
+from .athlete_metric_sample import AthleteMetricSample
 from .avatar import Avatar, AvatarCustomization
 from .coach import Coach
+from .coach_availability import CoachAvailability
+from .coach_review import CoachReview
 from .community import Comment, Community, CommunityMember, Post
 from .recommendation import Recommendation, RecommendationType
 from .user import User, UserType
@@ -14,7 +18,13 @@ __all__ = [
     "Athlete",
     "AthletePosition",
     "Sport",
+    "AthleteMetric",
+    "MetricDefinition",
+    "METRIC_REGISTRY",
+    "AthleteMetricSample",
     "Coach",
+    "CoachAvailability",
+    "CoachReview",
     "Recommendation",
     "RecommendationType",
     "Avatar",
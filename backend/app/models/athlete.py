@@ -3,26 +3,55 @@ Athlete model with sports, positions, and performance data
 """
 import enum
 from datetime import date, datetime
-from typing import Optional
+from typing import Dict, FrozenSet, Optional, Tuple
 
 from sqlalchemy import (
     JSON,
     Boolean,
     Column,
+    Computed,
     Date,
     DateTime,
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    and_,
+    func,
+    inspect,
+    true,
 )
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
 
+def _years_before(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - years, day=28)
+
+
+def birth_date_range(
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    today: Optional[date] = None,
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    (exclusive earliest, inclusive latest) birth dates of people aged
+    min_age to max_age inclusive; None for an open end
+    """
+    today = today or date.today()
+    earliest = _years_before(today, max_age + 1) if max_age is not None else None
+    latest = _years_before(today, min_age) if min_age is not None else None
+    return earliest, latest
+
+
 class Sport(str, enum.Enum):
     """Sports enumeration"""
 
@@ -75,12 +104,87 @@ class AthletePosition(str, enum.Enum):
     GENERAL = "general"
 
 
+# Positions valid for each sport; GENERAL is allowed everywhere
+SPORT_POSITIONS: Dict[Sport, FrozenSet[AthletePosition]] = {
+    sport: frozenset(positions) | {AthletePosition.GENERAL}
+    for sport, positions in {
+        Sport.FOOTBALL: (
+            AthletePosition.QUARTERBACK,
+            AthletePosition.RUNNING_BACK,
+            AthletePosition.WIDE_RECEIVER,
+            AthletePosition.TIGHT_END,
+            AthletePosition.OFFENSIVE_LINE,
+            AthletePosition.DEFENSIVE_LINE,
+            AthletePosition.LINEBACKER,
+            AthletePosition.CORNERBACK,
+            AthletePosition.SAFETY,
+            AthletePosition.KICKER,
+            AthletePosition.PUNTER,
+        ),
+        Sport.BASKETBALL: (
+            AthletePosition.POINT_GUARD,
+            AthletePosition.SHOOTING_GUARD,
+            AthletePosition.SMALL_FORWARD,
+            AthletePosition.POWER_FORWARD,
+            AthletePosition.CENTER,
+        ),
+        Sport.SOCCER: (
+            AthletePosition.GOALKEEPER,
+            AthletePosition.DEFENDER,
+            AthletePosition.MIDFIELDER,
+            AthletePosition.FORWARD,
+        ),
+        Sport.TENNIS: (AthletePosition.SINGLES, AthletePosition.DOUBLES),
+        Sport.HOCKEY: (
+            AthletePosition.CENTER,
+            AthletePosition.FORWARD,
+            AthletePosition.DEFENDER,
+            AthletePosition.GOALKEEPER,
+        ),
+        Sport.VOLLEYBALL: (),
+        Sport.BASEBALL: (),
+        Sport.SWIMMING: (),
+        Sport.TRACK_FIELD: (),
+        Sport.GOLF: (),
+    }.items()
+}
+
+
 class Athlete(Base):
     """
     Athlete profile with sports-specific information and performance metrics
     """
 
     __tablename__ = "athletes"
+    __table_args__ = (
+        # Directory listing: newest first, keyset-paginated on
+        # (created_at, id), optionally filtered by the leading columns
+        Index("ix_athletes_created_id", "created_at", "id"),
+        Index("ix_athletes_sport_created_id", "primary_sport", "created_at", "id"),
+        Index(
+            "ix_athletes_sport_position_created_id",
+            "primary_sport",
+            "primary_position",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_athletes_sport_level_created_id",
+            "primary_sport",
+            "experience_level",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_athletes_recovery_created_id",
+            "recovery_status",
+            "created_at",
+            "id",
+        ),
+        # Age filters become birth date ranges (see age_between)
+        Index("ix_athletes_date_of_birth", "date_of_birth"),
+        Index("ix_athletes_bmi", "bmi"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(
@@ -98,6 +202,17 @@ class Athlete(Base):
     # Physical Attributes
     height = Column(Float, nullable=True)  # in cm
     weight = Column(Float, nullable=True)  # in kg
+    # Maintained by Postgres, read through the bmi property. NULL unless
+    # both height and weight are positive, the same rule as Athlete.bmi
+    _bmi = Column(
+        "bmi",
+        Float,
+        Computed(
+            "CASE WHEN height > 0 AND weight > 0 THEN "
+            "round((weight / ((height / 100) ^ 2))::numeric, 2)::float8 END",
+            persisted=True,
+        ),
+    )
     date_of_birth = Column(Date, nullable=True)
     dominant_hand = Column(
         String(10), nullable=True
@@ -136,8 +251,13 @@ class Athlete(Base):
     privacy_settings = Column(JSON, nullable=True)
     notification_preferences = Column(JSON, nullable=True)
 
-    # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Timestamps (created_at is part of the directory's pagination key)
+    created_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        server_default=func.now(),
+        nullable=False,
+    )
     updated_at = Column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
@@ -148,8 +268,12 @@ class Athlete(Base):
     coach_connections = relationship(
         "CoachAthleteConnection", back_populates="athlete"
     )
+    # Projected metric values, maintained by app.models.athlete_metric
+    metrics = relationship(
+        "AthleteMetric", viewonly=True, order_by="AthleteMetric.metric"
+    )
 
-    @property
+    @hybrid_property
     def age(self) -> Optional[int]:
         """Calculate age from date of birth"""
         if self.date_of_birth:
@@ -164,13 +288,48 @@ class Athlete(Base):
             )
         return None
 
-    @property
+    @age.expression
+    def age(cls):
+        # For selecting only: filter with age_between, which can use the
+        # date_of_birth index
+        return func.date_part("year", func.age(cls.date_of_birth)).cast(Integer)
+
+    @classmethod
+    def age_between(
+        cls,
+        min_age: Optional[int] = None,
+        max_age: Optional[int] = None,
+        today: Optional[date] = None,
+    ):
+        """SQL predicate for min_age <= age <= max_age, as a birth date range"""
+        earliest, latest = birth_date_range(min_age, max_age, today)
+        conditions = []
+        if earliest is not None:
+            conditions.append(cls.date_of_birth > earliest)
+        if latest is not None:
+            conditions.append(cls.date_of_birth <= latest)
+        return and_(true(), *conditions)
+
+    @hybrid_property
     def bmi(self) -> Optional[float]:
         """Calculate BMI if height and weight are available"""
-        if self.height and self.weight:
+        state = inspect(self)
+        # Read the stored column unless it is not loaded (no lazy load in
+        # async code) or height/weight changed since it was computed
+        if not (
+            "_bmi" in state.unloaded
+            or state.attrs.height.history.has_changes()
+            or state.attrs.weight.history.has_changes()
+        ):
+            return self._bmi
+        if (self.height or 0) > 0 and (self.weight or 0) > 0:
             height_m = float(self.height) / 100  # convert cm to meters
             return round(float(self.weight) / (height_m**2), 2)
         return None
 
+    @bmi.expression
+    def bmi(cls):
+        return cls._bmi
+
     def __repr__(self) -> str:
         return f"<Athlete(id={self.id}, sport='{self.primary_sport}', position='{self.primary_position}')>"
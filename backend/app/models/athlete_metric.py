@@ -0,0 +1,201 @@
+"""
+Typed projection of hot athlete metrics out of the JSON profile columns
+
+Athlete.fitness_metrics, skill_metrics and game_stats stay free-form JSON.
+METRIC_REGISTRY declares, per Sport, which of their keys are ranked or
+filtered on; those values are copied into athlete_metrics, one float row
+per (athlete, metric), indexed for leaderboards and range filters. The
+copy is refreshed in the same flush whenever an athlete's sport or metric
+blobs are written.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    delete,
+    event,
+    insert,
+    inspect,
+)
+
+from app.core.database import Base
+from app.models.athlete import Athlete, Sport
+
+
+@dataclass(frozen=True)
+class MetricDefinition:
+    """A metric projected from the same-named key of an Athlete JSON column"""
+
+    name: str
+    source: str  # fitness_metrics, skill_metrics or game_stats
+    higher_is_better: bool = True
+    unit: Optional[str] = None
+
+
+_COMMON = (
+    MetricDefinition("vertical_jump", "fitness_metrics", unit="cm"),
+    MetricDefinition("vo2_max", "fitness_metrics", unit="ml/kg/min"),
+)
+
+METRIC_REGISTRY: Dict[Sport, Tuple[MetricDefinition, ...]] = {
+    Sport.FOOTBALL: _COMMON
+    + (
+        MetricDefinition("sprint_40yd", "fitness_metrics", False, "s"),
+        MetricDefinition("bench_press_reps", "fitness_metrics"),
+        MetricDefinition("touchdowns", "game_stats"),
+    ),
+    Sport.BASKETBALL: _COMMON
+    + (
+        MetricDefinition("points_per_game", "game_stats"),
+        MetricDefinition("rebounds_per_game", "game_stats"),
+        MetricDefinition("assists_per_game", "game_stats"),
+        MetricDefinition("three_point_pct", "skill_metrics", unit="%"),
+    ),
+    Sport.SOCCER: _COMMON
+    + (
+        MetricDefinition("sprint_30m", "fitness_metrics", False, "s"),
+        MetricDefinition("goals", "game_stats"),
+        MetricDefinition("assists", "game_stats"),
+        MetricDefinition("pass_accuracy", "skill_metrics", unit="%"),
+    ),
+    Sport.TENNIS: _COMMON
+    + (
+        MetricDefinition("serve_speed", "skill_metrics", unit="km/h"),
+        MetricDefinition("first_serve_pct", "skill_metrics", unit="%"),
+        MetricDefinition("wins", "game_stats"),
+    ),
+    Sport.VOLLEYBALL: _COMMON
+    + (
+        MetricDefinition("spike_height", "fitness_metrics", unit="cm"),
+        MetricDefinition("kills", "game_stats"),
+    ),
+    Sport.BASEBALL: _COMMON
+    + (
+        MetricDefinition("batting_average", "game_stats"),
+        MetricDefinition("pitch_speed", "skill_metrics", unit="km/h"),
+        MetricDefinition("home_runs", "game_stats"),
+    ),
+    Sport.HOCKEY: _COMMON
+    + (
+        MetricDefinition("goals", "game_stats"),
+        MetricDefinition("assists", "game_stats"),
+        MetricDefinition("skating_speed", "fitness_metrics", unit="km/h"),
+    ),
+    Sport.SWIMMING: _COMMON
+    + (
+        MetricDefinition("freestyle_100m", "fitness_metrics", False, "s"),
+        MetricDefinition("freestyle_400m", "fitness_metrics", False, "s"),
+    ),
+    Sport.TRACK_FIELD: _COMMON
+    + (
+        MetricDefinition("sprint_100m", "fitness_metrics", False, "s"),
+        MetricDefinition("run_1500m", "fitness_metrics", False, "s"),
+        MetricDefinition("long_jump", "skill_metrics", unit="m"),
+    ),
+    Sport.GOLF: _COMMON
+    + (
+        MetricDefinition("driving_distance", "skill_metrics", unit="m"),
+        MetricDefinition("handicap", "game_stats", False),
+    ),
+}
+
+# Writes to these Athlete attributes change the projection
+_SOURCE_ATTRIBUTES = (
+    "primary_sport",
+    "fitness_metrics",
+    "skill_metrics",
+    "game_stats",
+)
+
+
+def get_metric(sport: Sport, name: str) -> Optional[MetricDefinition]:
+    """Look up a registered metric for a sport"""
+    for metric in METRIC_REGISTRY.get(sport, ()):
+        if metric.name == name:
+            return metric
+    return None
+
+
+def project_metrics(athlete: Any) -> List[Tuple[str, float]]:
+    """(metric, value) pairs an athlete's JSON columns project to"""
+    projected = []
+    for metric in METRIC_REGISTRY.get(Sport(athlete.primary_sport), ()):
+        blob = getattr(athlete, metric.source) or {}
+        value = blob.get(metric.name) if isinstance(blob, dict) else None
+        if isinstance(value, bool):
+            continue
+        try:
+            projected.append((metric.name, float(value)))
+        except (TypeError, ValueError):
+            continue
+    return projected
+
+
+class AthleteMetric(Base):
+    """
+    One projected metric value of an athlete, for indexed ranking
+    """
+
+    __tablename__ = "athlete_metrics"
+    __table_args__ = (
+        # Leaderboards and range filters: (sport, metric) then value order
+        Index(
+            "ix_athlete_metrics_leaderboard",
+            "sport",
+            "metric",
+            "value",
+            "athlete_id",
+        ),
+    )
+
+    athlete_id = Column(
+        Integer,
+        ForeignKey("athletes.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    metric = Column(String(50), primary_key=True)
+    sport = Column(Enum(Sport), nullable=False)
+    value = Column(Float, nullable=False)
+
+
+def sync_athlete_metrics(connection: Any, athlete: Any) -> None:
+    """
+    Replace an athlete's projected metrics on the given connection
+    """
+    table = AthleteMetric.__table__
+    connection.execute(delete(table).where(table.c.athlete_id == athlete.id))
+    rows = [
+        {
+            "athlete_id": athlete.id,
+            "metric": name,
+            "sport": Sport(athlete.primary_sport),
+            "value": value,
+        }
+        for name, value in project_metrics(athlete)
+    ]
+    if rows:
+        connection.execute(insert(table), rows)
+
+
+@event.listens_for(Athlete, "after_insert")
+def _project_new_athlete(mapper: Any, connection: Any, target: Athlete) -> None:
+    sync_athlete_metrics(connection, target)
+
+
+@event.listens_for(Athlete, "after_update")
+def _project_updated_athlete(
+    mapper: Any, connection: Any, target: Athlete
+) -> None:
+    # JSON columns are not mutation-tracked: assign a new dict to trigger this
+    state = inspect(target)
+    if any(
+        state.attrs[name].history.has_changes() for name in _SOURCE_ATTRIBUTES
+    ):
+        sync_athlete_metrics(connection, target)
@@ -0,0 +1,61 @@
+"""
+Append-only time series of athlete performance metrics
+
+Every measurement is one (athlete, metric, ts, value) row, so history is
+kept and an update never rewrites the athlete's profile. The table is
+range-partitioned by month on ts; partitions are created on demand by the
+ingest path (see app.services.metric_series), and old months can be
+detached or dropped without touching the rest.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+
+from app.core.database import Base
+
+TABLE_NAME = "athlete_metric_samples"
+
+
+def month_start(ts: datetime) -> datetime:
+    """First instant (UTC) of the partition month containing ts"""
+    ts = ts.astimezone(timezone.utc)
+    return datetime(ts.year, ts.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    """Name of the partition holding the month starting at `month`"""
+    return f"{TABLE_NAME}_{month:%Y_%m}"
+
+
+def partition_ddl(month: datetime) -> str:
+    """CREATE statement for the partition of the month starting at `month`"""
+    next_month = datetime(
+        month.year + month.month // 12,
+        month.month % 12 + 1,
+        1,
+        tzinfo=timezone.utc,
+    )
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+        f"PARTITION OF {TABLE_NAME} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+    )
+
+
+class AthleteMetricSample(Base):
+    """
+    One timestamped measurement of an athlete metric
+    """
+
+    __tablename__ = TABLE_NAME
+    __table_args__ = {"postgresql_partition_by": "RANGE (ts)"}
+
+    # The primary key doubles as the (athlete, metric, time window) index
+    athlete_id = Column(
+        Integer,
+        ForeignKey("athletes.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    metric = Column(String(50), primary_key=True)
+    ts = Column(DateTime(timezone=True), primary_key=True)
+    value = Column(Float, nullable=False)
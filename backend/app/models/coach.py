@@ -1,9 +1,15 @@
 """
 Coach model with specializations and athlete connections
+
+Coach.active_athlete_count is a denormalized count of the coach's current
+connections (active and not ended). Flushing a CoachAthleteConnection
+insert, update or delete adjusts it with an atomic in-database increment
+in the same transaction; bulk and raw SQL writes bypass that and are
+corrected by app.services.coach_service.reconcile_athlete_counts.
 """
 import enum
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 from sqlalchemy import (
     JSON,
@@ -13,12 +19,21 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    and_,
+    event,
+    inspect,
+    or_,
+    select,
+    update,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, object_session, relationship
 
+from app.core.config import settings
 from app.core.database import Base
 from app.models.athlete import Sport
 
@@ -85,11 +100,27 @@ class Coach(Base):
     # Performance and Ratings
     average_rating = Column(Float, default=0.0)
     total_reviews = Column(Integer, default=0)
+    # Maintained from coach_reviews (see app.models.coach_review): sum and
+    # per-star histogram of the ratings, and their Bayesian average, the
+    # score coach search ranks on
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_1_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_2_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_3_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_4_count = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_5_count = Column(Integer, default=0, server_default="0", nullable=False)
+    bayesian_rating = Column(
+        Float, default=lambda: settings.COACH_RATING_PRIOR_MEAN, index=True
+    )
     success_stories = Column(JSON, nullable=True)
 
     # Settings and Preferences
     accepts_new_athletes = Column(Boolean, default=True)
     max_athletes = Column(Integer, nullable=True)
+    # Current connections, maintained on flush (see module docstring)
+    active_athlete_count = Column(
+        Integer, default=0, server_default="0", nullable=False
+    )
     preferred_athlete_level = Column(
         JSON, nullable=True
     )  # beginner, intermediate, etc.
@@ -123,11 +154,9 @@ class Coach(Base):
     @property
     def current_athlete_count(self) -> int:
         """Get current number of connected athletes"""
-        return len(
-            [conn for conn in self.athlete_connections if conn.is_active]
-        )
+        return self.active_athlete_count or 0
 
-    @property
+    @hybrid_property
     def can_accept_athletes(self) -> bool:
         """Check if coach can accept new athletes"""
         if not self.accepts_new_athletes:
@@ -139,6 +168,18 @@ class Coach(Base):
             return False
         return True
 
+    @can_accept_athletes.expression
+    def can_accept_athletes(cls):
+        # A max_athletes of 0 means no limit, as on the instance
+        return and_(
+            cls.accepts_new_athletes.is_(True),
+            or_(
+                cls.max_athletes.is_(None),
+                cls.max_athletes == 0,
+                cls.active_athlete_count < cls.max_athletes,
+            ),
+        )
+
     def __repr__(self) -> str:
         return f"<Coach(id={self.id}, level='{self.coaching_level}', verified={self.is_verified})>"
 
@@ -149,6 +190,10 @@ class CoachAthleteConnection(Base):
     """
 
     __tablename__ = "coach_athlete_connections"
+    __table_args__ = (
+        # A coach's current athletes: the roster and count reconciliation
+        Index("ix_coach_athlete_connections_coach_id", "coach_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     coach_id = Column(Integer, ForeignKey("coaches.id"), nullable=False)
@@ -187,5 +232,118 @@ class CoachAthleteConnection(Base):
     coach = relationship("Coach", back_populates="athlete_connections")
     athlete = relationship("Athlete", back_populates="coach_connections")
 
+    @hybrid_property
+    def is_current(self) -> bool:
+        """Active and not ended: counts toward the coach's athletes"""
+        return bool(self.is_active) and self.end_date is None
+
+    @is_current.expression
+    def is_current(cls):
+        return and_(cls.is_active.is_(True), cls.end_date.is_(None))
+
     def __repr__(self) -> str:
         return f"<CoachAthleteConnection(coach_id={self.coach_id}, athlete_id={self.athlete_id}, active={self.is_active})>"
+
+
+# Writes to these CoachAthleteConnection attributes can change the counts
+_COUNTED_ATTRIBUTES = ("coach_id", "is_active", "end_date")
+
+# session.info key of the active_athlete_count deltas flushed in the
+# current transaction, for after_commit listeners that mirror the counts
+# (app.services.coach_matching); dropped on rollback
+ATHLETE_COUNT_DELTAS_KEY = "coach_athlete_count_deltas"
+
+
+def stored_values(
+    connection: Any, target: Any, names: Tuple[str, ...]
+) -> Dict[str, Any]:
+    """
+    Column values of a row as last flushed, for mapper events running
+    before its UPDATE or DELETE
+    """
+    state = inspect(target)
+    stored: Dict[str, Any] = {}
+    for name in names:
+        history = state.attrs[name].history
+        if history.deleted:
+            stored[name] = history.deleted[0]
+        elif history.unchanged:
+            stored[name] = history.unchanged[0]
+        elif not history.added:
+            # Expired and untouched: loading it reads the stored value
+            stored[name] = getattr(target, name)
+    if len(stored) < len(names):
+        # Overwritten without the old value loaded, read the row itself
+        table = type(target).__table__
+        row = connection.execute(
+            select(*(table.c[name] for name in names)).where(
+                table.c.id == target.id
+            )
+        ).one()
+        stored = dict(row._mapping)
+    return stored
+
+
+def athlete_count_deltas(
+    connection: Any, target: Any, operation: str
+) -> Dict[int, int]:
+    """
+    Change to active_athlete_count per coach id when a connection insert,
+    update or delete is flushed; call before the UPDATE or DELETE runs
+    """
+    deltas: Dict[int, int] = {}
+    if operation == "update":
+        state = inspect(target)
+        if not any(
+            state.attrs[name].history.has_changes()
+            for name in _COUNTED_ATTRIBUTES
+        ):
+            return deltas
+    if operation != "insert":
+        stored = stored_values(connection, target, _COUNTED_ATTRIBUTES)
+        if stored["is_active"] is True and stored["end_date"] is None:
+            deltas[stored["coach_id"]] = -1
+    if operation != "delete" and target.is_current:
+        deltas[target.coach_id] = deltas.get(target.coach_id, 0) + 1
+    return {coach_id: delta for coach_id, delta in deltas.items() if delta}
+
+
+def _adjust_athlete_counts(connection: Any, target: Any, operation: str) -> None:
+    coaches = Coach.__table__
+    # Computed once per flushed row: it may have to SELECT the stored row
+    deltas = athlete_count_deltas(connection, target, operation)
+    session = object_session(target)
+    if deltas and session is not None:
+        pending = session.info.setdefault(ATHLETE_COUNT_DELTAS_KEY, {})
+        for coach_id, delta in deltas.items():
+            pending[coach_id] = pending.get(coach_id, 0) + delta
+    for coach_id, delta in deltas.items():
+        # Relative to the stored value, so concurrent writers cannot lose
+        # each other's changes
+        connection.execute(
+            update(coaches)
+            .where(coaches.c.id == coach_id)
+            .values(
+                active_athlete_count=coaches.c.active_athlete_count + delta
+            )
+        )
+
+
+@event.listens_for(CoachAthleteConnection, "after_insert")
+def _connection_inserted(mapper: Any, connection: Any, target: Any) -> None:
+    _adjust_athlete_counts(connection, target, "insert")
+
+
+@event.listens_for(CoachAthleteConnection, "before_update")
+def _connection_updated(mapper: Any, connection: Any, target: Any) -> None:
+    _adjust_athlete_counts(connection, target, "update")
+
+
+@event.listens_for(CoachAthleteConnection, "before_delete")
+def _connection_deleted(mapper: Any, connection: Any, target: Any) -> None:
+    _adjust_athlete_counts(connection, target, "delete")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_athlete_count_deltas(session: Session) -> None:
+    session.info.pop(ATHLETE_COUNT_DELTAS_KEY, None)
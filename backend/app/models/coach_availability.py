@@ -0,0 +1,221 @@
+"""
+Coach weekly availability normalized into UTC minute-of-week intervals
+
+Coach.availability stays the coach-facing JSON schedule in their own time
+zone, either keyed by weekday:
+
+    {"tuesday": [{"start": "18:00", "end": "20:00"}, "06:30-08:00"]}
+
+or as a list of {"day": "tuesday", "start": "18:00", "end": "20:00"}. Each
+slot is converted to UTC with the offset of Coach.time_zone when the
+schedule is saved, and stored as [start_minute, end_minute) rows counted
+from Monday 00:00 UTC. Slots crossing the end of the week are split and
+overlapping or adjacent slots merged. The rows are rewritten in the same
+flush whenever a coach's schedule or time zone is written.
+
+A daylight saving change moves the UTC offset of a zone without any write,
+so stored rows go an hour off until they are normalized again:
+app.services.coach_service.resync_coach_availability rewrites the rows
+whose offset changed (run it around DST transitions, or simply hourly),
+and the in-memory availability index normalizes from the JSON schedules
+on every rebuild rather than reading these rows.
+"""
+import re
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    delete,
+    event,
+    insert,
+    inspect,
+)
+
+from app.core.database import Base
+from app.models.coach import Coach
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+
+# [start, end) in minutes from Monday 00:00 UTC
+Interval = Tuple[int, int]
+
+_TIME = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*$")
+
+# Writes to these Coach attributes change the normalized rows
+_SOURCE_ATTRIBUTES = ("availability", "time_zone")
+
+
+def parse_time(value: Any) -> Optional[int]:
+    """Minutes since midnight of an "HH:MM" string, 24:00 allowed"""
+    match = _TIME.match(value) if isinstance(value, str) else None
+    if match is None:
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if minutes >= 60 or hours * 60 + minutes > DAY_MINUTES:
+        return None
+    return hours * 60 + minutes
+
+
+def utc_offset(time_zone: Optional[str], now: Optional[datetime] = None) -> int:
+    """Minutes the time zone is ahead of UTC at `now`, 0 if unknown"""
+    if not time_zone:
+        return 0
+    try:
+        zone = ZoneInfo(time_zone)
+    except (ZoneInfoNotFoundError, ValueError):
+        return 0
+    offset = (now or datetime.now(timezone.utc)).astimezone(zone).utcoffset()
+    return int(offset.total_seconds() // 60) if offset else 0
+
+
+def _slot(day: Any, slot: Any) -> Optional[Tuple[int, int, int]]:
+    if not isinstance(day, str) or day.lower() not in WEEKDAYS:
+        return None
+    if isinstance(slot, str):
+        start, _, end = slot.partition("-")
+    elif isinstance(slot, dict):
+        start, end = slot.get("start"), slot.get("end")
+    else:
+        return None
+    start_minute, end_minute = parse_time(start), parse_time(end)
+    if start_minute is None or end_minute is None or start_minute == end_minute:
+        return None
+    return WEEKDAYS.index(day.lower()), start_minute, end_minute
+
+
+def local_slots(availability: Any) -> List[Tuple[int, int, int]]:
+    """(weekday, start, end) minutes of a schedule; bad entries skipped"""
+    entries: Iterable[Tuple[Any, Any]] = ()
+    if isinstance(availability, dict):
+        entries = (
+            (day, slot)
+            for day, slots in availability.items()
+            if isinstance(slots, list)
+            for slot in slots
+        )
+    elif isinstance(availability, list):
+        entries = (
+            (entry.get("day"), entry)
+            for entry in availability
+            if isinstance(entry, dict)
+        )
+    return [slot for slot in (_slot(day, value) for day, value in entries) if slot]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sorted intervals with overlapping and adjacent ones merged"""
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def to_utc_intervals(
+    day: int, start: int, end: int, offset: int
+) -> List[Interval]:
+    """
+    UTC week intervals of a local weekday slot; an end before the start
+    means the slot runs past midnight
+    """
+    length = end - start if end > start else end + DAY_MINUTES - start
+    utc_start = (day * DAY_MINUTES + start - offset) % WEEK_MINUTES
+    utc_end = utc_start + length
+    if utc_end <= WEEK_MINUTES:
+        return [(utc_start, utc_end)]
+    return [(utc_start, WEEK_MINUTES), (0, utc_end - WEEK_MINUTES)]
+
+
+def normalize_availability(
+    availability: Any, time_zone: Optional[str], now: Optional[datetime] = None
+) -> List[Interval]:
+    """UTC week intervals of a coach's JSON schedule"""
+    offset = utc_offset(time_zone, now)
+    return merge_intervals(
+        interval
+        for day, start, end in local_slots(availability)
+        for interval in to_utc_intervals(day, start, end, offset)
+    )
+
+
+class CoachAvailability(Base):
+    """
+    One weekly interval, in UTC, during which a coach is available
+    """
+
+    __tablename__ = "coach_availability"
+    __table_args__ = (
+        CheckConstraint(
+            f"0 <= start_minute AND start_minute < end_minute "
+            f"AND end_minute <= {WEEK_MINUTES}",
+            name="ck_coach_availability_week",
+        ),
+        Index("ix_coach_availability_window", "start_minute", "end_minute"),
+    )
+
+    coach_id = Column(
+        Integer,
+        ForeignKey("coaches.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    start_minute = Column(Integer, primary_key=True)
+    end_minute = Column(Integer, nullable=False)
+
+
+def sync_coach_availability(connection: Any, coach: Any) -> List[Interval]:
+    """
+    Replace a coach's normalized availability on the given connection,
+    returns the intervals written
+    """
+    table = CoachAvailability.__table__
+    connection.execute(delete(table).where(table.c.coach_id == coach.id))
+    intervals = normalize_availability(coach.availability, coach.time_zone)
+    if intervals:
+        connection.execute(
+            insert(table),
+            [
+                {"coach_id": coach.id, "start_minute": start, "end_minute": end}
+                for start, end in intervals
+            ],
+        )
+    return intervals
+
+
+def availability_changed(coach: Any) -> bool:
+    """Whether a flushed Coach update touched its schedule or time zone"""
+    state = inspect(coach)
+    return any(
+        state.attrs[name].history.has_changes() for name in _SOURCE_ATTRIBUTES
+    )
+
+
+@event.listens_for(Coach, "after_insert")
+def _normalize_new_coach(mapper: Any, connection: Any, target: Coach) -> None:
+    sync_coach_availability(connection, target)
+
+
+@event.listens_for(Coach, "after_update")
+def _normalize_updated_coach(
+    mapper: Any, connection: Any, target: Coach
+) -> None:
+    # JSON columns are not mutation-tracked: assign a new value to trigger this
+    if availability_changed(target):
+        sync_coach_availability(connection, target)
@@ -0,0 +1,167 @@
+"""
+Athlete reviews of coaches, aggregated incrementally on the coach row
+
+A review is one athlete's 1-5 star rating of a coach. Flushing a review
+insert, rating change or delete moves the coach's total_reviews,
+rating_sum, star histogram, average_rating and bayesian_rating with one
+atomic UPDATE relative to the stored values: O(1) per review however many
+the coach has. Bulk and raw SQL writes and cascaded deletes bypass that
+and are corrected by app.services.coach_service.recompute_coach_ratings,
+which also applies a changed prior.
+
+The Bayesian average pulls coaches with few reviews towards
+COACH_RATING_PRIOR_MEAN as if they had COACH_RATING_PRIOR_WEIGHT extra
+reviews of that rating, so one 5-star review does not outrank a hundred
+4.8 ones.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    Text,
+    UniqueConstraint,
+    case,
+    cast,
+    event,
+    func,
+    inspect,
+    update,
+)
+from sqlalchemy.orm import relationship
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.coach import Coach, stored_values
+
+STARS = (1, 2, 3, 4, 5)
+
+# Writes to these CoachReview attributes change the aggregates
+_AGGREGATED_ATTRIBUTES = ("coach_id", "rating")
+
+
+class CoachReview(Base):
+    """
+    One athlete's rating and review of a coach
+    """
+
+    __tablename__ = "coach_reviews"
+    __table_args__ = (
+        UniqueConstraint("coach_id", "athlete_id"),
+        CheckConstraint("rating BETWEEN 1 AND 5", name="ck_coach_reviews_rating"),
+        # A coach's reviews, newest first, keyset-paginated on id
+        Index("ix_coach_reviews_coach_id_id", "coach_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    coach_id = Column(
+        Integer, ForeignKey("coaches.id", ondelete="CASCADE"), nullable=False
+    )
+    athlete_id = Column(
+        Integer, ForeignKey("athletes.id", ondelete="CASCADE"), nullable=False
+    )
+    rating = Column(Integer, nullable=False)
+    comment = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    coach = relationship("Coach")
+    athlete = relationship("Athlete")
+
+    def __repr__(self) -> str:
+        return (
+            f"<CoachReview(coach_id={self.coach_id}, "
+            f"athlete_id={self.athlete_id}, rating={self.rating})>"
+        )
+
+
+def rating_columns(total: Any, rating_sum: Any) -> Dict[str, Any]:
+    """
+    average_rating and bayesian_rating as SQL expressions of a review
+    count and rating sum
+    """
+    weight = settings.COACH_RATING_PRIOR_WEIGHT
+    return {
+        "average_rating": case(
+            (total > 0, cast(rating_sum, Float) / total), else_=0.0
+        ),
+        "bayesian_rating": (
+            weight * settings.COACH_RATING_PRIOR_MEAN + cast(rating_sum, Float)
+        )
+        / (weight + total),
+    }
+
+
+def _adjust_ratings(
+    connection: Any,
+    coach_id: int,
+    removed: Optional[int] = None,
+    added: Optional[int] = None,
+) -> None:
+    coaches = Coach.__table__
+    stars: Dict[int, int] = {}
+    if removed is not None:
+        stars[removed] = stars.get(removed, 0) - 1
+    if added is not None:
+        stars[added] = stars.get(added, 0) + 1
+    total = func.coalesce(coaches.c.total_reviews, 0) + sum(stars.values())
+    rating_sum = coaches.c.rating_sum + (added or 0) - (removed or 0)
+    histogram = {
+        f"rating_{star}_count": coaches.c[f"rating_{star}_count"] + delta
+        for star, delta in stars.items()
+        if delta
+    }
+    # Every right-hand side reads the row as it was before this UPDATE,
+    # and the row lock makes concurrent reviews of a coach queue up
+    connection.execute(
+        update(coaches)
+        .where(coaches.c.id == coach_id)
+        .values(
+            total_reviews=total,
+            rating_sum=rating_sum,
+            **histogram,
+            **rating_columns(total, rating_sum),
+        )
+    )
+
+
+@event.listens_for(CoachReview, "after_insert")
+def _review_inserted(mapper: Any, connection: Any, target: CoachReview) -> None:
+    _adjust_ratings(connection, target.coach_id, added=target.rating)
+
+
+@event.listens_for(CoachReview, "before_update")
+def _review_updated(mapper: Any, connection: Any, target: CoachReview) -> None:
+    state = inspect(target)
+    if not any(
+        state.attrs[name].history.has_changes()
+        for name in _AGGREGATED_ATTRIBUTES
+    ):
+        return
+    stored = stored_values(connection, target, _AGGREGATED_ATTRIBUTES)
+    if stored["coach_id"] == target.coach_id:
+        _adjust_ratings(
+            connection,
+            target.coach_id,
+            removed=stored["rating"],
+            added=target.rating,
+        )
+    else:
+        _adjust_ratings(connection, stored["coach_id"], removed=stored["rating"])
+        _adjust_ratings(connection, target.coach_id, added=target.rating)
+
+
+# Before the DELETE, while expired attributes can still be loaded
+@event.listens_for(CoachReview, "before_delete")
+def _review_deleted(mapper: Any, connection: Any, target: CoachReview) -> None:
+    stored = stored_values(connection, target, _AGGREGATED_ATTRIBUTES)
+    _adjust_ratings(connection, stored["coach_id"], removed=stored["rating"])
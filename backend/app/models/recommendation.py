@@ -13,6 +13,7 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -61,6 +62,10 @@ class Recommendation(Base):
     """
 
     __tablename__ = "recommendations"
+    __table_args__ = (
+        # Per-athlete counts by status, e.g. a coach roster's pending ones
+        Index("ix_recommendations_athlete_id_status", "athlete_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     athlete_id = Column(Integer, ForeignKey("athletes.id"), nullable=False)
@@ -5,7 +5,20 @@ import enum
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, Integer, String, Text
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    func,
+    literal_column,
+)
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -50,6 +63,7 @@ class User(Base):
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
     last_login = Column(DateTime, nullable=True)
+    last_seen = Column(DateTime, nullable=True)
 
     # Verification
     email_verified_at = Column(DateTime, nullable=True)
@@ -83,3 +97,39 @@ class User(Base):
 
     def __repr__(self) -> str:
         return f"<User(id={self.id}, username='{self.username}', type='{self.user_type}')>"
+
+
+# Search keys, shared with the user search service so queries match the
+# index expressions exactly
+username_search_key = func.lower(User.username)
+full_name_search_key = func.lower(
+    User.first_name + literal_column("' '") + User.last_name
+)
+
+# Prefix autocomplete on short inputs (btree) and substring / typo-tolerant
+# matching (pg_trgm GIN)
+Index(
+    "ix_users_username_prefix",
+    username_search_key.label("username_key"),
+    postgresql_ops={"username_key": "varchar_pattern_ops"},
+)
+Index(
+    "ix_users_username_trgm",
+    username_search_key.label("username_key"),
+    postgresql_using="gin",
+    postgresql_ops={"username_key": "gin_trgm_ops"},
+)
+Index(
+    "ix_users_full_name_trgm",
+    full_name_search_key.label("full_name_key"),
+    postgresql_using="gin",
+    postgresql_ops={"full_name_key": "gin_trgm_ops"},
+)
+
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql"
+    ),
+)
@@ -1,7 +1,14 @@
 """
 Athlete Pydantic schemas
 """
-from pydantic import BaseModel
+import math
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, EmailStr, validator
+
+from app.core.config import settings
+from app.models.athlete import SPORT_POSITIONS, AthletePosition, Sport
 
 
 class Athlete(BaseModel):
@@ -22,3 +29,189 @@ class AthleteProfile(BaseModel):
 
 class AthleteStats(BaseModel):
     pass
+
+
+class AthleteDirectoryEntry(BaseModel):
+    """Schema for one athlete in the directory listing"""
+
+    id: int
+    user_id: int
+    username: str
+    full_name: str
+    profile_picture: Optional[str] = None
+    is_verified: bool
+    primary_sport: Sport
+    primary_position: AthletePosition
+    experience_level: Optional[str] = None
+    recovery_status: Optional[str] = None
+    current_team: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AthleteDirectoryPage(BaseModel):
+    """Schema for a page of the athlete directory"""
+
+    items: List[AthleteDirectoryEntry]
+    next_cursor: Optional[str] = None  # pass back to get the next page
+
+
+class AthleteLeaderboardEntry(BaseModel):
+    """Schema for one ranked athlete on a metric leaderboard"""
+
+    rank: int
+    athlete_id: int
+    user_id: int
+    username: str
+    full_name: str
+    profile_picture: Optional[str] = None
+    primary_position: AthletePosition
+    value: float
+
+
+class AthleteLeaderboard(BaseModel):
+    """Schema for a sport metric leaderboard"""
+
+    sport: Sport
+    metric: str
+    unit: Optional[str] = None
+    higher_is_better: bool
+    items: List[AthleteLeaderboardEntry]
+
+
+class CohortMetricRank(BaseModel):
+    """Schema for an athlete's standing on one metric within a cohort"""
+
+    metric: str
+    unit: Optional[str] = None
+    higher_is_better: bool
+    value: Optional[float] = None
+    percentile: Optional[float] = None  # share of the cohort beaten, 0-100
+    z_score: Optional[float] = None  # positive is better
+    cohort_count: int  # cohort members with a value
+
+
+class AthleteCohortRanking(BaseModel):
+    """Schema for an athlete's percentiles among comparable athletes"""
+
+    athlete_id: int
+    sport: Sport
+    primary_position: AthletePosition
+    age_band: Optional[str] = None  # None when ranked across all ages
+    cohort_size: int
+    metrics: List[CohortMetricRank]
+
+
+class MetricSampleIn(BaseModel):
+    """Schema for one timestamped metric measurement"""
+
+    metric: str
+    ts: datetime  # naive timestamps are taken as UTC
+    value: float
+
+    @validator("metric")
+    def validate_metric(cls, v):
+        if not v or len(v) > 50:
+            raise ValueError("Metric name must be 1 to 50 characters long")
+        return v
+
+    @validator("ts")
+    def validate_ts(cls, v):
+        # Each month a batch touches becomes a partition, so bound the range
+        ts = v.replace(tzinfo=timezone.utc) if v.tzinfo is None else v
+        now = datetime.now(timezone.utc)
+        oldest = now - timedelta(days=settings.METRIC_SAMPLE_MAX_AGE_DAYS)
+        latest = now + timedelta(seconds=settings.METRIC_SAMPLE_MAX_FUTURE_SECONDS)
+        if not oldest <= ts <= latest:
+            raise ValueError(
+                "Timestamp must be within the last "
+                f"{settings.METRIC_SAMPLE_MAX_AGE_DAYS} days and not in the future"
+            )
+        return v
+
+    @validator("value")
+    def validate_value(cls, v):
+        if not math.isfinite(v):
+            raise ValueError("Metric value must be a finite number")
+        return v
+
+
+class MetricSampleBatch(BaseModel):
+    """Schema for a batch of metric samples to ingest"""
+
+    samples: List[MetricSampleIn]
+
+    @validator("samples")
+    def validate_samples(cls, v):
+        if len(v) > settings.METRIC_INGEST_MAX_BATCH:
+            raise ValueError(
+                f"At most {settings.METRIC_INGEST_MAX_BATCH} samples per batch"
+            )
+        return v
+
+
+class MetricSeries(BaseModel):
+    """Schema for a metric window in columnar form"""
+
+    athlete_id: int
+    metric: str
+    timestamps: List[datetime]
+    values: List[float]
+
+
+class AthleteImportRow(BaseModel):
+    """Schema for one athlete record of a roster import"""
+
+    email: EmailStr
+    username: str
+    first_name: str
+    last_name: str
+    primary_sport: Sport
+    primary_position: AthletePosition
+    date_of_birth: Optional[date] = None
+    height: Optional[float] = None  # in cm
+    weight: Optional[float] = None  # in kg
+    experience_level: Optional[str] = None
+    current_team: Optional[str] = None
+    jersey_number: Optional[str] = None
+    fitness_metrics: Optional[Dict[str, Any]] = None
+    skill_metrics: Optional[Dict[str, Any]] = None
+    game_stats: Optional[Dict[str, Any]] = None
+
+    @validator("primary_sport", "primary_position", pre=True)
+    def normalize_enum(cls, v):
+        return v.strip().lower().replace(" ", "_") if isinstance(v, str) else v
+
+    @validator("primary_position")
+    def validate_position(cls, v, values):
+        sport = values.get("primary_sport")
+        if sport is not None and v not in SPORT_POSITIONS[sport]:
+            raise ValueError(f"Position {v.value} is not played in {sport.value}")
+        return v
+
+    @validator("username")
+    def validate_username(cls, v):
+        if not 3 <= len(v) <= 50:
+            raise ValueError("Username must be 3 to 50 characters long")
+        if not v.replace("_", "").replace("-", "").isalnum():
+            raise ValueError(
+                "Username can only contain letters, numbers, hyphens, and underscores"
+            )
+        return v
+
+    @validator("first_name", "last_name")
+    def validate_name(cls, v):
+        if not v.strip() or len(v) > 100:
+            raise ValueError("Name must be 1 to 100 characters long")
+        return v.strip()
+
+
+class AthleteImportReport(BaseModel):
+    """Schema for the outcome of a roster import"""
+
+    import_id: str
+    processed: int  # records read
+    imported: int  # athletes created
+    failed: int  # records rejected, see the errors file
@@ -1,7 +1,13 @@
 """
 Coach Pydantic schemas
 """
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.athlete import AthletePosition, Sport
+from app.models.coach import CoachLevel
 
 
 class Coach(BaseModel):
@@ -22,3 +28,121 @@ class CoachProfile(BaseModel):
 
 class CoachSearch(BaseModel):
     pass
+
+
+class CoachMatch(BaseModel):
+    """Schema for one coach ranked for an athlete"""
+
+    coach_id: int
+    user_id: int
+    username: str
+    full_name: str
+    profile_picture: Optional[str] = None
+    coaching_level: CoachLevel
+    sports_coached: List[str] = []
+    specializations: List[str] = []
+    hourly_rate: Optional[float] = None
+    average_rating: Optional[float] = None
+    score: float  # 0-1, see app.services.coach_matching
+
+
+class CoachMatches(BaseModel):
+    """Schema for the best matching coaches of an athlete"""
+
+    athlete_id: int
+    items: List[CoachMatch]
+
+
+class AvailableCoach(BaseModel):
+    """Schema for a coach free in a searched weekly window"""
+
+    coach_id: int
+    user_id: int
+    username: str
+    full_name: str
+    profile_picture: Optional[str] = None
+    coaching_level: CoachLevel
+    hourly_rate: Optional[float] = None
+    average_rating: Optional[float] = None
+    time_zone: Optional[str] = None
+
+
+class AvailableCoaches(BaseModel):
+    """Schema for the coaches free in a weekly window"""
+
+    total: int  # every matching active coach, items are the best rated
+    items: List[AvailableCoach]
+
+
+class CoachReviewIn(BaseModel):
+    """Schema for an athlete's review of a coach"""
+
+    rating: int = Field(..., ge=1, le=5)
+    comment: Optional[str] = Field(None, max_length=2000)
+
+
+class CoachReview(BaseModel):
+    """Schema for a published coach review"""
+
+    id: int
+    coach_id: int
+    athlete_id: int
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CoachReviewPage(BaseModel):
+    """Schema for a page of a coach's reviews, newest first"""
+
+    items: List[CoachReview]
+    next_cursor: Optional[int] = None  # pass back as before_id
+
+
+class CoachRatingSummary(BaseModel):
+    """Schema for a coach's review aggregates"""
+
+    coach_id: int
+    total_reviews: int
+    average_rating: float
+    bayesian_rating: float  # what coach search ranks on
+    histogram: Dict[int, int]  # reviews per star, 1-5
+
+
+class RosterMetric(BaseModel):
+    """Schema for an athlete's latest value of a projected metric"""
+
+    metric: str
+    value: float
+    unit: Optional[str] = None
+
+
+class RosterAthlete(BaseModel):
+    """Schema for one current athlete on a coach's roster"""
+
+    connection_id: int
+    athlete_id: int
+    user_id: int
+    username: str
+    full_name: str
+    profile_picture: Optional[str] = None
+    primary_sport: Sport
+    primary_position: AthletePosition
+    experience_level: Optional[str] = None
+    recovery_status: Optional[str] = None
+    connection_type: Optional[str] = None
+    start_date: Optional[datetime] = None
+    sessions_completed: int = 0
+    metrics: List[RosterMetric] = []
+    pending_recommendations: int = 0
+
+
+class CoachRoster(BaseModel):
+    """Schema for a coach's current athletes, newest connection first"""
+
+    coach_id: int
+    items: List[RosterAthlete]
@@ -85,6 +85,7 @@ class User(UserBase):
     created_at: datetime
     updated_at: datetime
     last_login: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
     email_verified_at: Optional[datetime] = None
 
     class Config:
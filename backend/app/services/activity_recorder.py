@@ -0,0 +1,135 @@
+"""
+Write-behind recorder for user activity timestamps
+
+Logins and authenticated requests only need to move last_login/last_seen
+forward, so instead of a row write and commit in the request path we buffer
+the latest timestamp per user in memory and flush them every
+ACTIVITY_FLUSH_INTERVAL seconds with one batched UPDATE ... FROM (VALUES ...)
+per chunk. GREATEST() keeps the columns monotonic, so buffers from several
+workers can be applied in any order. The buffer is flushed on shutdown.
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import async_engine
+
+logger = logging.getLogger(__name__)
+
+# user_id -> (last_login, last_seen)
+_Pending = Dict[int, Tuple[Optional[datetime], Optional[datetime]]]
+
+
+def _latest(a: Optional[datetime], b: Optional[datetime]) -> Optional[datetime]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+class ActivityRecorder:
+    """
+    Buffers last-login and last-seen timestamps and flushes them in batches
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: _Pending = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record_login(self, user_id: int, at: Optional[datetime] = None) -> None:
+        """Buffer a login (also counts as activity)"""
+        at = at or datetime.utcnow()
+        self._merge({user_id: (at, at)})
+
+    def record_seen(self, user_id: int, at: Optional[datetime] = None) -> None:
+        """Buffer an authenticated request"""
+        self._merge({user_id: (None, at or datetime.utcnow())})
+
+    def _merge(self, updates: _Pending) -> None:
+        with self._lock:
+            for user_id, (login, seen) in updates.items():
+                old_login, old_seen = self._pending.get(user_id, (None, None))
+                self._pending[user_id] = (
+                    _latest(old_login, login),
+                    _latest(old_seen, seen),
+                )
+
+    async def flush(self) -> int:
+        """Write buffered timestamps to the database, returns rows sent"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            chunk = items[start : start + self.batch_size]
+            try:
+                async with async_engine.begin() as conn:
+                    await conn.execute(*_batched_update(chunk))
+            except Exception:
+                logger.exception("Failed to flush %d activity rows", len(chunk))
+                # Keep the unsent rows for the next flush
+                self._merge(dict(items[start:]))
+                return start
+        return len(items)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+def _batched_update(
+    chunk: List[Tuple[int, Tuple[Optional[datetime], Optional[datetime]]]]
+) -> tuple:
+    """Build one UPDATE users ... FROM (VALUES ...) statement for a chunk"""
+    rows = []
+    params: dict = {}
+    for i, (user_id, (login, seen)) in enumerate(chunk):
+        rows.append(
+            f"(CAST(:id_{i} AS INTEGER), CAST(:login_{i} AS TIMESTAMP), "
+            f"CAST(:seen_{i} AS TIMESTAMP))"
+        )
+        params[f"id_{i}"] = user_id
+        params[f"login_{i}"] = login
+        params[f"seen_{i}"] = seen
+    statement = text(
+        "UPDATE users AS u "
+        "SET last_login = GREATEST(u.last_login, v.last_login), "
+        "last_seen = GREATEST(u.last_seen, v.last_seen) "
+        f"FROM (VALUES {', '.join(rows)}) AS v(id, last_login, last_seen) "
+        "WHERE u.id = v.id"
+    )
+    return statement, params
+
+
+activity_recorder = ActivityRecorder(
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL,
+    batch_size=settings.ACTIVITY_FLUSH_BATCH_SIZE,
+)
@@ -0,0 +1,194 @@
+"""
+Async user service for database operations on an AsyncSession
+
+Mirrors app.services.user_service for endpoints that run on the event loop.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.hashing import hash_password, verify_and_update_password_async
+from app.core.routing import primary_reads
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate
+from app.services.principal_cache import ainvalidate_principal
+from app.services.user_service import (
+    IN_CHUNK_SIZE,
+    UserAlreadyExists,
+    create_user_statement,
+)
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    """Get user by ID"""
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """Get user by email"""
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+async def get_user_by_username(
+    db: AsyncSession, username: str
+) -> Optional[User]:
+    """Get user by username"""
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+
+async def get_users_by_ids(
+    db: AsyncSession, user_ids: Iterable[int]
+) -> List[User]:
+    """Get the users with the given IDs in one IN query (missing IDs skipped)"""
+    ids = list(dict.fromkeys(user_ids))
+    users: List[User] = []
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start : start + IN_CHUNK_SIZE]
+        result = await db.execute(select(User).where(User.id.in_(chunk)))
+        users.extend(result.scalars().all())
+    return users
+
+
+async def get_users_by_usernames(
+    db: AsyncSession, usernames: Iterable[str]
+) -> List[User]:
+    """Get the users with the given usernames in one IN query"""
+    names = list(dict.fromkeys(usernames))
+    users: List[User] = []
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start : start + IN_CHUNK_SIZE]
+        result = await db.execute(select(User).where(User.username.in_(chunk)))
+        users.extend(result.scalars().all())
+    return users
+
+
+async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
+    """
+    Create a new user in one INSERT ... ON CONFLICT DO NOTHING round trip,
+    raising UserAlreadyExists with the clashing field
+    """
+    hashed_password = await hash_password(user_create.password)
+    statement = create_user_statement(user_create, hashed_password)
+
+    with primary_reads(db):
+        row = (await db.execute(statement)).one()
+        db_user, email_clash, username_clash = row
+        if db_user is None:
+            await db.rollback()
+            if not (email_clash or username_clash):
+                # Lost a race with a sign-up that committed after our
+                # snapshot was taken, look again to name the field
+                email_clash = await get_user_by_email(db, user_create.email)
+            raise UserAlreadyExists("email" if email_clash else "username")
+
+    await db.commit()
+    return db_user
+
+
+async def update_user(
+    db: AsyncSession, user_id: int, user_update: UserUpdate
+) -> Optional[User]:
+    """Update user information"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return None
+
+    update_data = user_update.dict(exclude_unset=True)
+
+    # Hash password if provided
+    if "password" in update_data:
+        update_data["hashed_password"] = await hash_password(
+            update_data.pop("password")
+        )
+
+    for field, value in update_data.items():
+        setattr(db_user, field, value)
+
+    await db.commit()
+    await db.refresh(db_user)
+    await ainvalidate_principal(user_id)
+    return db_user
+
+
+async def authenticate_user(
+    db: AsyncSession, email: str, password: str
+) -> Optional[User]:
+    """Authenticate user with email and password"""
+    user = await get_user_by_email(db, email)
+    if not user:
+        return None
+    verified, new_hash = await verify_and_update_password_async(
+        password, str(user.hashed_password)
+    )
+    if not verified:
+        return None
+    if new_hash:
+        # Stored hash predates the current cost settings, upgrade it
+        setattr(user, "hashed_password", new_hash)
+        await db.commit()
+    return user
+
+
+async def verify_user_email(db: AsyncSession, user_id: int) -> Optional[User]:
+    """Mark user email as verified"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return None
+
+    setattr(db_user, "is_verified", True)
+    setattr(db_user, "email_verified_at", datetime.utcnow())
+    setattr(db_user, "verification_token", None)
+
+    await db.commit()
+    await db.refresh(db_user)
+    await ainvalidate_principal(user_id)
+    return db_user
+
+
+async def update_user_password(
+    db: AsyncSession, user_id: int, new_password: str
+) -> Optional[User]:
+    """Update user password"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return None
+
+    setattr(db_user, "hashed_password", await hash_password(new_password))
+    setattr(db_user, "password_reset_token", None)
+    setattr(db_user, "password_reset_expires", None)
+
+    await db.commit()
+    await db.refresh(db_user)
+    await ainvalidate_principal(user_id)
+    return db_user
+
+
+async def deactivate_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """Deactivate user account"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return None
+
+    setattr(db_user, "is_active", False)
+    await db.commit()
+    await db.refresh(db_user)
+    await ainvalidate_principal(user_id)
+    return db_user
+
+
+async def activate_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """Activate user account"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return None
+
+    setattr(db_user, "is_active", True)
+    await db.commit()
+    await db.refresh(db_user)
+    await ainvalidate_principal(user_id)
+    return db_user
@@ -0,0 +1,402 @@
+"""
+Streaming bulk import of athlete rosters from CSV or NDJSON
+
+Uploads are decoded and parsed incrementally, so memory stays bounded by
+one chunk of records however large the file is (up to MAX_FILE_SIZE).
+Valid records are written IMPORT_CHUNK_SIZE at a time with one multi-row
+INSERT each for users, athletes and the projected athlete metrics, and
+committed per chunk. Rejected records, with the reasons, go to an NDJSON
+errors file rather than failing the import; so do the records of a chunk
+whose write fails, which is rolled back while the import carries on.
+
+CSV files have a header row. Metric keys are given as prefixed columns,
+e.g. fitness_metrics.sprint_30m or game_stats.goals; NDJSON records nest
+them as objects. Imported users get an unusable password and sign in
+after a password reset.
+"""
+import codecs
+import csv
+import json
+import logging
+import secrets
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+)
+from uuid import uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import insert as core_insert
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.hashing import hash_password
+from app.models.athlete import Athlete
+from app.models.athlete_metric import AthleteMetric, project_metrics
+from app.models.user import User, UserType
+from app.schemas.athlete import AthleteImportReport, AthleteImportRow
+from app.services.cohort_stats import cohort_cache
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+_NESTED_FIELDS = ("fitness_metrics", "skill_metrics", "game_stats")
+_USER_FIELDS = {"email", "username", "first_name", "last_name"}
+
+
+class ImportTooLarge(Exception):
+    """Raised when an upload grows past MAX_FILE_SIZE"""
+
+    def __init__(self, report: AthleteImportReport):
+        super().__init__(
+            f"Upload exceeds {settings.MAX_FILE_SIZE} bytes; "
+            f"{report.imported} athletes were imported before the limit"
+        )
+        self.report = report
+
+
+class ParsedRecord(NamedTuple):
+    """A parsed record, or the reason its line could not be parsed"""
+
+    line: int
+    record: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+
+def _cell(value: str) -> Any:
+    """CSV metric cell as a number when it is one"""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class RecordParser:
+    """
+    Incremental CSV/NDJSON parser: feed decoded text, get records back
+    """
+
+    def __init__(self, format: str):
+        if format not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {format}")
+        self.format = format
+        self._buffer = ""
+        self._line = 0
+        # CSV: header, and a record whose quoted field spans lines
+        self._header: Optional[List[str]] = None
+        self._pending: Optional[str] = None
+        self._pending_line = 0
+
+    def feed(self, text: str) -> List[ParsedRecord]:
+        """Parse every complete line of text, keep the rest buffered"""
+        *lines, self._buffer = (self._buffer + text).split("\n")
+        return self._parse_lines(lines)
+
+    def close(self) -> List[ParsedRecord]:
+        """Parse whatever is left at the end of the upload"""
+        lines = [self._buffer] if self._buffer else []
+        self._buffer = ""
+        records = self._parse_lines(lines)
+        if self._pending is not None:
+            records.append(
+                ParsedRecord(
+                    self._pending_line, None, "Unterminated quoted field"
+                )
+            )
+            self._pending = None
+        return records
+
+    def _parse_lines(self, lines: List[str]) -> List[ParsedRecord]:
+        records = []
+        for line in lines:
+            self._line += 1
+            line = line.rstrip("\r")
+            parsed = (
+                self._parse_csv(line)
+                if self.format == "csv"
+                else self._parse_ndjson(line)
+            )
+            if parsed is not None:
+                records.append(parsed)
+        return records
+
+    def _parse_ndjson(self, line: str) -> Optional[ParsedRecord]:
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            return ParsedRecord(self._line, None, f"Invalid JSON: {exc}")
+        if not isinstance(record, dict):
+            return ParsedRecord(
+                self._line, None, "Record must be a JSON object"
+            )
+        return ParsedRecord(self._line, record)
+
+    def _parse_csv(self, line: str) -> Optional[ParsedRecord]:
+        if self._pending is None:
+            self._pending, self._pending_line = line, self._line
+        else:
+            self._pending += "\n" + line
+        # Quotes are doubled inside quoted fields, an odd count means the
+        # record continues on the next line
+        if self._pending.count('"') % 2:
+            return None
+        text, self._pending = self._pending, None
+        if not text.strip():
+            return None
+
+        values = next(csv.reader([text]))
+        if self._header is None:
+            self._header = [name.strip() for name in values]
+            return None
+        if len(values) != len(self._header):
+            return ParsedRecord(
+                self._pending_line,
+                None,
+                f"Expected {len(self._header)} columns, got {len(values)}",
+            )
+
+        record: Dict[str, Any] = {}
+        for name, value in zip(self._header, values):
+            value = value.strip()
+            if not value:
+                continue
+            field, _, key = name.partition(".")
+            if key and field in _NESTED_FIELDS:
+                record.setdefault(field, {})[key] = _cell(value)
+            else:
+                record[name] = value
+        return ParsedRecord(self._pending_line, record)
+
+
+class AthleteImporter:
+    """
+    Validates parsed records and writes them in multi-row chunks
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        password_hash: str,
+        errors: TextIO,
+        chunk_size: int = settings.IMPORT_CHUNK_SIZE,
+        on_progress: Optional[Callable[[AthleteImportReport], None]] = None,
+        import_id: Optional[str] = None,
+    ):
+        self.db = db
+        self.password_hash = password_hash
+        self.errors = errors
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.report = AthleteImportReport(
+            import_id=import_id or uuid4().hex,
+            processed=0,
+            imported=0,
+            failed=0,
+        )
+        self._chunk: List[tuple] = []
+
+    def _reject(self, line: int, errors: List[str], record: Any = None) -> None:
+        self.report.failed += 1
+        entry = {"line": line, "errors": errors, "record": record}
+        self.errors.write(json.dumps(entry, default=str) + "\n")
+
+    async def add(self, parsed: ParsedRecord) -> None:
+        """Validate one parsed record, flushing when the chunk is full"""
+        self.report.processed += 1
+        if parsed.error is not None:
+            self._reject(parsed.line, [parsed.error])
+            return
+        try:
+            row = AthleteImportRow(**parsed.record)
+        except ValidationError as exc:
+            self._reject(
+                parsed.line,
+                [
+                    ".".join(str(part) for part in error["loc"])
+                    + f": {error['msg']}"
+                    for error in exc.errors()
+                ],
+                parsed.record,
+            )
+            return
+        self._chunk.append((parsed.line, row))
+        if len(self._chunk) >= self.chunk_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the buffered rows: users, athletes, projected metrics"""
+        chunk, self._chunk = self._chunk, []
+        if chunk:
+            try:
+                await self._write(chunk)
+            except SQLAlchemyError as exc:
+                await self.db.rollback()
+                reason = str(getattr(exc, "orig", None) or exc).splitlines()[0]
+                logger.warning(
+                    "Athlete import %s: chunk of %d records rolled back: %s",
+                    self.report.import_id,
+                    len(chunk),
+                    reason,
+                )
+                for line, row in chunk:
+                    self._reject(
+                        line, [f"Chunk failed to write: {reason}"], row.dict()
+                    )
+        if self.on_progress is not None:
+            self.on_progress(self.report)
+
+    async def _write(self, chunk: List[tuple]) -> None:
+        now = datetime.utcnow()
+        users = User.__table__
+        # One executemany of a single-row statement: SQLAlchemy batches it
+        # into multi-row VALUES without compiling a statement per chunk.
+        # Conflicting emails or usernames, including repeats within the
+        # chunk, are skipped by Postgres and come back without an id
+        inserted = await self.db.execute(
+            insert(users)
+            .on_conflict_do_nothing()
+            .returning(users.c.id, users.c.email, users.c.username),
+            [
+                {
+                    "email": row.email,
+                    "username": row.username,
+                    "hashed_password": self.password_hash,
+                    "first_name": row.first_name,
+                    "last_name": row.last_name,
+                    "user_type": UserType.ATHLETE,
+                    "is_active": True,
+                    "is_verified": False,
+                    "is_premium": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for _, row in chunk
+            ],
+        )
+        user_ids = {
+            (email, username): user_id for user_id, email, username in inserted
+        }
+
+        created, duplicates = [], []
+        for line, row in chunk:
+            user_id = user_ids.pop((row.email, row.username), None)
+            if user_id is None:
+                duplicates.append((line, row))
+            else:
+                created.append((user_id, row))
+
+        if created:
+            await self._write_athletes(created, now)
+        await self.db.commit()
+        # Only once committed: a failed chunk rejects all of its records
+        self.report.imported += len(created)
+        for line, row in duplicates:
+            self._reject(
+                line,
+                ["A user with this email or username already exists"],
+                row.dict(),
+            )
+
+    async def _write_athletes(self, created: List[tuple], now: datetime) -> None:
+        athletes = Athlete.__table__
+        inserted = await self.db.execute(
+            core_insert(athletes).returning(
+                athletes.c.id, athletes.c.user_id
+            ),
+            [
+                {
+                    "user_id": user_id,
+                    **row.dict(exclude=_USER_FIELDS),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for user_id, row in created
+            ],
+        )
+        athlete_ids = {user_id: athlete_id for athlete_id, user_id in inserted}
+        metrics = [
+            {
+                "athlete_id": athlete_ids[user_id],
+                "metric": name,
+                "sport": row.primary_sport,
+                "value": value,
+            }
+            for user_id, row in created
+            for name, value in project_metrics(row)
+        ]
+        if metrics:
+            await self.db.execute(core_insert(AthleteMetric.__table__), metrics)
+
+
+def errors_path(import_id: str) -> Path:
+    """Errors file of an import run through the API"""
+    return Path(settings.IMPORT_ERRORS_DIR) / f"{import_id}.errors.ndjson"
+
+
+async def import_athletes(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    format: str,
+    errors: TextIO,
+    on_progress: Optional[Callable[[AthleteImportReport], None]] = None,
+    import_id: Optional[str] = None,
+) -> AthleteImportReport:
+    """
+    Import athletes from an uploaded byte stream, raises ImportTooLarge
+    once more than MAX_FILE_SIZE bytes have been received
+    """
+    parser = RecordParser(format)
+    # BOM-tolerant, spreadsheets often prepend one to CSV exports
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    importer = AthleteImporter(
+        db,
+        # One hash of a discarded secret: imported accounts cannot sign in
+        # until they reset their password
+        password_hash=await hash_password(secrets.token_urlsafe(32)),
+        errors=errors,
+        on_progress=on_progress,
+        import_id=import_id,
+    )
+
+    received = 0
+    try:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > settings.MAX_FILE_SIZE:
+                await importer.flush()
+                raise ImportTooLarge(importer.report)
+            for parsed in parser.feed(decoder.decode(chunk)):
+                await importer.add(parsed)
+        remaining = parser.feed(decoder.decode(b"", final=True))
+        for parsed in remaining + parser.close():
+            await importer.add(parsed)
+        await importer.flush()
+    finally:
+        if importer.report.imported:
+            cohort_cache.clear()
+
+    logger.info(
+        "Athlete import %s: %d processed, %d imported, %d failed",
+        importer.report.import_id,
+        importer.report.processed,
+        importer.report.imported,
+        importer.report.failed,
+    )
+    return importer.report
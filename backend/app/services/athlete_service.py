@@ -0,0 +1,254 @@
+"""
+Athlete service for database operations
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.athlete import Athlete, AthletePosition, Sport
+from app.models.athlete_metric import AthleteMetric, get_metric, project_metrics
+from app.models.user import User
+from app.schemas.athlete import (
+    AthleteDirectoryEntry,
+    AthleteDirectoryPage,
+    AthleteLeaderboard,
+    AthleteLeaderboardEntry,
+)
+from app.services.cohort_stats import cohort_cache
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class UnknownMetric(ValueError):
+    """Raised for a metric that is not registered for the sport"""
+
+
+def encode_cursor(created_at: datetime, athlete_id: int) -> str:
+    """Opaque cursor for the row after (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{athlete_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor, raises InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, athlete_id = raw.decode().split("|")
+        return datetime.fromisoformat(created_at), int(athlete_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor("Invalid pagination cursor") from exc
+
+
+async def get_athlete_owner_id(db: AsyncSession, athlete_id: int) -> Optional[int]:
+    """User id owning an athlete profile, None if there is no such athlete"""
+    return await db.scalar(select(Athlete.user_id).where(Athlete.id == athlete_id))
+
+
+async def list_athletes(
+    db: AsyncSession,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    primary_sport: Optional[Sport] = None,
+    primary_position: Optional[AthletePosition] = None,
+    experience_level: Optional[str] = None,
+    recovery_status: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    min_bmi: Optional[float] = None,
+    max_bmi: Optional[float] = None,
+) -> AthleteDirectoryPage:
+    """
+    List athletes newest first, keyset-paginated on (created_at, id), with
+    the user's display fields joined in the same query
+    """
+    statement = (
+        select(
+            Athlete.id,
+            Athlete.user_id,
+            Athlete.primary_sport,
+            Athlete.primary_position,
+            Athlete.experience_level,
+            Athlete.recovery_status,
+            Athlete.current_team,
+            Athlete.created_at,
+            User.username,
+            User.first_name,
+            User.last_name,
+            User.profile_picture,
+            User.is_verified,
+        )
+        .join(User, User.id == Athlete.user_id)
+        .where(User.is_active.is_(True))
+        .order_by(Athlete.created_at.desc(), Athlete.id.desc())
+        # One extra row tells us whether there is a next page
+        .limit(limit + 1)
+    )
+    if primary_sport is not None:
+        statement = statement.where(Athlete.primary_sport == primary_sport)
+    if primary_position is not None:
+        statement = statement.where(
+            Athlete.primary_position == primary_position
+        )
+    if experience_level is not None:
+        statement = statement.where(
+            Athlete.experience_level == experience_level
+        )
+    if recovery_status is not None:
+        statement = statement.where(Athlete.recovery_status == recovery_status)
+    if min_age is not None or max_age is not None:
+        statement = statement.where(Athlete.age_between(min_age, max_age))
+    if min_bmi is not None:
+        statement = statement.where(Athlete.bmi >= min_bmi)
+    if max_bmi is not None:
+        statement = statement.where(Athlete.bmi <= max_bmi)
+    if cursor is not None:
+        # Row comparison, so Postgres can seek straight into the index
+        statement = statement.where(
+            tuple_(Athlete.created_at, Athlete.id) < decode_cursor(cursor)
+        )
+
+    rows = (await db.execute(statement)).all()
+    items = [
+        AthleteDirectoryEntry(
+            id=row.id,
+            user_id=row.user_id,
+            username=row.username,
+            full_name=f"{row.first_name} {row.last_name}",
+            profile_picture=row.profile_picture,
+            is_verified=bool(row.is_verified),
+            primary_sport=row.primary_sport,
+            primary_position=row.primary_position,
+            experience_level=row.experience_level,
+            recovery_status=row.recovery_status,
+            current_team=row.current_team,
+            created_at=row.created_at,
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return AthleteDirectoryPage(items=items, next_cursor=next_cursor)
+
+
+async def get_leaderboard(
+    db: AsyncSession,
+    sport: Sport,
+    metric: str,
+    limit: int = 20,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+) -> AthleteLeaderboard:
+    """
+    Rank active athletes of a sport on a registered metric, best first,
+    read from the athlete_metrics leaderboard index
+    """
+    definition = get_metric(sport, metric)
+    if definition is None:
+        raise UnknownMetric(f"Unknown {sport.value} metric: {metric}")
+
+    order = (
+        AthleteMetric.value.desc()
+        if definition.higher_is_better
+        else AthleteMetric.value.asc()
+    )
+    statement = (
+        select(
+            AthleteMetric.athlete_id,
+            AthleteMetric.value,
+            Athlete.user_id,
+            Athlete.primary_position,
+            User.username,
+            User.first_name,
+            User.last_name,
+            User.profile_picture,
+        )
+        .join(Athlete, Athlete.id == AthleteMetric.athlete_id)
+        .join(User, User.id == Athlete.user_id)
+        .where(
+            AthleteMetric.sport == sport,
+            AthleteMetric.metric == metric,
+            User.is_active.is_(True),
+        )
+        .order_by(order, AthleteMetric.athlete_id)
+        .limit(limit)
+    )
+    if min_value is not None:
+        statement = statement.where(AthleteMetric.value >= min_value)
+    if max_value is not None:
+        statement = statement.where(AthleteMetric.value <= max_value)
+
+    rows = (await db.execute(statement)).all()
+    return AthleteLeaderboard(
+        sport=sport,
+        metric=metric,
+        unit=definition.unit,
+        higher_is_better=definition.higher_is_better,
+        items=[
+            AthleteLeaderboardEntry(
+                rank=rank,
+                athlete_id=row.athlete_id,
+                user_id=row.user_id,
+                username=row.username,
+                full_name=f"{row.first_name} {row.last_name}",
+                profile_picture=row.profile_picture,
+                primary_position=row.primary_position,
+                value=row.value,
+            )
+            for rank, row in enumerate(rows, start=1)
+        ],
+    )
+
+
+async def rebuild_athlete_metrics(db: AsyncSession, batch_size: int = 1000) -> int:
+    """
+    Recompute the whole athlete_metrics projection, e.g. after the registry
+    changes, in id-ordered batches; returns athletes processed
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        athletes = (
+            await db.execute(
+                select(
+                    Athlete.id,
+                    Athlete.primary_sport,
+                    Athlete.fitness_metrics,
+                    Athlete.skill_metrics,
+                    Athlete.game_stats,
+                )
+                .where(Athlete.id > last_id)
+                .order_by(Athlete.id)
+                .limit(batch_size)
+            )
+        ).all()
+        if not athletes:
+            cohort_cache.clear()
+            return processed
+
+        ids = [athlete.id for athlete in athletes]
+        rows = [
+            {
+                "athlete_id": athlete.id,
+                "metric": name,
+                "sport": Sport(athlete.primary_sport),
+                "value": value,
+            }
+            for athlete in athletes
+            for name, value in project_metrics(athlete)
+        ]
+        await db.execute(
+            delete(AthleteMetric).where(AthleteMetric.athlete_id.in_(ids))
+        )
+        if rows:
+            await db.execute(insert(AthleteMetric), rows)
+        await db.commit()
+        processed += len(athletes)
+        last_id = ids[-1]
@@ -0,0 +1,485 @@
+"""
+Coach availability search: which coaches of a sport are free in a window
+
+Each sport has an interval tree over the UTC minute-of-week intervals of
+its coaches (see app.models.coach_availability). The tree is a centered
+interval tree on a fixed skeleton: node centers are the midpoints of the
+halved week, so an interval always lives at the same node and coaches can
+be added or removed in place. A window query walks O(log WEEK_MINUTES)
+nodes plus the ones it reports from, answering in O(log n + k) without
+reading any schedule JSON.
+
+Committed schedule, time zone and sport changes of Coach rows are applied
+to this worker's trees; they are also rebuilt every
+COACH_AVAILABILITY_REFRESH seconds, which picks up other workers' writes
+and user deactivations. Rebuilds normalize the coaches' JSON schedules
+with their zones' current UTC offsets, so a daylight saving change is
+reflected by the next rebuild without waiting for the stored rows to be
+resynced.
+"""
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    any_,
+    bindparam,
+    event,
+    func,
+    inspect,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.athlete import Sport
+from app.models.coach import Coach, CoachLevel
+from app.models.coach_availability import (
+    WEEK_MINUTES,
+    WEEKDAYS,
+    Interval,
+    normalize_availability,
+    parse_time,
+    to_utc_intervals,
+    utc_offset,
+)
+from app.models.user import User
+from app.schemas.coach import AvailableCoach, AvailableCoaches
+
+logger = logging.getLogger(__name__)
+
+# Writes to these Coach attributes move it in the trees
+_INDEX_ATTRIBUTES = ("availability", "time_zone", "sports_coached")
+_PENDING_KEY = "coach_availability_updates"
+
+# (sports, UTC intervals) of a coach
+_Entry = Tuple[Tuple[Sport, ...], List[Interval]]
+
+
+class InvalidWindow(ValueError):
+    """Raised for an unknown weekday, time or time zone in a query"""
+
+
+def _sports(values: Any) -> Tuple[Sport, ...]:
+    if not isinstance(values, list):
+        return ()
+    sports = []
+    for value in values:
+        try:
+            sports.append(Sport(value))
+        except ValueError:
+            continue
+    return tuple(dict.fromkeys(sports))
+
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center: int):
+        self.center = center
+        # Intervals containing the center, as (start, end, coach_id) and
+        # (end, start, coach_id) in ascending order
+        self.by_start: List[Tuple[int, int, int]] = []
+        self.by_end: List[Tuple[int, int, int]] = []
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+
+class IntervalTree:
+    """
+    Centered interval tree of [start, end) intervals within the week
+    """
+
+    def __init__(self) -> None:
+        self._root: Optional[_Node] = None
+        self.size = 0
+
+    def _node(self, start: int, end: int, create: bool) -> Optional[_Node]:
+        """The node an interval belongs to, the one whose center it holds"""
+        low, high = 0, WEEK_MINUTES
+        parent: Optional[_Node] = None
+        node, side = self._root, ""
+        while True:
+            center = (low + high) // 2
+            if node is None:
+                if not create:
+                    return None
+                node = _Node(center)
+                if parent is None:
+                    self._root = node
+                else:
+                    setattr(parent, side, node)
+            if start <= center < end:
+                return node
+            parent = node
+            if end <= center:
+                node, side, high = node.left, "left", center
+            else:
+                node, side, low = node.right, "right", center + 1
+
+    def add(self, start: int, end: int, coach_id: int) -> None:
+        node = self._node(start, end, create=True)
+        insort(node.by_start, (start, end, coach_id))
+        insort(node.by_end, (end, start, coach_id))
+        self.size += 1
+
+    def remove(self, start: int, end: int, coach_id: int) -> None:
+        node = self._node(start, end, create=False)
+        if node is None:
+            return
+        position = bisect_left(node.by_start, (start, end, coach_id))
+        if node.by_start[position : position + 1] == [(start, end, coach_id)]:
+            del node.by_start[position]
+            del node.by_end[bisect_left(node.by_end, (end, start, coach_id))]
+            self.size -= 1
+
+    def overlapping(self, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """(start, end, coach_id) of the intervals overlapping [start, end)"""
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if end <= node.center:
+                # Every interval here ends after the query, check starts
+                for interval in node.by_start:
+                    if interval[0] >= end:
+                        break
+                    yield interval
+                stack.append(node.left)
+            elif start > node.center:
+                # Every interval here starts before the query, check ends
+                for interval_end, interval_start, coach_id in reversed(
+                    node.by_end
+                ):
+                    if interval_end <= start:
+                        break
+                    yield interval_start, interval_end, coach_id
+                stack.append(node.right)
+            else:
+                yield from node.by_start
+                stack.append(node.left)
+                stack.append(node.right)
+
+
+def _schedule_entries(rows: Sequence[Any]) -> Dict[int, _Entry]:
+    """Index entries of (coach_id, sports, availability, time_zone) rows"""
+    now = datetime.now(timezone.utc)
+    return {
+        coach_id: (
+            _sports(sports),
+            normalize_availability(availability, time_zone, now),
+        )
+        for coach_id, sports, availability, time_zone in rows
+    }
+
+
+class AvailabilityIndex:
+    """
+    Per-worker interval trees, one per sport, of active coaches' schedules
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.queries = 0
+        self.refreshes = 0
+        self._trees: Dict[Sport, IntervalTree] = {}
+        self._entries: Dict[int, _Entry] = {}
+        self._loaded = False
+        # Updates committed while a rebuild is reading, replayed onto it
+        self._replay: Optional[Dict[int, Optional[_Entry]]] = None
+        self._refreshing = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _insert(self, coach_id: int, entry: _Entry) -> None:
+        sports, intervals = entry
+        if not sports or not intervals:
+            return
+        self._entries[coach_id] = entry
+        for sport in sports:
+            tree = self._trees.setdefault(sport, IntervalTree())
+            for start, end in intervals:
+                tree.add(start, end, coach_id)
+
+    def _delete(self, coach_id: int) -> None:
+        sports, intervals = self._entries.pop(coach_id, ((), []))
+        for sport in sports:
+            for start, end in intervals:
+                self._trees[sport].remove(start, end, coach_id)
+
+    def build(self, entries: Dict[int, _Entry]) -> None:
+        """Replace every tree with the given coach entries"""
+        index = AvailabilityIndex(self.refresh_interval)
+        for coach_id, entry in entries.items():
+            index._insert(coach_id, entry)
+        # Swapped together, queries never see a partial index
+        self._trees, self._entries = index._trees, index._entries
+        self._loaded = True
+
+    def apply(self, updates: Dict[int, Optional[_Entry]]) -> None:
+        """Apply committed coach writes; None removes the coach"""
+        if self._replay is not None:
+            self._replay.update(updates)
+        for coach_id, entry in updates.items():
+            self._delete(coach_id)
+            if entry is not None:
+                self._insert(coach_id, entry)
+
+    def available(
+        self, sport: Sport, windows: Sequence[Interval], whole: bool = True
+    ) -> Set[int]:
+        """
+        Coaches of a sport free for all of the windows (whole) or for some
+        part of any of them
+        """
+        tree = self._trees.get(sport)
+        if tree is None or not windows:
+            return set()
+        if not whole:
+            return {
+                coach_id
+                for start, end in windows
+                for _, _, coach_id in tree.overlapping(start, end)
+            }
+        # A coach's intervals are merged, so one of them must hold a window
+        found: Optional[Set[int]] = None
+        for start, end in windows:
+            covering = {
+                coach_id
+                for interval_start, interval_end, coach_id in tree.overlapping(
+                    start, start + 1
+                )
+                if interval_start <= start and interval_end >= end
+            }
+            found = covering if found is None else found & covering
+        return found or set()
+
+    async def refresh(self) -> int:
+        """Rebuild the trees from the database, returns coaches loaded"""
+        async with self._refreshing:
+            return await self._rebuild()
+
+    async def _rebuild(self) -> int:
+        self._replay = {}
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(
+                        Coach.id,
+                        Coach.sports_coached,
+                        Coach.availability,
+                        Coach.time_zone,
+                    )
+                    .join(User, User.id == Coach.user_id)
+                    .where(
+                        User.is_active.is_(True),
+                        Coach.availability.isnot(None),
+                    )
+                )
+                rows = result.all()
+            # Normalizing and building large trees would stall the event loop
+            entries = await asyncio.to_thread(_schedule_entries, rows)
+            await asyncio.to_thread(self.build, entries)
+            replay = self._replay
+        finally:
+            self._replay = None
+        self.apply(replay)
+        self.refreshes += 1
+        return len(entries)
+
+    async def ensure_loaded(self) -> None:
+        """Build the trees on first use when the refresh task is not up"""
+        if not self._loaded:
+            async with self._refreshing:
+                if not self._loaded:
+                    await self._rebuild()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh the coach availability index")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start the periodic rebuild task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic rebuild task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Index size and how often it was queried and rebuilt"""
+        return {
+            "coaches": len(self._entries),
+            "intervals": {
+                sport.value: tree.size for sport, tree in self._trees.items()
+            },
+            "queries": self.queries,
+            "refreshes": self.refreshes,
+        }
+
+
+availability_index = AvailabilityIndex(
+    refresh_interval=settings.COACH_AVAILABILITY_REFRESH
+)
+
+
+def query_windows(
+    day: str, start: str, end: str, time_zone: Optional[str]
+) -> List[Interval]:
+    """UTC week intervals of a local weekday window, raises InvalidWindow"""
+    if day.lower() not in WEEKDAYS:
+        raise InvalidWindow(f"Unknown weekday: {day}")
+    start_minute, end_minute = parse_time(start), parse_time(end)
+    if start_minute is None or end_minute is None or start_minute == end_minute:
+        raise InvalidWindow("start and end must be distinct HH:MM times")
+    if time_zone:
+        try:
+            ZoneInfo(time_zone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise InvalidWindow(f"Unknown time zone: {time_zone}")
+    return to_utc_intervals(
+        WEEKDAYS.index(day.lower()),
+        start_minute,
+        end_minute,
+        utc_offset(time_zone),
+    )
+
+
+async def find_available_coaches(
+    db: AsyncSession,
+    sport: Sport,
+    day: str,
+    start: str,
+    end: str,
+    time_zone: Optional[str] = None,
+    whole: bool = True,
+    limit: int = 20,
+) -> AvailableCoaches:
+    """
+    Best rated (by Bayesian average) active coaches of a sport free in a
+    weekly window given in the caller's time zone (UTC by default); an end
+    before the start runs past midnight. Raises InvalidWindow.
+    """
+    windows = query_windows(day, start, end, time_zone)
+    await availability_index.ensure_loaded()
+    availability_index.queries += 1
+    coach_ids = availability_index.available(sport, windows, whole)
+    if not coach_ids:
+        return AvailableCoaches(total=0, items=[])
+
+    # One array parameter however many coaches matched
+    ids = bindparam("coach_ids", sorted(coach_ids), type_=ARRAY(Integer))
+    result = await db.execute(
+        select(
+            Coach.id,
+            Coach.user_id,
+            Coach.coaching_level,
+            Coach.hourly_rate,
+            Coach.average_rating,
+            Coach.time_zone,
+            User.username,
+            User.first_name,
+            User.last_name,
+            User.profile_picture,
+            func.count().over().label("total"),
+        )
+        .join(User, User.id == Coach.user_id)
+        .where(Coach.id == any_(ids), User.is_active.is_(True))
+        .order_by(Coach.bayesian_rating.desc().nulls_last(), Coach.id)
+        .limit(limit)
+    )
+    rows = result.all()
+    return AvailableCoaches(
+        total=rows[0].total if rows else 0,
+        items=[
+            AvailableCoach(
+                coach_id=row.id,
+                user_id=row.user_id,
+                username=row.username,
+                full_name=f"{row.first_name} {row.last_name}",
+                profile_picture=row.profile_picture,
+                coaching_level=CoachLevel(row.coaching_level),
+                hourly_rate=row.hourly_rate,
+                average_rating=row.average_rating,
+                time_zone=row.time_zone,
+            )
+            for row in rows
+        ],
+    )
+
+
+def _record_coach(target: Coach, changed_only: bool, deleted: bool) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    if changed_only:
+        state = inspect(target)
+        if not any(
+            state.attrs[name].history.has_changes()
+            for name in _INDEX_ATTRIBUTES
+        ):
+            return
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    # Encoded at flush time: the instance is expired after the commit
+    pending[target.id] = (
+        None
+        if deleted
+        else (
+            _sports(target.sports_coached),
+            normalize_availability(target.availability, target.time_zone),
+        )
+    )
+
+
+@event.listens_for(Coach, "after_insert")
+def _coach_inserted(mapper: Any, connection: Any, target: Coach) -> None:
+    _record_coach(target, changed_only=False, deleted=False)
+
+
+@event.listens_for(Coach, "after_update")
+def _coach_updated(mapper: Any, connection: Any, target: Coach) -> None:
+    _record_coach(target, changed_only=True, deleted=False)
+
+
+@event.listens_for(Coach, "after_delete")
+def _coach_deleted(mapper: Any, connection: Any, target: Coach) -> None:
+    _record_coach(target, changed_only=False, deleted=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_schedules(session: Session) -> None:
+    updates = session.info.pop(_PENDING_KEY, None)
+    if updates:
+        availability_index.apply(updates)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_schedules(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,519 @@
+"""
+Coach matching: rank coaches for an athlete from an in-memory feature matrix
+
+Every coach is encoded into one row of parallel NumPy arrays: bitsets of
+the sports coached, specializations and preferred athlete levels, and
+float columns for hourly rate, Bayesian rating, capacity and current load.
+Ranking the top K coaches for an athlete is then a handful of vectorized
+masks and arithmetic over all rows plus an argpartition, with no query per
+request; only the K winners' profiles are read from the database.
+
+Committed inserts, updates and deletes of Coach rows, and connection
+changes moving a coach's active_athlete_count, are applied to this
+worker's matrix in place. The matrix is also rebuilt every
+COACH_MATCH_REFRESH seconds, which is how other workers' writes, user
+deactivations, reconciled counts and new reviews' ratings reach it.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.athlete import Athlete, Sport
+from app.models.coach import (
+    ATHLETE_COUNT_DELTAS_KEY,
+    Coach,
+    CoachLevel,
+    CoachSpecialization,
+)
+from app.models.user import User
+from app.schemas.coach import CoachMatch, CoachMatches
+
+logger = logging.getLogger(__name__)
+
+# Values of Athlete.experience_level and Coach.preferred_athlete_level
+ATHLETE_LEVELS = ("beginner", "intermediate", "advanced", "professional")
+
+# Score weights, a perfect match scores 1.0
+SPORT_WEIGHT = 0.4
+SPECIALIZATION_WEIGHT = 0.25
+RATING_WEIGHT = 0.2
+LEVEL_WEIGHT = 0.15
+
+_SPORT_BITS = {sport.value: 1 << bit for bit, sport in enumerate(Sport)}
+_SPECIALIZATION_BITS = {
+    specialization.value: 1 << bit
+    for bit, specialization in enumerate(CoachSpecialization)
+}
+_LEVEL_BITS = {level: 1 << bit for bit, level in enumerate(ATHLETE_LEVELS)}
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], np.uint8)
+
+# Writes to these Coach attributes change its row
+_MATCH_ATTRIBUTES = (
+    "sports_coached",
+    "specializations",
+    "preferred_athlete_level",
+    "hourly_rate",
+    "bayesian_rating",
+    "accepts_new_athletes",
+    "max_athletes",
+)
+_PENDING_KEY = "coach_match_updates"
+
+
+def _bits(values: Any, bits: Dict[str, int]) -> int:
+    """Bitset of the known values in a JSON list, unknown ones ignored"""
+    if not isinstance(values, (list, tuple, set)):
+        return 0
+    mask = 0
+    for value in values:
+        mask |= bits.get(getattr(value, "value", value), 0)
+    return mask
+
+
+def _float(value: Any, default: float) -> float:
+    return default if value is None else float(value)
+
+
+class CoachFeatures(NamedTuple):
+    """Matching inputs of one coach, as stored in its matrix row"""
+
+    sports: int
+    specializations: int
+    levels: int  # 0 when the coach states no preference
+    hourly_rate: float  # NaN when unknown
+    rating: float  # Bayesian average, see app.models.coach_review
+    accepting: bool
+    capacity: float  # inf when max_athletes is not set
+
+
+def encode_coach(coach: Any) -> CoachFeatures:
+    """Feature row of a Coach, or of a row with the same attributes"""
+    return CoachFeatures(
+        sports=_bits(coach.sports_coached, _SPORT_BITS),
+        specializations=_bits(coach.specializations, _SPECIALIZATION_BITS),
+        levels=_bits(coach.preferred_athlete_level, _LEVEL_BITS),
+        hourly_rate=_float(coach.hourly_rate, np.nan),
+        rating=_float(coach.bayesian_rating, settings.COACH_RATING_PRIOR_MEAN),
+        accepting=bool(coach.accepts_new_athletes),
+        capacity=_float(coach.max_athletes or None, np.inf),
+    )
+
+
+class _Matrix:
+    """Parallel per-coach arrays; rows of removed coaches are reused"""
+
+    def __init__(self, capacity: int = 0):
+        self.ids = np.zeros(capacity, np.int64)
+        self.present = np.zeros(capacity, bool)
+        self.sports = np.zeros(capacity, np.uint16)
+        self.specializations = np.zeros(capacity, np.uint8)
+        self.levels = np.zeros(capacity, np.uint8)
+        self.hourly_rate = np.full(capacity, np.nan)
+        self.rating = np.zeros(capacity)
+        self.accepting = np.zeros(capacity, bool)
+        self.capacity = np.full(capacity, np.inf)
+        self.athletes = np.zeros(capacity)  # active connections
+        self.size = 0  # rows in use, present or not
+        self.row_of: Dict[int, int] = {}
+        self.free: List[int] = []
+
+    _ARRAYS = (
+        "ids",
+        "present",
+        "sports",
+        "specializations",
+        "levels",
+        "hourly_rate",
+        "rating",
+        "accepting",
+        "capacity",
+        "athletes",
+    )
+
+    @classmethod
+    def from_rows(
+        cls, rows: List[Tuple[int, CoachFeatures, float]]
+    ) -> "_Matrix":
+        """Matrix of (coach_id, features, athletes) rows, built columnwise"""
+        matrix = cls()
+        if not rows:
+            return matrix
+        ids, features, athletes = zip(*rows)
+        columns = list(zip(*features))
+        matrix.ids = np.array(ids, np.int64)
+        matrix.present = np.ones(len(rows), bool)
+        for name, column in zip(CoachFeatures._fields, columns):
+            setattr(matrix, name, np.array(column, getattr(matrix, name).dtype))
+        matrix.athletes = np.array(athletes, np.float64)
+        matrix.size = len(rows)
+        matrix.row_of = {coach_id: row for row, coach_id in enumerate(ids)}
+        return matrix
+
+    def _grow(self) -> None:
+        capacity = max(1024, 2 * self.ids.size)
+        for name in self._ARRAYS:
+            old = getattr(self, name)
+            new = np.empty(capacity, old.dtype)
+            new[: old.size] = old
+            setattr(self, name, new)
+        self.present[self.size :] = False
+
+    def put(
+        self,
+        coach_id: int,
+        features: CoachFeatures,
+        athletes: Optional[float] = None,
+    ) -> None:
+        """Write a coach's row; athletes None keeps the known count"""
+        row = self.row_of.get(coach_id)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                if self.size == self.ids.size:
+                    self._grow()
+                row = self.size
+                self.size += 1
+            self.row_of[coach_id] = row
+            self.athletes[row] = 0
+        self.ids[row] = coach_id
+        self.present[row] = True
+        self.sports[row] = features.sports
+        self.specializations[row] = features.specializations
+        self.levels[row] = features.levels
+        self.hourly_rate[row] = features.hourly_rate
+        self.rating[row] = features.rating
+        self.accepting[row] = features.accepting
+        self.capacity[row] = features.capacity
+        if athletes is not None:
+            self.athletes[row] = athletes
+
+    def adjust(self, coach_id: int, delta: int) -> None:
+        row = self.row_of.get(coach_id)
+        if row is not None:
+            self.athletes[row] += delta
+
+    def remove(self, coach_id: int) -> None:
+        row = self.row_of.pop(coach_id, None)
+        if row is not None:
+            self.present[row] = False
+            self.free.append(row)
+
+
+class CoachMatchIndex:
+    """
+    Per-worker feature matrix of the coaches of active users
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.rankings = 0
+        self.refreshes = 0
+        self._matrix = _Matrix()
+        self._loaded = False
+        # Updates committed while a rebuild is reading, replayed onto it
+        self._replay: Optional[Dict[int, Optional[CoachFeatures]]] = None
+        self._refreshing = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._matrix.row_of)
+
+    def build(self, rows: Iterable[Tuple[int, CoachFeatures, float]]) -> None:
+        """Replace the matrix with (coach_id, features, athletes) rows"""
+        matrix = _Matrix.from_rows(list(rows))
+        # Swapped in one assignment, rankings never see a partial matrix
+        self._matrix = matrix
+        self._loaded = True
+
+    def apply(self, updates: Dict[int, Optional[CoachFeatures]]) -> None:
+        """Apply committed coach writes; None removes the coach"""
+        if self._replay is not None:
+            self._replay.update(updates)
+        for coach_id, features in updates.items():
+            if features is None:
+                self._matrix.remove(coach_id)
+            else:
+                self._matrix.put(coach_id, features)
+
+    def adjust_athletes(self, deltas: Dict[int, int]) -> None:
+        """Apply committed changes to coaches' active athlete counts"""
+        # Not replayed after a rebuild: the rebuilt counts may already
+        # include them, and a lost delta is corrected by the next rebuild
+        for coach_id, delta in deltas.items():
+            self._matrix.adjust(coach_id, delta)
+
+    def top_k(
+        self,
+        sport: Sport,
+        k: int,
+        secondary_sports: Iterable[Any] = (),
+        experience_level: Optional[str] = None,
+        specializations: Iterable[CoachSpecialization] = (),
+        max_rate: Optional[float] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        (coach_id, score) of the best K coaches with room for an athlete of
+        the given sports, best first. Coaches of a secondary sport only get
+        half the sport score; a max_rate keeps coaches with no stated rate.
+        """
+        matrix = self._matrix
+        n = matrix.size
+        if k <= 0 or n == 0:
+            return []
+        sports = matrix.sports[:n]
+        primary = (sports & _SPORT_BITS[Sport(sport).value]) != 0
+        secondary_mask = _bits(list(secondary_sports), _SPORT_BITS)
+        eligible = (
+            matrix.present[:n]
+            & matrix.accepting[:n]
+            & (matrix.athletes[:n] < matrix.capacity[:n])
+        )
+        if secondary_mask:
+            eligible &= primary | ((sports & secondary_mask) != 0)
+        else:
+            eligible &= primary
+        if max_rate is not None:
+            # NaN compares false: an unknown rate is not over budget
+            eligible &= ~(matrix.hourly_rate[:n] > max_rate)
+        rows = np.flatnonzero(eligible)
+        if not rows.size:
+            return []
+
+        score = np.where(primary[rows], SPORT_WEIGHT, SPORT_WEIGHT / 2)
+        wanted = _bits(list(specializations), _SPECIALIZATION_BITS)
+        if wanted:
+            overlap = _POPCOUNT[matrix.specializations[rows] & wanted]
+            score += SPECIALIZATION_WEIGHT * overlap / _POPCOUNT[wanted]
+        rating = np.clip(matrix.rating[rows], 0.0, 5.0)
+        score += RATING_WEIGHT * rating / 5.0
+        # Coaches preferring the athlete's level get the full level score,
+        # those without a stated preference half of it
+        levels = matrix.levels[rows]
+        level_bit = _LEVEL_BITS.get(experience_level or "", 0)
+        if level_bit:
+            score += LEVEL_WEIGHT * np.where(
+                (levels & level_bit) != 0, 1.0, np.where(levels == 0, 0.5, 0.0)
+            )
+        else:
+            score += LEVEL_WEIGHT / 2
+
+        k = min(k, rows.size)
+        if k < rows.size:
+            top = np.argpartition(-score, k - 1)[:k]
+        else:
+            top = np.arange(rows.size)
+        ids = matrix.ids[rows[top]]
+        # Best score first, ties broken by rating then coach id
+        order = np.lexsort((ids, -rating[top], -score[top]))
+        return [
+            (int(coach_id), float(value))
+            for coach_id, value in zip(ids[order], score[top][order])
+        ]
+
+    async def refresh(self) -> int:
+        """Rebuild the matrix from the database, returns coaches loaded"""
+        async with self._refreshing:
+            return await self._rebuild()
+
+    async def _rebuild(self) -> int:
+        self._replay = {}
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(
+                        Coach.id,
+                        *(getattr(Coach, name) for name in _MATCH_ATTRIBUTES),
+                        Coach.active_athlete_count,
+                    )
+                    .join(User, User.id == Coach.user_id)
+                    .where(User.is_active.is_(True))
+                )
+                rows = result.all()
+            # Encoding a large matrix would stall the event loop
+            await asyncio.to_thread(
+                self.build,
+                (
+                    (row.id, encode_coach(row), row.active_athlete_count)
+                    for row in rows
+                ),
+            )
+            replay = self._replay
+        finally:
+            self._replay = None
+        self.apply(replay)
+        self.refreshes += 1
+        return len(rows)
+
+    async def ensure_loaded(self) -> None:
+        """Build the matrix on first use when the refresh task is not up"""
+        if not self._loaded:
+            async with self._refreshing:
+                if not self._loaded:
+                    await self._rebuild()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh the coach match index")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start the periodic rebuild task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic rebuild task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Matrix size and how often it was used and rebuilt"""
+        return {
+            "coaches": len(self),
+            "rows": self._matrix.size,
+            "rankings": self.rankings,
+            "refreshes": self.refreshes,
+        }
+
+
+coach_index = CoachMatchIndex(refresh_interval=settings.COACH_MATCH_REFRESH)
+
+
+async def match_coaches(
+    db: AsyncSession,
+    athlete_id: int,
+    limit: int,
+    specializations: Iterable[CoachSpecialization] = (),
+    max_rate: Optional[float] = None,
+) -> Optional[CoachMatches]:
+    """
+    Best matching coaches for an athlete with their profiles, None if
+    there is no such athlete
+    """
+    athlete = (
+        await db.execute(
+            select(
+                Athlete.primary_sport,
+                Athlete.secondary_sports,
+                Athlete.experience_level,
+            ).where(Athlete.id == athlete_id)
+        )
+    ).first()
+    if athlete is None:
+        return None
+
+    await coach_index.ensure_loaded()
+    coach_index.rankings += 1
+    ranked = coach_index.top_k(
+        Sport(athlete.primary_sport),
+        limit,
+        secondary_sports=athlete.secondary_sports or (),
+        experience_level=athlete.experience_level,
+        specializations=specializations,
+        max_rate=max_rate,
+    )
+    profiles = {}
+    if ranked:
+        result = await db.execute(
+            select(
+                Coach.id,
+                Coach.user_id,
+                Coach.coaching_level,
+                Coach.sports_coached,
+                Coach.specializations,
+                Coach.hourly_rate,
+                Coach.average_rating,
+                User.username,
+                User.first_name,
+                User.last_name,
+                User.profile_picture,
+            )
+            .join(User, User.id == Coach.user_id)
+            .where(Coach.id.in_([coach_id for coach_id, _ in ranked]))
+        )
+        profiles = {row.id: row for row in result.all()}
+
+    return CoachMatches(
+        athlete_id=athlete_id,
+        items=[
+            CoachMatch(
+                coach_id=coach_id,
+                user_id=row.user_id,
+                username=row.username,
+                full_name=f"{row.first_name} {row.last_name}",
+                profile_picture=row.profile_picture,
+                coaching_level=CoachLevel(row.coaching_level),
+                sports_coached=row.sports_coached or [],
+                specializations=row.specializations or [],
+                hourly_rate=row.hourly_rate,
+                average_rating=row.average_rating,
+                score=round(score, 4),
+            )
+            for coach_id, score in ranked
+            # Deleted since the matrix was built
+            if (row := profiles.get(coach_id)) is not None
+        ],
+    )
+
+
+def _record_coach(target: Coach, changed_only: bool, deleted: bool) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    if changed_only:
+        state = inspect(target)
+        if not any(
+            state.attrs[name].history.has_changes()
+            for name in _MATCH_ATTRIBUTES
+        ):
+            return
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    # Encoded at flush time: the instance is expired after the commit
+    pending[target.id] = None if deleted else encode_coach(target)
+
+
+@event.listens_for(Coach, "after_insert")
+def _coach_inserted(mapper: Any, connection: Any, target: Coach) -> None:
+    _record_coach(target, changed_only=False, deleted=False)
+
+
+@event.listens_for(Coach, "after_update")
+def _coach_updated(mapper: Any, connection: Any, target: Coach) -> None:
+    _record_coach(target, changed_only=True, deleted=False)
+
+
+@event.listens_for(Coach, "after_delete")
+def _coach_deleted(mapper: Any, connection: Any, target: Coach) -> None:
+    _record_coach(target, changed_only=False, deleted=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_coaches(session: Session) -> None:
+    updates = session.info.pop(_PENDING_KEY, None)
+    if updates:
+        coach_index.apply(updates)
+    # Recorded by the active_athlete_count listeners in app.models.coach
+    deltas = session.info.pop(ATHLETE_COUNT_DELTAS_KEY, None)
+    if deltas:
+        coach_index.adjust_athletes(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_coaches(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,385 @@
+"""
+Coach service for database operations
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    any_,
+    bindparam,
+    delete,
+    exists,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, load_only
+
+from app.core.config import settings
+from app.models.athlete import Athlete
+from app.models.athlete_metric import get_metric
+from app.models.coach import Coach, CoachAthleteConnection
+from app.models.coach_availability import (
+    CoachAvailability,
+    Interval,
+    normalize_availability,
+)
+from app.models.coach_review import STARS, CoachReview, rating_columns
+from app.models.recommendation import Recommendation, RecommendationStatus
+from app.models.user import User
+from app.schemas.coach import (
+    CoachRatingSummary,
+    CoachReviewPage,
+    CoachRoster,
+    RosterAthlete,
+    RosterMetric,
+)
+
+
+class ReviewNotAllowed(Exception):
+    """Raised when a user may not review a coach"""
+
+
+async def reconcile_athlete_counts(db: AsyncSession) -> int:
+    """
+    Reset every coach's active_athlete_count to the number of current
+    connections in one statement, fixing drift left by bulk or raw SQL
+    writes; returns how many coaches were corrected
+    """
+    current = (
+        select(func.count())
+        .where(
+            CoachAthleteConnection.coach_id == Coach.id,
+            CoachAthleteConnection.is_current,
+        )
+        .correlate(Coach)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Coach)
+        .where(Coach.active_athlete_count.is_distinct_from(current))
+        .values(active_athlete_count=current)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def resync_coach_availability(db: AsyncSession) -> int:
+    """
+    Re-normalize every coach's schedule with the current UTC offset of its
+    time zone and rewrite the coach_availability rows that differ, which
+    daylight saving changes cause without any write; returns how many
+    coaches were rewritten
+    """
+    now = datetime.now(timezone.utc)
+    stored: Dict[int, List[Interval]] = {}
+    for coach_id, start, end in await db.execute(
+        select(
+            CoachAvailability.coach_id,
+            CoachAvailability.start_minute,
+            CoachAvailability.end_minute,
+        ).order_by(CoachAvailability.coach_id, CoachAvailability.start_minute)
+    ):
+        stored.setdefault(coach_id, []).append((start, end))
+    schedules = select(Coach.id, Coach.availability, Coach.time_zone)
+    stale = [
+        coach_id
+        for coach_id, availability, time_zone in await db.execute(schedules)
+        if normalize_availability(availability, time_zone, now)
+        != stored.get(coach_id, [])
+    ]
+    if not stale:
+        return 0
+
+    # Lock and re-read the stale coaches so a schedule saved meanwhile is
+    # not overwritten with the one read above
+    ids = bindparam("coach_ids", stale, type_=ARRAY(Integer))
+    locked = await db.execute(
+        schedules.where(Coach.id == any_(ids)).with_for_update()
+    )
+    rows = [
+        {"coach_id": coach_id, "start_minute": start, "end_minute": end}
+        for coach_id, availability, time_zone in locked
+        for start, end in normalize_availability(availability, time_zone, now)
+    ]
+    await db.execute(
+        delete(CoachAvailability).where(CoachAvailability.coach_id == any_(ids))
+    )
+    if rows:
+        await db.execute(insert(CoachAvailability), rows)
+    await db.commit()
+    return len(stale)
+
+
+async def get_review_author(
+    db: AsyncSession, user_id: int, coach_id: int
+) -> int:
+    """
+    Athlete id of a user allowed to review a coach: an athlete who has
+    been connected to the coach. Raises ReviewNotAllowed.
+    """
+    athlete_id = await db.scalar(
+        select(Athlete.id).where(Athlete.user_id == user_id)
+    )
+    if athlete_id is None:
+        raise ReviewNotAllowed("Only athletes can review coaches")
+    connected = await db.scalar(
+        select(
+            exists().where(
+                CoachAthleteConnection.coach_id == coach_id,
+                CoachAthleteConnection.athlete_id == athlete_id,
+            )
+        )
+    )
+    if not connected:
+        raise ReviewNotAllowed("You can only review coaches you have worked with")
+    return athlete_id
+
+
+async def save_review(
+    db: AsyncSession,
+    coach_id: int,
+    athlete_id: int,
+    rating: int,
+    comment: Optional[str],
+) -> CoachReview:
+    """Create or replace an athlete's review of a coach"""
+    review = await db.scalar(
+        select(CoachReview).where(
+            CoachReview.coach_id == coach_id,
+            CoachReview.athlete_id == athlete_id,
+        )
+    )
+    if review is None:
+        review = CoachReview(coach_id=coach_id, athlete_id=athlete_id)
+        db.add(review)
+    review.rating = rating
+    review.comment = comment
+    await db.commit()
+    await db.refresh(review)
+    return review
+
+
+async def delete_review(db: AsyncSession, coach_id: int, athlete_id: int) -> bool:
+    """Remove an athlete's review of a coach, False if there was none"""
+    review = await db.scalar(
+        select(CoachReview).where(
+            CoachReview.coach_id == coach_id,
+            CoachReview.athlete_id == athlete_id,
+        )
+    )
+    if review is None:
+        return False
+    await db.delete(review)
+    await db.commit()
+    return True
+
+
+async def list_reviews(
+    db: AsyncSession,
+    coach_id: int,
+    limit: int = settings.COACH_REVIEWS_PAGE_SIZE,
+    before_id: Optional[int] = None,
+) -> CoachReviewPage:
+    """A page of a coach's reviews, newest first"""
+    statement = (
+        select(CoachReview)
+        .where(CoachReview.coach_id == coach_id)
+        .order_by(CoachReview.id.desc())
+        .limit(limit + 1)
+    )
+    if before_id is not None:
+        statement = statement.where(CoachReview.id < before_id)
+    reviews = list((await db.scalars(statement)).all())
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = reviews[-1].id
+    return CoachReviewPage(items=reviews, next_cursor=next_cursor)
+
+
+async def get_rating_summary(
+    db: AsyncSession, coach_id: int
+) -> Optional[CoachRatingSummary]:
+    """A coach's review aggregates, None if there is no such coach"""
+    row = (
+        await db.execute(
+            select(
+                Coach.total_reviews,
+                Coach.average_rating,
+                Coach.bayesian_rating,
+                *(Coach.__table__.c[f"rating_{star}_count"] for star in STARS),
+            ).where(Coach.id == coach_id)
+        )
+    ).first()
+    if row is None:
+        return None
+    return CoachRatingSummary(
+        coach_id=coach_id,
+        total_reviews=row.total_reviews or 0,
+        average_rating=row.average_rating or 0.0,
+        bayesian_rating=(
+            settings.COACH_RATING_PRIOR_MEAN
+            if row.bayesian_rating is None
+            else row.bayesian_rating
+        ),
+        histogram={star: row[3 + index] for index, star in enumerate(STARS)},
+    )
+
+
+async def recompute_coach_ratings(db: AsyncSession) -> int:
+    """
+    Recompute every coach's review aggregates exactly from coach_reviews,
+    correcting drift and applying the current prior; returns how many
+    coaches changed
+    """
+    coaches = Coach.__table__
+    aggregates = (
+        select(
+            CoachReview.coach_id,
+            func.count().label("total"),
+            func.sum(CoachReview.rating).label("rating_sum"),
+            *(
+                func.count().filter(CoachReview.rating == star).label(str(star))
+                for star in STARS
+            ),
+        )
+        .group_by(CoachReview.coach_id)
+        .subquery()
+    )
+
+    def changed(values: dict):
+        return or_(
+            *(
+                coaches.c[name].is_distinct_from(value)
+                for name, value in values.items()
+            )
+        )
+
+    reviewed = {
+        "total_reviews": aggregates.c.total,
+        "rating_sum": aggregates.c.rating_sum,
+        **{
+            f"rating_{star}_count": aggregates.c[str(star)] for star in STARS
+        },
+        **rating_columns(aggregates.c.total, aggregates.c.rating_sum),
+    }
+    result = await db.execute(
+        update(coaches)
+        .where(coaches.c.id == aggregates.c.coach_id, changed(reviewed))
+        .values(**reviewed)
+    )
+    corrected = result.rowcount
+
+    unreviewed = {
+        "total_reviews": 0,
+        "rating_sum": 0,
+        **{f"rating_{star}_count": 0 for star in STARS},
+        "average_rating": 0.0,
+        "bayesian_rating": settings.COACH_RATING_PRIOR_MEAN,
+    }
+    result = await db.execute(
+        update(coaches)
+        .where(
+            ~exists().where(CoachReview.coach_id == coaches.c.id),
+            changed(unreviewed),
+        )
+        .values(**unreviewed)
+    )
+    await db.commit()
+    return corrected + result.rowcount
+
+
+async def get_coach_roster(db: AsyncSession, user_id: int) -> Optional[CoachRoster]:
+    """
+    A coach user's current athletes with their display fields, projected
+    metrics and pending recommendation counts, None if the user has no
+    coach profile. Three queries however large the roster: the coach, the
+    connections joined to athlete and user with the count as a correlated
+    subquery, and one IN query for every athlete's metrics.
+    """
+    coach_id = await db.scalar(select(Coach.id).where(Coach.user_id == user_id))
+    if coach_id is None:
+        return None
+    pending = (
+        select(func.count())
+        .where(
+            Recommendation.athlete_id == CoachAthleteConnection.athlete_id,
+            Recommendation.status == RecommendationStatus.PENDING,
+            Recommendation.is_visible_to_coach.is_(True),
+        )
+        .correlate(CoachAthleteConnection)
+        .scalar_subquery()
+    )
+    athlete = contains_eager(CoachAthleteConnection.athlete)
+    rows = await db.execute(
+        select(CoachAthleteConnection, pending)
+        .join(CoachAthleteConnection.athlete)
+        .join(Athlete.user)
+        .where(
+            CoachAthleteConnection.coach_id == coach_id,
+            CoachAthleteConnection.is_current,
+        )
+        .options(
+            load_only(
+                CoachAthleteConnection.connection_type,
+                CoachAthleteConnection.start_date,
+                CoachAthleteConnection.sessions_completed,
+            ),
+            athlete.load_only(
+                Athlete.user_id,
+                Athlete.primary_sport,
+                Athlete.primary_position,
+                Athlete.experience_level,
+                Athlete.recovery_status,
+            ),
+            athlete.contains_eager(Athlete.user).load_only(
+                User.username,
+                User.first_name,
+                User.last_name,
+                User.profile_picture,
+            ),
+            athlete.selectinload(Athlete.metrics),
+        )
+        .order_by(
+            CoachAthleteConnection.start_date.desc(), CoachAthleteConnection.id
+        )
+    )
+    items = []
+    for connection, pending_recommendations in rows:
+        profile, user = connection.athlete, connection.athlete.user
+        items.append(
+            RosterAthlete(
+                connection_id=connection.id,
+                athlete_id=profile.id,
+                user_id=profile.user_id,
+                username=user.username,
+                full_name=user.display_name,
+                profile_picture=user.profile_picture,
+                primary_sport=profile.primary_sport,
+                primary_position=profile.primary_position,
+                experience_level=profile.experience_level,
+                recovery_status=profile.recovery_status,
+                connection_type=connection.connection_type,
+                start_date=connection.start_date,
+                sessions_completed=connection.sessions_completed or 0,
+                metrics=[
+                    RosterMetric(
+                        metric=metric.metric,
+                        value=metric.value,
+                        unit=getattr(
+                            get_metric(metric.sport, metric.metric), "unit", None
+                        ),
+                    )
+                    for metric in profile.metrics
+                ],
+                pending_recommendations=pending_recommendations,
+            )
+        )
+    return CoachRoster(coach_id=coach_id, items=items)
@@ -0,0 +1,363 @@
+"""
+Cohort percentiles and z-scores of athlete metrics
+
+A cohort is the active athletes sharing a sport, a position and optionally
+an age band. Its registered metrics (see app.models.athlete_metric) are
+loaded from the athlete_metrics projection in one query and pivoted into
+an athletes x metrics NumPy matrix, from which every member's percentile
+and z-score on every metric is computed in vectorized form. Cohorts are
+cached in process, so ranking a member is an array lookup.
+
+Committing a change to an athlete's sport, position, birth date or metric
+blobs drops that sport and position's cohorts from this worker's cache;
+other workers pick the change up within COHORT_CACHE_TTL seconds.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.athlete import Athlete, AthletePosition, Sport
+from app.models.athlete_metric import METRIC_REGISTRY, AthleteMetric
+from app.models.user import User
+from app.schemas.athlete import AthleteCohortRanking, CohortMetricRank
+
+# (label, minimum age, maximum age exclusive)
+AGE_BANDS: Tuple[Tuple[str, int, int], ...] = (
+    ("u12", 0, 12),
+    ("12-14", 12, 15),
+    ("15-17", 15, 18),
+    ("18-22", 18, 23),
+    ("23-29", 23, 30),
+    ("30-39", 30, 40),
+    ("40+", 40, 200),
+)
+
+# (sport, position, age band label or None for every age)
+CohortKey = Tuple[Sport, AthletePosition, Optional[str]]
+
+# Writes to these Athlete attributes can move athletes between cohorts
+# or change their metrics
+_COHORT_ATTRIBUTES = (
+    "primary_sport",
+    "primary_position",
+    "date_of_birth",
+    "fitness_metrics",
+    "skill_metrics",
+    "game_stats",
+)
+_PENDING_KEY = "cohort_invalidations"
+
+
+def _age(date_of_birth: date, today: date) -> int:
+    before_birthday = (today.month, today.day) < (
+        date_of_birth.month,
+        date_of_birth.day,
+    )
+    return today.year - date_of_birth.year - before_birthday
+
+
+def age_band(
+    date_of_birth: Optional[date], today: Optional[date] = None
+) -> Optional[str]:
+    """Label of the age band for a birth date, None if unknown"""
+    if date_of_birth is None:
+        return None
+    age = _age(date_of_birth, today or date.today())
+    for label, low, high in AGE_BANDS:
+        if low <= age < high:
+            return label
+    return None
+
+
+def _column_ranks(
+    column: np.ndarray, higher_is_better: bool
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sorted values, percentiles and z-scores of one metric column"""
+    present = column[~np.isnan(column)]
+    ordered = np.sort(present)
+    percentiles = np.full(column.shape, np.nan)
+    z_scores = np.full(column.shape, np.nan)
+    if ordered.size:
+        mask = ~np.isnan(column)
+        below = np.searchsorted(ordered, column[mask], side="left")
+        upto = np.searchsorted(ordered, column[mask], side="right")
+        # Mid-rank: ties share the average of the ranks they span
+        ranks = (below + upto) / 2 / ordered.size * 100
+        percentiles[mask] = ranks if higher_is_better else 100 - ranks
+        std = present.std()
+        deviation = column[mask] - present.mean()
+        z = deviation / std if std > 0 else np.zeros_like(deviation)
+        z_scores[mask] = z if higher_is_better else -z
+    return ordered, percentiles, z_scores
+
+
+@dataclass
+class Cohort:
+    """
+    Metric matrix of one cohort with precomputed ranks of its members
+
+    Percentiles are the share of the cohort a value beats, 0-100, and
+    z-scores are oriented so that positive is better, for lower-is-better
+    metrics too. NaN marks a metric a member has no value for.
+    """
+
+    key: CohortKey
+    metrics: List[str]
+    higher_is_better: np.ndarray  # (metrics,) bool
+    athlete_ids: np.ndarray  # (athletes,) int64
+    values: np.ndarray  # (athletes, metrics) float64
+    percentiles: np.ndarray  # (athletes, metrics) float64
+    z_scores: np.ndarray  # (athletes, metrics) float64
+    sorted_values: List[np.ndarray]  # present values of each metric
+    row_of: Dict[int, int]
+
+    @classmethod
+    def build(
+        cls,
+        key: CohortKey,
+        athlete_ids: np.ndarray,
+        metric_names: np.ndarray,
+        values: np.ndarray,
+    ) -> "Cohort":
+        """Pivot (athlete_id, metric, value) columns into a cohort"""
+        definitions = METRIC_REGISTRY.get(key[0], ())
+        metrics = [metric.name for metric in definitions]
+        higher_is_better = np.array(
+            [metric.higher_is_better for metric in definitions], dtype=bool
+        )
+        column_of = {name: position for position, name in enumerate(metrics)}
+        columns = np.array(
+            [column_of.get(name, -1) for name in metric_names], dtype=np.int64
+        )
+        known = columns >= 0
+        ids, rows = np.unique(athlete_ids[known], return_inverse=True)
+        matrix = np.full((ids.size, len(metrics)), np.nan)
+        matrix[rows, columns[known]] = values[known]
+
+        percentiles = np.full(matrix.shape, np.nan)
+        z_scores = np.full(matrix.shape, np.nan)
+        sorted_values = []
+        for column in range(len(metrics)):
+            ordered, column_percentiles, column_z_scores = _column_ranks(
+                matrix[:, column], bool(higher_is_better[column])
+            )
+            percentiles[:, column] = column_percentiles
+            z_scores[:, column] = column_z_scores
+            sorted_values.append(ordered)
+
+        return cls(
+            key=key,
+            metrics=metrics,
+            higher_is_better=higher_is_better,
+            athlete_ids=ids,
+            values=matrix,
+            percentiles=percentiles,
+            z_scores=z_scores,
+            sorted_values=sorted_values,
+            row_of={int(athlete_id): row for row, athlete_id in enumerate(ids)},
+        )
+
+    @property
+    def size(self) -> int:
+        return int(self.athlete_ids.size)
+
+    def counts(self) -> np.ndarray:
+        """Members with a value, per metric"""
+        return np.array([ordered.size for ordered in self.sorted_values])
+
+    def member(self, athlete_id: int) -> Optional[int]:
+        """Matrix row of a cohort member, None if not a member"""
+        return self.row_of.get(athlete_id)
+
+    def percentile_of(self, metric: str, value: float) -> Optional[float]:
+        """Percentile an arbitrary value would have in this cohort"""
+        try:
+            column = self.metrics.index(metric)
+        except ValueError:
+            return None
+        ordered = self.sorted_values[column]
+        if not ordered.size:
+            return None
+        below = np.searchsorted(ordered, value, side="left")
+        upto = np.searchsorted(ordered, value, side="right")
+        rank = float((below + upto) / 2 / ordered.size * 100)
+        return rank if self.higher_is_better[column] else 100 - rank
+
+
+class CohortCache:
+    """
+    Per-worker cache of cohorts, loaded on demand from athlete_metrics
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cohorts: TTLCache[Cohort] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, db: AsyncSession, key: CohortKey) -> Cohort:
+        """The cohort for key, loading it on a miss"""
+        cohort = self._cohorts.get(key)
+        if cohort is None:
+            cohort = await self.load(db, key)
+            self._cohorts.set(key, cohort)
+        return cohort
+
+    async def load(self, db: AsyncSession, key: CohortKey) -> Cohort:
+        """Read a cohort's metrics in one query and build its arrays"""
+        sport, position, band = key
+        statement = (
+            select(
+                AthleteMetric.athlete_id,
+                AthleteMetric.metric,
+                AthleteMetric.value,
+            )
+            .join(Athlete, Athlete.id == AthleteMetric.athlete_id)
+            .join(User, User.id == Athlete.user_id)
+            .where(
+                AthleteMetric.sport == sport,
+                Athlete.primary_position == position,
+                User.is_active.is_(True),
+            )
+        )
+        if band is not None:
+            # Age band as a birth date range, so no per-row age computation
+            low, high = next(
+                (low, high) for label, low, high in AGE_BANDS if label == band
+            )
+            statement = statement.where(Athlete.age_between(low, high - 1))
+        rows = (await db.execute(statement)).all()
+        count = len(rows)
+        return Cohort.build(
+            key,
+            np.fromiter((row[0] for row in rows), np.int64, count=count),
+            np.array([row[1] for row in rows], dtype=object),
+            np.fromiter((row[2] for row in rows), np.float64, count=count),
+        )
+
+    def invalidate(self, sport: Sport, position: AthletePosition) -> None:
+        """Drop every cached age band of a sport and position"""
+        for band in (None, *(label for label, _, _ in AGE_BANDS)):
+            self._cohorts.pop((sport, position, band))
+
+    def clear(self) -> None:
+        """Drop every cached cohort"""
+        self._cohorts.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters of the cohort cache"""
+        return self._cohorts.stats()
+
+
+cohort_cache = CohortCache(
+    maxsize=settings.COHORT_CACHE_SIZE, ttl=settings.COHORT_CACHE_TTL
+)
+
+
+async def rank_athlete(
+    db: AsyncSession, athlete_id: int, by_age: bool = True
+) -> Optional[AthleteCohortRanking]:
+    """
+    Percentiles and z-scores of an athlete within their sport, position
+    and (when by_age and the birth date is known) age band; None if there
+    is no such athlete
+    """
+    athlete = (
+        await db.execute(
+            select(
+                Athlete.primary_sport,
+                Athlete.primary_position,
+                Athlete.date_of_birth,
+            ).where(Athlete.id == athlete_id)
+        )
+    ).first()
+    if athlete is None:
+        return None
+
+    band = age_band(athlete.date_of_birth) if by_age else None
+    sport = Sport(athlete.primary_sport)
+    position = AthletePosition(athlete.primary_position)
+    cohort = await cohort_cache.get(db, (sport, position, band))
+    row = cohort.member(athlete_id)
+    counts = cohort.counts()
+    units = {metric.name: metric.unit for metric in METRIC_REGISTRY.get(sport, ())}
+
+    def number(matrix: np.ndarray, column: int) -> Optional[float]:
+        if row is None or np.isnan(matrix[row, column]):
+            return None
+        return float(matrix[row, column])
+
+    return AthleteCohortRanking(
+        athlete_id=athlete_id,
+        sport=sport,
+        primary_position=position,
+        age_band=band,
+        cohort_size=cohort.size,
+        metrics=[
+            CohortMetricRank(
+                metric=metric,
+                unit=units[metric],
+                higher_is_better=bool(cohort.higher_is_better[column]),
+                value=number(cohort.values, column),
+                percentile=number(cohort.percentiles, column),
+                z_score=number(cohort.z_scores, column),
+                cohort_count=int(counts[column]),
+            )
+            for column, metric in enumerate(cohort.metrics)
+        ],
+    )
+
+
+def _record_affected_cohorts(target: Athlete, changed_only: bool) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    state = inspect(target)
+    sports: Set[Any] = {target.primary_sport}
+    positions: Set[Any] = {target.primary_position}
+    if changed_only:
+        if not any(
+            state.attrs[name].history.has_changes()
+            for name in _COHORT_ATTRIBUTES
+        ):
+            return
+        # A moved athlete leaves its previous cohorts too
+        sports.update(state.attrs.primary_sport.history.deleted)
+        positions.update(state.attrs.primary_position.history.deleted)
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    pending.update(
+        (Sport(sport), AthletePosition(position))
+        for sport in sports
+        for position in positions
+        if sport is not None and position is not None
+    )
+
+
+@event.listens_for(Athlete, "after_insert")
+def _athlete_inserted(mapper: Any, connection: Any, target: Athlete) -> None:
+    _record_affected_cohorts(target, changed_only=False)
+
+
+@event.listens_for(Athlete, "after_update")
+def _athlete_updated(mapper: Any, connection: Any, target: Athlete) -> None:
+    _record_affected_cohorts(target, changed_only=True)
+
+
+@event.listens_for(Athlete, "after_delete")
+def _athlete_deleted(mapper: Any, connection: Any, target: Athlete) -> None:
+    _record_affected_cohorts(target, changed_only=False)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_cohorts(session: Session) -> None:
+    for sport, position in session.info.pop(_PENDING_KEY, ()):
+        cohort_cache.invalidate(sport, position)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_cohorts(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
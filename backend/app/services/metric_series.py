@@ -0,0 +1,128 @@
+"""
+Athlete metric time series: batched ingest and columnar window reads
+
+Samples are written with one multi-row upsert per batch, after making sure
+the monthly partitions they fall into exist. Windows are read back as two
+NumPy arrays (datetime64[us] timestamps and float64 values) so trend and
+progress code works on compact columns instead of ORM objects.
+"""
+from datetime import datetime, timezone
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_engine
+from app.models.athlete_metric_sample import (
+    TABLE_NAME,
+    AthleteMetricSample,
+    month_start,
+    partition_ddl,
+)
+from app.schemas.athlete import MetricSampleIn
+
+# Months whose partition this process has already created or seen
+_known_partitions: Set[datetime] = set()
+
+
+class MetricWindow(NamedTuple):
+    """A metric's samples in time order, as parallel arrays"""
+
+    timestamps: np.ndarray  # datetime64[us], UTC
+    values: np.ndarray  # float64
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+async def ensure_partitions(timestamps: Iterable[datetime]) -> None:
+    """Create the monthly partitions covering the given timestamps"""
+    missing = {month_start(_utc(ts)) for ts in timestamps} - _known_partitions
+    if not missing:
+        return
+    # Own short transaction: creating a partition locks the parent table,
+    # which must not be held for the rest of the caller's transaction
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            select(func.pg_advisory_xact_lock(func.hashtext(TABLE_NAME)))
+        )
+        for month in sorted(missing):
+            await conn.execute(text(partition_ddl(month)))
+    _known_partitions.update(missing)
+
+
+async def ingest_samples(
+    db: AsyncSession, athlete_id: int, samples: List[MetricSampleIn]
+) -> int:
+    """
+    Append samples for an athlete; a repeated (metric, ts) overwrites the
+    earlier value. Returns the number of samples written.
+    """
+    if not samples:
+        return 0
+    await ensure_partitions(sample.ts for sample in samples)
+
+    # Last value wins within the batch too, ON CONFLICT rejects duplicates
+    rows = {
+        (sample.metric, _utc(sample.ts)): sample.value for sample in samples
+    }
+    statement = insert(AthleteMetricSample)
+    statement = statement.on_conflict_do_update(
+        index_elements=["athlete_id", "metric", "ts"],
+        set_={"value": statement.excluded.value},
+    )
+    await db.execute(
+        statement,
+        [
+            {"athlete_id": athlete_id, "metric": metric, "ts": ts, "value": value}
+            for (metric, ts), value in rows.items()
+        ],
+    )
+    await db.commit()
+    return len(rows)
+
+
+async def get_metric_window(
+    db: AsyncSession,
+    athlete_id: int,
+    metric: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> MetricWindow:
+    """
+    Samples of one athlete metric with start <= ts < end, oldest first;
+    with a limit, the most recent `limit` samples of the window
+    """
+    # Microseconds since the epoch, so the column loads straight into int64
+    epoch_us = cast(
+        func.extract("epoch", AthleteMetricSample.ts) * 1_000_000, BigInteger
+    )
+    statement = select(epoch_us, AthleteMetricSample.value).where(
+        AthleteMetricSample.athlete_id == athlete_id,
+        AthleteMetricSample.metric == metric,
+    )
+    if start is not None:
+        statement = statement.where(AthleteMetricSample.ts >= _utc(start))
+    if end is not None:
+        statement = statement.where(AthleteMetricSample.ts < _utc(end))
+    if limit is not None:
+        statement = statement.order_by(AthleteMetricSample.ts.desc()).limit(
+            limit
+        )
+    else:
+        statement = statement.order_by(AthleteMetricSample.ts)
+
+    rows = (await db.execute(statement)).all()
+    if limit is not None:
+        rows.reverse()
+    timestamps = np.fromiter(
+        (row[0] for row in rows), dtype=np.int64, count=len(rows)
+    ).view("datetime64[us]")
+    values = np.fromiter(
+        (row[1] for row in rows), dtype=np.float64, count=len(rows)
+    )
+    return MetricWindow(timestamps, values)
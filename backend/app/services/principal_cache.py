@@ -0,0 +1,259 @@
+"""
+Two-tier cache of authenticated principals
+
+Authorization checks only need a handful of flags about the caller, so
+instead of loading the full User row on every request we cache a slim,
+immutable Principal in process (L1) and in Redis (L2). Writes that change
+those flags invalidate both tiers; other workers' L1 entries expire after
+PRINCIPAL_CACHE_L1_TTL seconds.
+
+Invalidation is authoritative for L2: it bumps a per-user generation in
+Redis, and an L2 entry only counts while it carries the current
+generation. A miss fills L2 with a check-and-set against the generation it
+read, so a principal loaded before an invalidation is never cached after
+it. Invalidations that cannot reach Redis are queued and retried; until
+they go through this worker bypasses L2 for those users.
+"""
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+from redis import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import (
+    get_async_redis,
+    get_redis,
+    mark_redis_failure,
+    redis_available,
+)
+from app.core.routing import primary_reads
+from app.models.user import User, UserType
+
+logger = logging.getLogger(__name__)
+
+# KEYS: principal, generation. ARGV: cached value, the generation it was
+# read under, TTL. Caches nothing if the user was invalidated since.
+_CACHE_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+-- Outlive every entry stamped with this generation
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authorization-relevant view of an authenticated user"""
+
+    id: int
+    user_type: UserType
+    is_active: bool
+    is_verified: bool
+    is_premium: bool
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw: bytes) -> "Principal":
+        data = json.loads(raw)
+        data["user_type"] = UserType(data["user_type"])
+        return cls(**data)
+
+
+_l1: TTLCache[Principal] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_L1_TTL,
+)
+_lock = threading.Lock()
+# Users whose L2 invalidation has not reached Redis yet, by the value of
+# _invalidations when they were last invalidated
+_pending: Dict[int, int] = {}
+# Bumped by every invalidation in this process, guards L1 fills
+_invalidations = 0
+_script = None
+
+
+def _redis_key(user_id: int) -> str:
+    return f"principal:{user_id}"
+
+
+def _generation_key(user_id: int) -> str:
+    return f"principal_generation:{user_id}"
+
+
+def _cache_script():
+    global _script
+    if _script is None:
+        _script = get_async_redis().register_script(_CACHE_SCRIPT)
+    return _script
+
+
+def _decode(raw: Optional[bytes], generation: bytes) -> Optional[Principal]:
+    # L2 values are "<generation>:<principal json>"
+    if raw is None:
+        return None
+    stamp, _, payload = raw.partition(b":")
+    if stamp != generation:
+        return None
+    return Principal.from_json(payload)
+
+
+def _start_invalidation(user_id: int) -> None:
+    global _invalidations
+    _l1.pop(user_id)
+    with _lock:
+        _invalidations += 1
+        _pending[user_id] = _invalidations
+
+
+def _take_pending() -> Dict[int, int]:
+    with _lock:
+        return dict(_pending)
+
+
+def _finish_invalidations(user_ids: Dict[int, int]) -> None:
+    # Keep users invalidated again while the flush was in flight
+    with _lock:
+        for user_id, invalidation in user_ids.items():
+            if _pending.get(user_id) == invalidation:
+                del _pending[user_id]
+
+
+def _queue_invalidations(pipe, user_ids: Dict[int, int]) -> None:
+    for user_id in user_ids:
+        pipe.incr(_generation_key(user_id))
+        pipe.expire(_generation_key(user_id), settings.PRINCIPAL_CACHE_L2_TTL)
+        pipe.delete(_redis_key(user_id))
+
+
+def _flush_invalidations() -> None:
+    user_ids = _take_pending()
+    if not user_ids or not redis_available():
+        return
+    try:
+        with get_redis().pipeline(transaction=True) as pipe:
+            _queue_invalidations(pipe, user_ids)
+            pipe.execute()
+    except RedisError as exc:
+        mark_redis_failure(exc)
+        logger.warning("Queued %d principal invalidations", len(user_ids))
+        return
+    _finish_invalidations(user_ids)
+
+
+async def _aflush_invalidations() -> None:
+    user_ids = _take_pending()
+    if not user_ids or not redis_available():
+        return
+    try:
+        async with get_async_redis().pipeline(transaction=True) as pipe:
+            _queue_invalidations(pipe, user_ids)
+            await pipe.execute()
+    except RedisError as exc:
+        mark_redis_failure(exc)
+        logger.warning("Queued %d principal invalidations", len(user_ids))
+        return
+    _finish_invalidations(user_ids)
+
+
+async def _read_l2(user_id: int) -> Tuple[Optional[Principal], Optional[bytes]]:
+    # Returns the cached principal and the generation to fill L2 under
+    await _aflush_invalidations()
+    if not redis_available() or user_id in _pending:
+        return None, None
+    try:
+        raw, generation = await get_async_redis().mget(
+            _redis_key(user_id), _generation_key(user_id)
+        )
+    except RedisError as exc:
+        mark_redis_failure(exc)
+        return None, None
+    generation = generation or b"0"
+    return _decode(raw, generation), generation
+
+
+async def get_principal(db: AsyncSession, user_id: int) -> Optional[Principal]:
+    """
+    Get the principal for user_id from L1, then Redis, then the database
+    """
+    principal = _l1.get(user_id)
+    if principal is not None:
+        return principal
+
+    principal, generation = await _read_l2(user_id)
+    if principal is not None:
+        _l1.set(user_id, principal)
+        return principal
+
+    invalidations = _invalidations
+    # Read misses from the primary: a replica lagging behind an
+    # invalidation would otherwise be cached for the whole L2 TTL
+    with primary_reads(db):
+        result = await db.execute(
+            select(
+                User.id,
+                User.user_type,
+                User.is_active,
+                User.is_verified,
+                User.is_premium,
+            ).where(User.id == user_id)
+        )
+    row = result.first()
+    if row is None:
+        return None
+
+    principal = Principal(
+        id=row.id,
+        user_type=UserType(row.user_type),
+        is_active=bool(row.is_active),
+        is_verified=bool(row.is_verified),
+        is_premium=bool(row.is_premium),
+    )
+    if invalidations == _invalidations:
+        _l1.set(user_id, principal)
+    if generation is not None:
+        try:
+            await _cache_script()(
+                keys=[_redis_key(user_id), _generation_key(user_id)],
+                args=[
+                    generation + b":" + principal.to_json().encode(),
+                    generation,
+                    settings.PRINCIPAL_CACHE_L2_TTL,
+                ],
+            )
+        except RedisError as exc:
+            mark_redis_failure(exc)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    Drop a cached principal after a write (sync callers)
+    """
+    _start_invalidation(user_id)
+    _flush_invalidations()
+
+
+async def ainvalidate_principal(user_id: int) -> None:
+    """
+    Drop a cached principal after a write (async callers)
+    """
+    _start_invalidation(user_id)
+    await _aflush_invalidations()
+
+
+def get_principal_cache_stats() -> dict:
+    """
+    Hit/miss counters of the in-process principal cache
+    """
+    return {**_l1.stats(), "pending_invalidations": len(_pending)}
@@ -0,0 +1,71 @@
+"""
+Request-scoped batched user lookups
+
+Rendering lists of posts, comments, members or rosters needs the author or
+member row for every item. UserLoader collects those lookups and resolves
+them with one IN query per batch, and keeps every user it has seen in a
+per-request identity map, so asking for the same user again (by ID or by
+username) does not touch the database.
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dataloader import DataLoader
+from app.models.user import User
+from app.services.async_user_service import (
+    get_users_by_ids,
+    get_users_by_usernames,
+)
+
+
+class UserLoader:
+    """
+    Batches user lookups by ID and username for one request
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        lock = asyncio.Lock()
+        self.by_id: DataLoader[int, User] = DataLoader(self._load_ids, lock)
+        self.by_username: DataLoader[str, User] = DataLoader(
+            self._load_usernames, lock
+        )
+
+    def _remember(self, users: List[User]) -> None:
+        for user in users:
+            self.by_id.prime(user.id, user)
+            self.by_username.prime(user.username, user)
+
+    async def _load_ids(self, user_ids: List[int]) -> Dict[int, User]:
+        users = await get_users_by_ids(self.db, user_ids)
+        self._remember(users)
+        return {user.id: user for user in users}
+
+    async def _load_usernames(self, usernames: List[str]) -> Dict[str, User]:
+        users = await get_users_by_usernames(self.db, usernames)
+        self._remember(users)
+        return {user.username: user for user in users}
+
+    async def load(self, user_id: int) -> Optional[User]:
+        """Get a user by ID"""
+        return await self.by_id.load(user_id)
+
+    async def load_many(self, user_ids: Iterable[int]) -> List[Optional[User]]:
+        """Get users by ID, in order, None for missing IDs"""
+        return await self.by_id.load_many(user_ids)
+
+    async def load_by_username(self, username: str) -> Optional[User]:
+        """Get a user by username"""
+        return await self.by_username.load(username)
+
+    async def load_many_by_usernames(
+        self, usernames: Iterable[str]
+    ) -> List[Optional[User]]:
+        """Get users by username, in order, None for missing names"""
+        return await self.by_username.load_many(usernames)
+
+    def prime(self, user: User) -> None:
+        """Add a user loaded elsewhere in the request to the identity map"""
+        self._remember([user])
@@ -0,0 +1,241 @@
+"""
+User search for autocomplete and people lookup
+
+Prefix queries, the bulk of autocomplete traffic, are answered from a warm
+in-memory cache: a sorted array of lowercased usernames, full names and
+last names of the most recently seen active users, searched with bisect.
+Everything else goes to Postgres, where lower(username) has a btree
+pattern index for short prefixes and both search keys have pg_trgm GIN
+indexes for substring and typo-tolerant (similarity) matches.
+
+The cache is rebuilt every USER_SEARCH_CACHE_REFRESH seconds, which bounds
+how long a renamed or deactivated user can still show up from it.
+"""
+import asyncio
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import (
+    User,
+    UserType,
+    full_name_search_key,
+    username_search_key,
+)
+from app.schemas.user import UserSearch
+
+logger = logging.getLogger(__name__)
+
+# pg_trgm extracts no useful trigrams from shorter input
+MIN_FUZZY_LENGTH = 3
+
+# (sorted keys, user id per key, results by id, holds every active user)
+_Index = Tuple[List[str], List[int], Dict[int, UserSearch], bool]
+
+_SEARCH_COLUMNS = (
+    User.id,
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.user_type,
+    User.profile_picture,
+    User.is_verified,
+)
+
+
+def _to_result(row: Any) -> UserSearch:
+    return UserSearch(
+        id=row.id,
+        username=row.username,
+        full_name=f"{row.first_name} {row.last_name}",
+        user_type=UserType(row.user_type),
+        profile_picture=row.profile_picture,
+        is_verified=bool(row.is_verified),
+    )
+
+
+def _escape_like(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+
+
+class PrefixCache:
+    """
+    Sorted-array prefix index over the most recently seen active users
+    """
+
+    def __init__(self, max_users: int, refresh_interval: float):
+        self.max_users = max_users
+        self.refresh_interval = refresh_interval
+        self.hits = 0
+        self.misses = 0
+        self._index: _Index = ([], [], {}, False)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def complete(self) -> bool:
+        """True when every active user fits in the cache"""
+        return self._index[3]
+
+    def build(self, rows: Sequence[Any], complete: bool) -> None:
+        """Replace the index with the given user rows"""
+        users: Dict[int, UserSearch] = {}
+        entries: List[Tuple[str, int]] = []
+        for row in rows:
+            user = _to_result(row)
+            users[user.id] = user
+            entries.append((user.username.lower(), user.id))
+            entries.append((user.full_name.lower(), user.id))
+            entries.append((str(row.last_name).lower(), user.id))
+        entries.sort()
+        # Swapped in one assignment, readers never see a partial index
+        self._index = (
+            [key for key, _ in entries],
+            [user_id for _, user_id in entries],
+            users,
+            complete,
+        )
+
+    def lookup(
+        self, prefix: str, limit: int, user_type: Optional[UserType] = None
+    ) -> List[UserSearch]:
+        """Users with a search key starting with prefix, in key order"""
+        keys, ids, users, _ = self._index
+        results: List[UserSearch] = []
+        seen = set()
+        position = bisect_left(keys, prefix)
+        while (
+            position < len(keys)
+            and len(results) < limit
+            and keys[position].startswith(prefix)
+        ):
+            user_id = ids[position]
+            position += 1
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            user = users[user_id]
+            if user_type is None or user.user_type == user_type:
+                results.append(user)
+        return results
+
+    async def refresh(self) -> int:
+        """Reload the cache from the database, returns users loaded"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(*_SEARCH_COLUMNS)
+                .where(User.is_active.is_(True))
+                .order_by(User.last_seen.desc().nulls_last())
+                .limit(self.max_users + 1)
+            )
+            rows = result.all()
+        complete = len(rows) <= self.max_users
+        # Sorting a large index would stall the event loop
+        await asyncio.to_thread(self.build, rows[: self.max_users], complete)
+        return min(len(rows), self.max_users)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh the user search cache")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start the periodic refresh task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic refresh task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Index size and how many searches it answered"""
+        keys, _, users, complete = self._index
+        searches = self.hits + self.misses
+        return {
+            "users": len(users),
+            "keys": len(keys),
+            "complete": complete,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / searches if searches else 0.0,
+        }
+
+
+search_cache = PrefixCache(
+    max_users=settings.USER_SEARCH_CACHE_SIZE,
+    refresh_interval=settings.USER_SEARCH_CACHE_REFRESH,
+)
+
+
+async def search_users(
+    db: AsyncSession,
+    query: str,
+    limit: int = 20,
+    user_type: Optional[UserType] = None,
+) -> List[UserSearch]:
+    """
+    Search active users by username or name prefix, substring or
+    approximate match
+    """
+    term = " ".join(query.lower().split())
+    if not term:
+        return []
+
+    cached = search_cache.lookup(term, limit, user_type)
+    # A full page of prefix matches, or nothing more the database could add
+    if len(cached) >= limit or (
+        search_cache.complete and len(term) < MIN_FUZZY_LENGTH
+    ):
+        search_cache.hits += 1
+        return cached
+    search_cache.misses += 1
+
+    escaped = _escape_like(term)
+    username_prefix = username_search_key.like(f"{escaped}%", escape="\\")
+    if len(term) < MIN_FUZZY_LENGTH:
+        matches = or_(
+            username_prefix,
+            full_name_search_key.like(f"{escaped}%", escape="\\"),
+        )
+    else:
+        matches = or_(
+            username_prefix,
+            full_name_search_key.like(f"%{escaped}%", escape="\\"),
+            username_search_key.op("%")(term),
+            full_name_search_key.op("%")(term),
+        )
+
+    statement = (
+        select(*_SEARCH_COLUMNS)
+        .where(User.is_active.is_(True), matches)
+        .order_by(
+            username_prefix.desc(),
+            func.greatest(
+                func.similarity(username_search_key, term),
+                func.similarity(full_name_search_key, term),
+            ).desc(),
+            User.username,
+        )
+        .limit(limit)
+    )
+    if user_type is not None:
+        statement = statement.where(User.user_type == user_type)
+
+    result = await db.execute(statement)
+    return [_to_result(row) for row in result.all()]
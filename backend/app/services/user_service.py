@@ -1,13 +1,28 @@
 """
 User service for database operations
 """
-from typing import Optional
+from typing import Any, Iterable, List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, literal, select, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
 
-from app.core.security import get_password_hash, verify_password
+from app.core.routing import primary_reads
+from app.core.security import get_password_hash, verify_and_update_password
 from app.models.user import User, UserType
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.principal_cache import invalidate_principal
+
+# Keys per IN (...) list, well below the driver's bind parameter limit
+IN_CHUNK_SIZE = 1000
+
+
+class UserAlreadyExists(Exception):
+    """Raised when a new user's email or username is already taken"""
+
+    def __init__(self, field: str):
+        super().__init__(f"User with this {field} already exists")
+        self.field = field
 
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
@@ -25,24 +40,87 @@ def get_user_by_username(db: Session, username: str) -> Optional[User]:
     return db.query(User).filter(User.username == username).first()
 
 
+def get_users_by_ids(db: Session, user_ids: Iterable[int]) -> List[User]:
+    """Get the users with the given IDs in one IN query (missing IDs skipped)"""
+    ids = list(dict.fromkeys(user_ids))
+    users: List[User] = []
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start : start + IN_CHUNK_SIZE]
+        users.extend(db.query(User).filter(User.id.in_(chunk)).all())
+    return users
+
+
+def get_users_by_usernames(db: Session, usernames: Iterable[str]) -> List[User]:
+    """Get the users with the given usernames in one IN query"""
+    names = list(dict.fromkeys(usernames))
+    users: List[User] = []
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start : start + IN_CHUNK_SIZE]
+        users.extend(db.query(User).filter(User.username.in_(chunk)).all())
+    return users
+
+
+def create_user_statement(user_create: Any, hashed_password: str) -> Select:
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING of a new user, selected with
+    whether its email and username were already taken. The row is None
+    when the insert was skipped.
+    """
+    inserted = (
+        insert(User)
+        .values(
+            email=user_create.email,
+            username=user_create.username,
+            hashed_password=hashed_password,
+            first_name=user_create.first_name,
+            last_name=user_create.last_name,
+            user_type=user_create.user_type,
+            phone_number=user_create.phone_number,
+            bio=getattr(user_create, "bio", None),  # UserRegister has no bio
+        )
+        .on_conflict_do_nothing()
+        .returning(*User.__table__.c)
+        .cte("inserted")
+    )
+    # The EXISTS checks run against the snapshot before the insert, so
+    # they are only true when the row was skipped because of that key
+    email_taken = (
+        select(User.id).where(User.email == user_create.email).exists()
+    )
+    username_taken = (
+        select(User.id).where(User.username == user_create.username).exists()
+    )
+    probe = select(literal(1).label("one")).subquery("probe")
+    return (
+        select(
+            aliased(User, inserted),
+            email_taken.label("email_taken"),
+            username_taken.label("username_taken"),
+        )
+        .select_from(probe)
+        .outerjoin(inserted, true())
+    )
+
+
 def create_user(db: Session, user_create: UserCreate) -> User:
-    """Create a new user"""
+    """
+    Create a new user in one INSERT ... ON CONFLICT DO NOTHING round trip,
+    raising UserAlreadyExists with the clashing field
+    """
     hashed_password = get_password_hash(user_create.password)
+    statement = create_user_statement(user_create, hashed_password)
+
+    with primary_reads(db):
+        db_user, email_clash, username_clash = db.execute(statement).one()
+        if db_user is None:
+            db.rollback()
+            if not (email_clash or username_clash):
+                # Lost a race with a sign-up that committed after our
+                # snapshot was taken, look again to name the field
+                email_clash = get_user_by_email(db, user_create.email)
+            raise UserAlreadyExists("email" if email_clash else "username")
 
-    db_user = User(
-        email=user_create.email,
-        username=user_create.username,
-        hashed_password=hashed_password,
-        first_name=user_create.first_name,
-        last_name=user_create.last_name,
-        user_type=user_create.user_type,
-        phone_number=user_create.phone_number,
-        bio=user_create.bio,
-    )
-
-    db.add(db_user)
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 
@@ -67,6 +145,7 @@ def update_user(
 
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(user_id)
     return db_user
 
 
@@ -77,8 +156,15 @@ def authenticate_user(
     user = get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, str(user.hashed_password)):
+    verified, new_hash = verify_and_update_password(
+        password, str(user.hashed_password)
+    )
+    if not verified:
         return None
+    if new_hash:
+        # Stored hash predates the current cost settings, upgrade it
+        setattr(user, "hashed_password", new_hash)
+        db.commit()
     return user
 
 
@@ -96,6 +182,7 @@ def verify_user_email(db: Session, user_id: int) -> Optional[User]:
 
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(user_id)
     return db_user
 
 
@@ -113,6 +200,7 @@ def update_user_password(
 
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(user_id)
     return db_user
 
 
@@ -125,6 +213,7 @@ def deactivate_user(db: Session, user_id: int) -> Optional[User]:
     setattr(db_user, "is_active", False)
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(user_id)
     return db_user
 
 
@@ -137,4 +226,5 @@ def activate_user(db: Session, user_id: int) -> Optional[User]:
     setattr(db_user, "is_active", True)
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(user_id)
     return db_user
@@ -0,0 +1,125 @@
+"""
+Benchmark: sync vs async session paths for /auth/me under concurrent load
+
+Requires the configured PostgreSQL database to be reachable. A benchmark
+user is created on first run.
+
+    poetry run python -m benchmarks.auth_me --requests 2000 --concurrency 50 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, List
+
+import httpx
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, security
+from app.core.database import Base, SessionLocal, async_engine, engine
+from app.core.security import create_access_token, verify_token
+from app.main import app
+from app.models.user import UserType
+from app.schemas.user import User as UserSchema
+from app.schemas.user import UserCreate
+from app.services.user_service import (
+    create_user,
+    get_user_by_email,
+    get_user_by_id,
+)
+
+BENCH_EMAIL = "bench-auth-me@byd90.com"
+ASYNC_PATH = "/api/v1/auth/me"
+SYNC_PATH = "/bench/sync/me"
+
+
+@app.get(SYNC_PATH, response_model=UserSchema, include_in_schema=False)
+def sync_me(
+    db: Session = Depends(get_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> Any:
+    """Previous implementation: threadpool endpoint on a sync session"""
+    user_id = verify_token(credentials.credentials)
+    user = get_user_by_id(db, user_id=int(user_id)) if user_id else None
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return user
+
+
+def ensure_user() -> int:
+    """Create the benchmark user if needed and return its id"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = get_user_by_email(db, BENCH_EMAIL)
+        if user is None:
+            user = create_user(
+                db,
+                UserCreate(
+                    email=BENCH_EMAIL,
+                    username="bench_auth_me",
+                    first_name="Bench",
+                    last_name="Mark",
+                    user_type=UserType.ATHLETE,
+                    password="BenchPassw0rd",
+                ),
+            )
+        return int(user.id)
+    finally:
+        db.close()
+
+
+async def run(path: str, token: str, total: int, concurrency: int) -> None:
+    """Fire `total` requests at `path` with `concurrency` in flight"""
+    latencies: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def worker() -> None:
+            while not queue.empty():
+                queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    # Pooled asyncpg connections are bound to this event loop
+    await async_engine.dispose()
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{path:<20} c={concurrency:<4} {total / elapsed:>9.1f} req/s  "
+        f"p50={statistics.median(latencies) * 1000:.1f}ms  "
+        f"p95={p95 * 1000:.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[10, 50, 200]
+    )
+    args = parser.parse_args()
+
+    token = create_access_token(subject=ensure_user())
+    for concurrency in args.concurrency:
+        for path in (SYNC_PATH, ASYNC_PATH):
+            asyncio.run(run(path, token, args.requests, concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: ranking coaches for an athlete from the feature matrix
+
+Builds a synthetic coach matrix (no database) of the given size, then
+reports the build time and the latency of a top-K ranking for athletes of
+random sports and levels, with and without specialization and budget
+filters.
+
+    poetry run python -m benchmarks.coach_matching --coaches 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.models.athlete import Sport
+from app.models.coach import CoachSpecialization
+from app.services.coach_matching import (
+    ATHLETE_LEVELS,
+    CoachFeatures,
+    CoachMatchIndex,
+)
+
+
+def synthetic_coaches(coaches: int):
+    """(coach_id, features, athletes) rows with random profiles"""
+    rng = np.random.default_rng(90)
+    rows = []
+    for coach_id in range(1, coaches + 1):
+        rows.append(
+            (
+                coach_id,
+                CoachFeatures(
+                    sports=int(rng.integers(1, 1 << len(Sport))),
+                    specializations=int(rng.integers(0, 256)),
+                    levels=int(rng.integers(0, 1 << len(ATHLETE_LEVELS))),
+                    hourly_rate=float(rng.uniform(20, 200)),
+                    rating=float(rng.uniform(0, 5)),
+                    accepting=bool(rng.random() < 0.9),
+                    capacity=float(rng.integers(5, 40)),
+                ),
+                float(rng.integers(0, 40)),
+            )
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--coaches", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--rankings", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = synthetic_coaches(args.coaches)
+    index = CoachMatchIndex(refresh_interval=0)
+    start = time.perf_counter()
+    index.build(rows)
+    build = time.perf_counter() - start
+    print(f"build: {len(index)} coaches in {build * 1000:.1f}ms")
+
+    rng = np.random.default_rng(1)
+    sports = list(Sport)
+    specializations = list(CoachSpecialization)
+    for label, filtered in (("top-k", False), ("top-k filtered", True)):
+        start = time.perf_counter()
+        for _ in range(args.rankings):
+            index.top_k(
+                sports[rng.integers(len(sports))],
+                args.limit,
+                secondary_sports=[sports[rng.integers(len(sports))]],
+                experience_level=ATHLETE_LEVELS[
+                    rng.integers(len(ATHLETE_LEVELS))
+                ],
+                specializations=(
+                    specializations[:2] if filtered else ()
+                ),
+                max_rate=100.0 if filtered else None,
+            )
+        elapsed = time.perf_counter() - start
+        print(f"{label + ':':16}{elapsed / args.rankings * 1000:.2f}ms per ranking")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: building cohort metric matrices and ranking against them
+
+Builds synthetic cohorts (no database) of the given size for every metric
+registered for soccer, then reports the build time and the latency of a
+member ranking lookup and of a percentile lookup for an arbitrary value.
+
+    poetry run python -m benchmarks.cohort_percentiles --athletes 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.models.athlete import AthletePosition, Sport
+from app.models.athlete_metric import METRIC_REGISTRY
+from app.services.cohort_stats import Cohort
+
+
+def synthetic_rows(athletes: int, fill: float):
+    """(athlete_id, metric, value) columns with `fill` of the cells present"""
+    rng = np.random.default_rng(90)
+    metrics = [metric.name for metric in METRIC_REGISTRY[Sport.SOCCER]]
+    ids = np.repeat(np.arange(1, athletes + 1), len(metrics))
+    names = np.tile(np.array(metrics, dtype=object), athletes)
+    keep = rng.random(ids.size) < fill
+    values = rng.normal(50, 10, ids.size)
+    return ids[keep], names[keep], values[keep]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--athletes", type=int, default=50_000)
+    parser.add_argument("--fill", type=float, default=0.8)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    key = (Sport.SOCCER, AthletePosition.FORWARD, None)
+    ids, names, values = synthetic_rows(args.athletes, args.fill)
+    start = time.perf_counter()
+    cohort = Cohort.build(key, ids, names, values)
+    build = time.perf_counter() - start
+    print(
+        f"build: {cohort.size} athletes x {len(cohort.metrics)} metrics "
+        f"in {build * 1000:.1f}ms"
+    )
+
+    members = np.random.default_rng(1).integers(1, args.athletes, args.lookups)
+    start = time.perf_counter()
+    for athlete_id in members.tolist():
+        row = cohort.member(athlete_id)
+        if row is not None:
+            cohort.percentiles[row]
+            cohort.z_scores[row]
+    elapsed = time.perf_counter() - start
+    print(f"member ranks:   {elapsed / args.lookups * 1e6:.2f}us per lookup")
+
+    start = time.perf_counter()
+    for value in values[: args.lookups].tolist():
+        cohort.percentile_of("sprint_30m", value)
+    elapsed = time.perf_counter() - start
+    print(f"percentile_of:  {elapsed / args.lookups * 1e6:.2f}us per lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark: concurrent sign-ups competing for the same email and username
+
+Fires bursts of /auth/register requests where many requests share an
+identity, against the previous check-then-insert implementation and the
+single INSERT ... ON CONFLICT statement. Every username must end up
+registered exactly once and every other request must get a 400; the
+previous path lets unique violations through as 500s. Password hashing
+runs at bcrypt's minimum cost so the database path dominates (see
+benchmarks.password_hashing for hashing throughput).
+
+Requires the configured PostgreSQL database to be reachable.
+
+    poetry run python -m benchmarks.concurrent_signup --requests 1000 --identities 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import Any, List
+
+import httpx
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_async_db
+from app.core.config import settings
+from app.core.database import Base, async_engine, engine
+from app.core.hashing import hash_password, password_hasher
+from app.main import app
+from app.models.user import User
+from app.schemas.user import UserRegister
+from app.services.async_user_service import get_user_by_email
+
+NEW_PATH = "/api/v1/auth/register"
+OLD_PATH = "/bench/signup/check-then-insert"
+EMAIL_PREFIX = "bench-signup-"
+PASSWORD = "BenchPassw0rd"
+
+
+@app.post(OLD_PATH, status_code=status.HTTP_201_CREATED, include_in_schema=False)
+async def check_then_insert(
+    user_data: UserRegister, db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """Previous implementation: email lookup, then add/commit/refresh"""
+    if await get_user_by_email(db, email=user_data.email):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists",
+        )
+    user = User(
+        email=user_data.email,
+        username=user_data.username,
+        hashed_password=await hash_password(user_data.password),
+        first_name=user_data.first_name,
+        last_name=user_data.last_name,
+        user_type=user_data.user_type,
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return {"id": user.id}
+
+
+def signup_body(request: int, identities: int) -> dict:
+    """Every third request reuses a username with a fresh email"""
+    identity = request % identities
+    email = f"{EMAIL_PREFIX}{identity}@byd90.com"
+    if request % 3 == 2:
+        email = f"{EMAIL_PREFIX}{identity}-{request}@byd90.com"
+    return {
+        "email": email,
+        "username": f"bench_signup_{identity}",
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+        "first_name": "Bench",
+        "last_name": "Mark",
+        "user_type": "athlete",
+    }
+
+
+async def reset() -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            delete(User).where(User.email.like(f"{EMAIL_PREFIX}%"))
+        )
+
+
+async def run(path: str, total: int, identities: int, concurrency: int) -> None:
+    """Send `total` sign-ups for `identities` users with `concurrency` in flight"""
+    await reset()
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    queue: asyncio.Queue = asyncio.Queue()
+    for request in range(total):
+        queue.put_nowait(request)
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def worker() -> None:
+            while not queue.empty():
+                request = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.post(
+                    path, json=signup_body(request, identities)
+                )
+                latencies.append(time.perf_counter() - start)
+                outcomes[response.status_code] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    async with async_engine.connect() as conn:
+        registered = await conn.scalar(
+            select(func.count())
+            .select_from(User)
+            .where(User.email.like(f"{EMAIL_PREFIX}%"))
+        )
+    # Pooled asyncpg connections are bound to this event loop
+    await async_engine.dispose()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    correct = (
+        registered == identities
+        and outcomes[201] == identities
+        and outcomes[400] == total - identities
+    )
+    print(
+        f"{path:<34} {total / elapsed:>8.1f} req/s  "
+        f"p50={statistics.median(latencies) * 1000:.1f}ms  "
+        f"p95={p95 * 1000:.1f}ms  "
+        f"201={outcomes[201]} 400={outcomes[400]} "
+        f"other={total - outcomes[201] - outcomes[400]}  "
+        f"rows={registered}  {'OK' if correct else 'WRONG'}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--identities", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    settings.RATE_LIMIT_ENABLED = False
+    password_hasher.configure(4)  # bcrypt's minimum cost
+    for path in (OLD_PATH, NEW_PATH):
+        asyncio.run(run(path, args.requests, args.identities, args.concurrency))
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
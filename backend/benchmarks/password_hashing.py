@@ -0,0 +1,84 @@
+"""
+Benchmark: login password verification throughput against hashing pool size
+
+Runs bursts of concurrent verify calls through PasswordHasher, the same
+path /auth/login takes, for each pool size. No database is needed.
+
+    poetry run python -m benchmarks.password_hashing --logins 200 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+from app.core.hashing import HashingPoolBusy, PasswordHasher
+from app.core.security import get_password_hash
+
+PASSWORD = "BenchPassw0rd"
+
+
+async def run(workers: int, logins: int, queue_depth: int, hashed: str) -> None:
+    """Verify `logins` passwords concurrently on a pool of `workers`"""
+    hasher = PasswordHasher(workers=workers, queue_depth=queue_depth)
+    hasher.start()
+    # Warm the pool so process start-up is not measured
+    await asyncio.gather(
+        *(hasher.verify(PASSWORD, hashed) for _ in range(workers))
+    )
+
+    latencies: List[float] = []
+    rejected = 0
+
+    async def login() -> None:
+        nonlocal rejected
+        start = time.perf_counter()
+        try:
+            await hasher.verify(PASSWORD, hashed)
+        except HashingPoolBusy:
+            rejected += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+
+    latencies.sort()
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    print(
+        f"workers={workers:<3} {len(latencies) / elapsed:>8.1f} logins/s  "
+        f"p50={statistics.median(latencies) * 1000:.0f}ms  "
+        f"p95={p95 * 1000:.0f}ms  rejected(503)={rejected}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=None,
+        help="Waiting calls before 503 (default: no rejections)",
+    )
+    args = parser.parse_args()
+
+    hashed = get_password_hash(PASSWORD)
+    for workers in args.workers:
+        queue_depth = (
+            args.queue_depth if args.queue_depth is not None else args.logins
+        )
+        asyncio.run(run(workers, args.logins, queue_depth, hashed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: user search latency on a large users table
+
+Seeds benchmark users (once) and reports p50/p99 latency of search_users
+for autocomplete prefixes answered by the in-memory prefix cache, and for
+prefix, substring and misspelled queries answered by the pg_trgm indexes.
+The target is p99 under 20 ms with a million users.
+
+Requires the configured PostgreSQL database with the pg_trgm extension.
+
+    poetry run python -m benchmarks.user_search --users 1000000 --queries 2000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Callable, List
+
+from sqlalchemy import func, select, text
+
+from app.core.database import AsyncSessionLocal, Base, async_engine, engine
+from app.models.user import User
+from app.services.user_search import search_cache, search_users
+
+EMAIL_SUFFIX = "@search-bench.byd90.com"
+FIRST_NAMES = ["james", "maria", "chen", "aisha", "lucas", "sofia", "omar", "emma"]
+LAST_NAMES = ["smith", "garcia", "nguyen", "okafor", "muller", "rossi", "khan", "lee"]
+
+
+def seed(users: int) -> None:
+    """Insert benchmark users until there are `users` of them"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        existing = conn.scalar(
+            select(func.count())
+            .select_from(User)
+            .where(User.email.like(f"%{EMAIL_SUFFIX}"))
+        )
+        if existing >= users:
+            return
+        first = "(ARRAY[%s])[1 + g %% 8]" % ", ".join(
+            f"'{name.title()}'" for name in FIRST_NAMES
+        )
+        last = "(ARRAY[%s])[1 + (g / 8) %% 8] || g" % ", ".join(
+            f"'{name.title()}'" for name in LAST_NAMES
+        )
+        conn.execute(
+            text(
+                "INSERT INTO users (email, username, hashed_password, "
+                "first_name, last_name, user_type, is_active, is_verified, "
+                "is_premium, created_at, updated_at) "
+                f"SELECT 'sb' || g || '{EMAIL_SUFFIX}', 'sb_user' || g, 'x', "
+                f"{first}, {last}, 'ATHLETE', true, false, false, "
+                "now(), now() "
+                "FROM generate_series(:start, :stop) AS g"
+            ),
+            {"start": existing + 1, "stop": users},
+        )
+        conn.execute(text("ANALYZE users"))
+
+
+def misspell(word: str) -> str:
+    """Swap two adjacent letters"""
+    i = random.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+
+
+async def measure(label: str, queries: int, make_query: Callable[[], str]) -> None:
+    latencies: List[float] = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(queries):
+            query = make_query()
+            start = time.perf_counter()
+            await search_users(db, query, limit=20)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<28} p50={p50:.2f}ms  p99={p99:.2f}ms")
+
+
+async def run(users: int, queries: int) -> None:
+    start = time.perf_counter()
+    loaded = await search_cache.refresh()
+    print(
+        f"prefix cache: {loaded} users in "
+        f"{time.perf_counter() - start:.1f}s"
+    )
+
+    def prefix() -> str:
+        return f"sb_user{random.randrange(1, users)}"[: random.randint(3, 9)]
+
+    await measure("cache: username prefix", queries, prefix)
+
+    # Force the database path for the rest
+    search_cache.build([], complete=False)
+    await measure("db: username prefix", queries, prefix)
+    await measure(
+        "db: last name substring",
+        queries,
+        lambda: random.choice(LAST_NAMES)[1:] + str(random.randrange(users)),
+    )
+    await measure(
+        "db: misspelled full name",
+        queries,
+        lambda: f"{misspell(random.choice(FIRST_NAMES))} "
+        f"{random.choice(LAST_NAMES)}{random.randrange(users)}",
+    )
+    # Pooled asyncpg connections are bound to this event loop
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    seed(args.users)
+    asyncio.run(run(args.users, args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Shared test fixtures
+
+Tests that touch the database run against TEST_DATABASE_URL, a scratch
+PostgreSQL database whose tables are created once per session and emptied
+after every test; they are skipped when it is not set. Never point it at a
+database whose data you want to keep.
+"""
+import asyncio
+import os
+from typing import AsyncIterator, Iterator
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Settings are read at import time, so configure them before app imports
+    os.environ["SQLALCHEMY_DATABASE_URI"] = TEST_DATABASE_URL
+    os.environ.pop("SQLALCHEMY_ASYNC_DATABASE_URI", None)
+    os.environ["SQLALCHEMY_REPLICA_URIS"] = "[]"
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_MIN_ROUNDS", "4")
+
+import fakeredis  # noqa: E402
+import httpx  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+import app.core.redis as redis_clients  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.core.database import Base, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def event_loop() -> Iterator[asyncio.AbstractEventLoop]:
+    # One loop for the session: pooled asyncpg connections are bound to it
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def database() -> Iterator[None]:
+    """Create the schema in the test database"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    try:
+        Base.metadata.create_all(engine)
+    except OperationalError as exc:
+        pytest.skip(f"Test database unavailable: {exc}")
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def clean_db(database: None) -> Iterator[None]:
+    """Empty every table after the test (ids keep increasing)"""
+    yield
+    tables = ", ".join(
+        f'"{table.name}"' for table in Base.metadata.sorted_tables
+    )
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+
+@pytest_asyncio.fixture
+async def client(clean_db: None) -> AsyncIterator[httpx.AsyncClient]:
+    """HTTP client for the app with its startup and shutdown hooks run"""
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as http_client:
+            yield http_client
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> fakeredis.FakeAsyncRedis:
+    """In-memory Redis behind get_redis() and get_async_redis()"""
+    server = fakeredis.FakeServer()
+    async_redis = fakeredis.FakeAsyncRedis(server=server)
+    monkeypatch.setattr(redis_clients, "_redis", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(redis_clients, "_async_redis", async_redis)
+    monkeypatch.setattr(redis_clients, "_unavailable_until", 0.0)
+    return async_redis
@@ -0,0 +1,58 @@
+"""
+Athlete BMI: the stored column and the in-memory value follow one rule
+"""
+import pytest
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.athlete import Athlete, AthletePosition, Sport
+from app.models.user import User, UserType
+
+
+def make_athlete(db, name: str, height, weight) -> Athlete:
+    user = User(
+        email=f"{name}@example.com",
+        username=name,
+        hashed_password="x",
+        first_name="Test",
+        last_name=name,
+        user_type=UserType.ATHLETE,
+    )
+    db.add(user)
+    db.flush()
+    athlete = Athlete(
+        user_id=user.id,
+        primary_sport=Sport.SOCCER,
+        primary_position=AthletePosition.FORWARD,
+        height=height,
+        weight=weight,
+    )
+    db.add(athlete)
+    return athlete
+
+
+@pytest.mark.parametrize(
+    "height, weight, expected",
+    [
+        (180.0, 81.0, 25.0),
+        (180.0, 0.0, None),
+        (180.0, -5.0, None),
+        (0.0, 81.0, None),
+        (-180.0, 81.0, None),
+        (None, 81.0, None),
+        (180.0, None, None),
+    ],
+)
+def test_bmi_matches_in_memory_and_in_sql(clean_db, height, weight, expected):
+    with SessionLocal() as db:
+        athlete = make_athlete(db, "bmi", height, weight)
+        assert athlete.bmi == expected
+        db.commit()
+
+        assert db.scalar(select(Athlete.bmi)) == expected
+        db.expire(athlete)
+        assert athlete.bmi == expected
+        matched = db.scalar(
+            select(Athlete.id).where(Athlete.bmi >= 0).where(Athlete.bmi <= 100)
+        )
+        assert (matched is not None) == (expected is not None)
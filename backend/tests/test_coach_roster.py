@@ -0,0 +1,114 @@
+"""
+Coach roster: the payload is built in a constant number of queries
+"""
+import pytest
+
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.query_stats import start_query_stats, stop_query_stats
+from app.models.athlete import Athlete, AthletePosition, Sport
+from app.models.coach import Coach, CoachAthleteConnection
+from app.models.recommendation import (
+    Recommendation,
+    RecommendationStatus,
+    RecommendationType,
+)
+from app.models.user import User, UserType
+from app.services.coach_service import get_coach_roster
+
+LARGE_ROSTER = 25
+
+
+def make_user(db, name: str, user_type: UserType) -> User:
+    user = User(
+        email=f"{name}@example.com",
+        username=name,
+        hashed_password="x",
+        first_name="Test",
+        last_name=name,
+        user_type=user_type,
+    )
+    db.add(user)
+    db.flush()
+    return user
+
+
+def add_athletes(coach_id: int, start: int, stop: int) -> None:
+    """Connect athletes start..stop-1, each with metrics and recommendations"""
+    with SessionLocal() as db:
+        for i in range(start, stop):
+            user = make_user(db, f"athlete{i}", UserType.ATHLETE)
+            athlete = Athlete(
+                user_id=user.id,
+                primary_sport=Sport.SOCCER,
+                primary_position=AthletePosition.FORWARD,
+                fitness_metrics={"sprint_30m": 4.0 + i / 100},
+                game_stats={"goals": i},
+            )
+            db.add(athlete)
+            db.flush()
+            db.add(CoachAthleteConnection(coach_id=coach_id, athlete_id=athlete.id))
+            for status in (
+                RecommendationStatus.PENDING,
+                RecommendationStatus.PENDING,
+                RecommendationStatus.COMPLETED,
+            ):
+                db.add(
+                    Recommendation(
+                        athlete_id=athlete.id,
+                        title="Sprint work",
+                        description="Add two sprint sessions a week",
+                        recommendation_type=RecommendationType.FITNESS,
+                        status=status,
+                    )
+                )
+        db.commit()
+
+
+async def roster_queries(user_id: int):
+    stats = start_query_stats()
+    try:
+        async with AsyncSessionLocal() as db:
+            roster = await get_coach_roster(db, user_id)
+    finally:
+        stop_query_stats()
+    return roster, stats.count
+
+
+@pytest.mark.asyncio
+async def test_roster_query_count_is_constant(clean_db):
+    with SessionLocal() as db:
+        coach_user = make_user(db, "coach", UserType.COACH)
+        coach = Coach(user_id=coach_user.id, coaching_level="college")
+        db.add(coach)
+        db.flush()
+        user_id, coach_id = coach_user.id, coach.id
+        db.commit()
+
+    counts = []
+    for size, (start, stop) in (
+        (0, (0, 0)),
+        (1, (0, 1)),
+        (LARGE_ROSTER, (1, LARGE_ROSTER)),
+    ):
+        add_athletes(coach_id, start, stop)
+        roster, count = await roster_queries(user_id)
+        assert len(roster.items) == size
+        counts.append(count)
+
+    assert counts[1] == counts[2], counts
+    # An empty roster skips the metrics query, it never needs more
+    assert counts[0] <= counts[1]
+
+    entry = roster.items[0]
+    assert entry.pending_recommendations == 2
+    assert {metric.metric for metric in entry.metrics} == {"sprint_30m", "goals"}
+    assert entry.username.startswith("athlete")
+
+
+@pytest.mark.asyncio
+async def test_roster_requires_a_coach_profile(clean_db):
+    with SessionLocal() as db:
+        user_id = make_user(db, "not-a-coach", UserType.ATHLETE).id
+        db.commit()
+    async with AsyncSessionLocal() as db:
+        assert await get_coach_roster(db, user_id) is None
@@ -0,0 +1,130 @@
+"""
+Concurrent sign-ups for the same identity: exactly one wins, the rest 400
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select
+
+from app.api.rate_limit import register_rate_limit
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.main import app
+from app.models.user import User, UserType
+from app.schemas.user import UserCreate
+from app.services import async_user_service, user_service
+
+CONCURRENCY = 12
+PASSWORD = "Passw0rdX"
+
+
+def new_user(email: str, username: str) -> UserCreate:
+    return UserCreate(
+        email=email,
+        username=username,
+        password=PASSWORD,
+        first_name="Test",
+        last_name="User",
+        user_type=UserType.ATHLETE,
+    )
+
+
+def count_users(username: str) -> int:
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count()).where(User.username == username)
+        )
+
+
+@pytest.fixture
+def no_register_limit():
+    app.dependency_overrides[register_rate_limit] = lambda: None
+    yield
+    app.dependency_overrides.pop(register_rate_limit, None)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "shared_email, field", [(True, "email"), (False, "username")]
+)
+async def test_register_race_has_one_winner(
+    client, no_register_limit, shared_email, field
+):
+    def body(i: int) -> dict:
+        email = "racer@example.com" if shared_email else f"racer{i}@example.com"
+        return {
+            "email": email,
+            "username": "racer",
+            "password": PASSWORD,
+            "confirm_password": PASSWORD,
+            "first_name": "Test",
+            "last_name": "User",
+            "user_type": "athlete",
+        }
+
+    responses = await asyncio.gather(
+        *(
+            client.post("/api/v1/auth/register", json=body(i))
+            for i in range(CONCURRENCY)
+        )
+    )
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [201] + [400] * (CONCURRENCY - 1)
+    for response in responses:
+        if response.status_code == 400:
+            assert response.json()["detail"] == (
+                f"User with this {field} already exists"
+            )
+    assert count_users("racer") == 1
+
+
+@pytest.mark.asyncio
+async def test_async_create_user_race(clean_db):
+    async def attempt():
+        async with AsyncSessionLocal() as db:
+            try:
+                return await async_user_service.create_user(
+                    db, new_user("async@example.com", "async-racer")
+                )
+            except async_user_service.UserAlreadyExists as exc:
+                return exc
+
+    results = await asyncio.gather(*(attempt() for _ in range(CONCURRENCY)))
+
+    created = [result for result in results if isinstance(result, User)]
+    rejected = [
+        result
+        for result in results
+        if isinstance(result, async_user_service.UserAlreadyExists)
+    ]
+    assert len(created) == 1
+    assert len(rejected) == CONCURRENCY - 1
+    assert count_users("async-racer") == 1
+
+
+def test_sync_create_user_race(clean_db):
+    barrier = threading.Barrier(CONCURRENCY)
+
+    def attempt():
+        with SessionLocal() as db:
+            barrier.wait()
+            try:
+                return user_service.create_user(
+                    db, new_user("sync@example.com", "sync-racer")
+                )
+            except user_service.UserAlreadyExists as exc:
+                return exc
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        results = list(pool.map(lambda _: attempt(), range(CONCURRENCY)))
+
+    created = [result for result in results if isinstance(result, User)]
+    assert len(created) == 1
+    assert all(
+        isinstance(result, user_service.UserAlreadyExists)
+        for result in results
+        if result not in created
+    )
+    assert count_users("sync-racer") == 1
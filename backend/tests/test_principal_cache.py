@@ -0,0 +1,126 @@
+"""
+Principal cache: invalidations win over stale and in-flight cache fills
+"""
+import time
+
+import pytest
+from redis import RedisError
+
+import app.core.redis as redis_clients
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models.user import User, UserType
+from app.services import principal_cache
+from app.services.async_user_service import deactivate_user
+from app.services.principal_cache import (
+    ainvalidate_principal,
+    get_principal,
+    get_principal_cache_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_principal_cache(monkeypatch):
+    # The registered script is bound to the previous test's Redis client
+    monkeypatch.setattr(principal_cache, "_script", None)
+    principal_cache._l1.clear()
+    principal_cache._pending.clear()
+    yield
+    principal_cache._l1.clear()
+    principal_cache._pending.clear()
+
+
+@pytest.fixture
+def user_id(clean_db) -> int:
+    with SessionLocal() as db:
+        user = User(
+            email="principal@example.com",
+            username="principal",
+            hashed_password="x",
+            first_name="Test",
+            last_name="User",
+            user_type=UserType.COACH,
+        )
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+def back_off_redis(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(redis_clients, "_unavailable_until", time.monotonic() + 60)
+
+
+async def cached_principal(fake_redis, user_id: int):
+    raw = await fake_redis.get(principal_cache._redis_key(user_id))
+    generation = await fake_redis.get(principal_cache._generation_key(user_id))
+    return principal_cache._decode(raw, generation or b"0")
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_backoff_is_retried(
+    fake_redis, monkeypatch, user_id
+):
+    async with AsyncSessionLocal() as db:
+        assert (await get_principal(db, user_id)).is_active
+    assert (await cached_principal(fake_redis, user_id)).is_active
+
+    back_off_redis(monkeypatch)
+    async with AsyncSessionLocal() as db:
+        await deactivate_user(db, user_id)
+    assert get_principal_cache_stats()["pending_invalidations"] == 1
+
+    # Another worker still reading Redis must not get the stale principal
+    # once this one can reach it again
+    monkeypatch.setattr(redis_clients, "_unavailable_until", 0.0)
+    principal_cache._l1.clear()
+    async with AsyncSessionLocal() as db:
+        assert not (await get_principal(db, user_id)).is_active
+    assert get_principal_cache_stats()["pending_invalidations"] == 0
+    assert not (await cached_principal(fake_redis, user_id)).is_active
+
+
+@pytest.mark.asyncio
+async def test_failed_invalidation_bypasses_redis_until_retried(
+    fake_redis, monkeypatch, user_id
+):
+    async with AsyncSessionLocal() as db:
+        await get_principal(db, user_id)
+
+    def unreachable(*args, **kwargs):
+        raise RedisError("connection refused")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(fake_redis, "pipeline", unreachable)
+        async with AsyncSessionLocal() as db:
+            await deactivate_user(db, user_id)
+    assert get_principal_cache_stats()["pending_invalidations"] == 1
+
+    # Still backing off: the stale entry in Redis is not consulted
+    async with AsyncSessionLocal() as db:
+        assert not (await get_principal(db, user_id)).is_active
+    assert (await cached_principal(fake_redis, user_id)).is_active
+
+    monkeypatch.setattr(redis_clients, "_unavailable_until", 0.0)
+    principal_cache._l1.clear()
+    async with AsyncSessionLocal() as db:
+        assert not (await get_principal(db, user_id)).is_active
+    assert not (await cached_principal(fake_redis, user_id)).is_active
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_a_miss_is_not_overwritten(
+    fake_redis, monkeypatch, user_id
+):
+    async with AsyncSessionLocal() as db:
+        execute = db.execute
+
+        async def invalidated_after_read(*args, **kwargs):
+            result = await execute(*args, **kwargs)
+            await ainvalidate_principal(user_id)
+            return result
+
+        monkeypatch.setattr(db, "execute", invalidated_after_read)
+        principal = await get_principal(db, user_id)
+
+    assert principal.id == user_id
+    assert await fake_redis.get(principal_cache._redis_key(user_id)) is None
+    assert principal_cache._l1.get(user_id) is None
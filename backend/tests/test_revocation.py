@@ -0,0 +1,76 @@
+"""
+Revocation list sync: full reads only to (re)build the Bloom filter
+"""
+import time
+
+import pytest
+
+from app.core.revocation import _REVOKED_SET, RevocationList
+
+CAPACITY = 10
+
+
+class CountingReads:
+    """Counts full and incremental reads of the revoked set"""
+
+    def __init__(self, redis, monkeypatch: pytest.MonkeyPatch):
+        self.full = 0
+        self.incremental = 0
+        zrange, zrangebyscore = redis.zrange, redis.zrangebyscore
+
+        async def full_read(*args, **kwargs):
+            self.full += 1
+            return await zrange(*args, **kwargs)
+
+        async def incremental_read(*args, **kwargs):
+            self.incremental += 1
+            return await zrangebyscore(*args, **kwargs)
+
+        monkeypatch.setattr(redis, "zrange", full_read)
+        monkeypatch.setattr(redis, "zrangebyscore", incremental_read)
+
+
+@pytest.mark.asyncio
+async def test_sync_after_rebuild_is_incremental(fake_redis, monkeypatch):
+    now = time.time()
+    revoked = {f"jti-{i}": now for i in range(3 * CAPACITY)}
+    await fake_redis.zadd(_REVOKED_SET, revoked)
+    reads = CountingReads(fake_redis, monkeypatch)
+    revocations = RevocationList(
+        capacity=CAPACITY, error_rate=0.01, sync_interval=1.0
+    )
+
+    assert await revocations.sync() == len(revoked)
+    assert reads.full == 1
+    # The rebuilt filter is sized for the set, beyond the configured capacity
+    assert revocations._bloom.capacity > CAPACITY
+    assert revocations._bloom.count > CAPACITY
+
+    await fake_redis.zadd(_REVOKED_SET, {"jti-new": time.time()})
+    for _ in range(5):
+        await revocations.sync()
+
+    assert reads.full == 1
+    assert reads.incremental == 5
+    assert "jti-new" in revocations._bloom
+    assert all(jti in revocations._bloom for jti in revoked)
+
+
+@pytest.mark.asyncio
+async def test_overfull_filter_is_rebuilt(fake_redis, monkeypatch):
+    revocations = RevocationList(
+        capacity=CAPACITY, error_rate=0.01, sync_interval=1.0
+    )
+    await revocations.sync()
+    reads = CountingReads(fake_redis, monkeypatch)
+
+    now = time.time()
+    await fake_redis.zadd(
+        _REVOKED_SET, {f"jti-{i}": now for i in range(2 * CAPACITY)}
+    )
+    await revocations.sync()
+    assert (reads.full, reads.incremental) == (0, 1)
+
+    await revocations.sync()
+    assert (reads.full, reads.incremental) == (1, 1)
+    assert revocations._bloom.capacity >= 4 * CAPACITY